@@ -0,0 +1,22 @@
+import pytest
+
+
+@pytest.fixture
+def mocked_aws(monkeypatch):
+    """
+    Stand in for AWS with moto, with fake credentials and without the sessions and clients of earlier tests.
+    """
+    moto = pytest.importorskip('moto')
+    from toolbox import aws, dynamodb_utils
+
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.delenv('AWS_SESSION_TOKEN', raising=False)
+    monkeypatch.delenv('AWS_PROFILE', raising=False)
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with moto.mock_aws():
+        aws.clear()
+        dynamodb_utils._reset_resources()
+        yield
+    aws.clear()
+    dynamodb_utils._reset_resources()
@@ -0,0 +1,224 @@
+import threading
+
+import pytest
+
+from toolbox import aws, copy_sqs_from_to_acc
+from toolbox.copy_sqs_from_to_acc import copy_sqs_messages
+
+
+def create_queue(name, fifo=False):
+    attributes = {'FifoQueue': 'true', 'ContentBasedDeduplication': 'true'} if fifo else {}
+    return aws.client('sqs').create_queue(QueueName=f'{name}.fifo' if fifo else name, Attributes=attributes)['QueueUrl']
+
+
+def send_messages(queue_url, bodies, group=None):
+    sqs = aws.client('sqs')
+    for body in bodies:
+        send_kwargs = {'QueueUrl': queue_url, 'MessageBody': body}
+        if group:
+            send_kwargs['MessageGroupId'] = group
+        sqs.send_message(**send_kwargs)
+
+
+def receive_all(queue_url):
+    """
+    Receive and delete every message of a queue, in the order the queue hands them out.
+    """
+    sqs = aws.client('sqs')
+    bodies = []
+    while True:
+        messages = sqs.receive_message(
+            QueueUrl=queue_url, MaxNumberOfMessages=10, WaitTimeSeconds=0, AttributeNames=['All']
+        ).get('Messages', [])
+        if not messages:
+            return bodies
+        for message in messages:
+            bodies.append(message['Body'])
+            sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message['ReceiptHandle'])
+
+
+def run_copy(source_queue_url, destination_queue_url, **options):
+    # In a thread, so a transfer that never stops fails the test instead of hanging it
+    thread = threading.Thread(target=copy_sqs_messages, args=(
+        source_queue_url, None, None, None, destination_queue_url, None, None, None
+    ), kwargs=options)
+    thread.start()
+    thread.join(60)
+    assert not thread.is_alive(), "The transfer did not stop"
+
+
+@pytest.fixture
+def receive_wait_times(monkeypatch):
+    receive_batch = copy_sqs_from_to_acc.receive_batch
+    wait_times = []
+
+    def recording_receive_batch(source_sqs, source_queue_url, stats, wait_time_seconds=1, visibility_timeout=None):
+        wait_times.append(wait_time_seconds)
+        return receive_batch(source_sqs, source_queue_url, stats, wait_time_seconds, visibility_timeout)
+
+    monkeypatch.setattr(copy_sqs_from_to_acc, 'receive_batch', recording_receive_batch)
+    return wait_times
+
+
+@pytest.mark.parametrize('options, wait_time', [
+    ({}, 1), ({'wait_time_seconds': 0}, 0), ({'long_running': True, 'wait_time_seconds': 0}, 0),
+])
+def test_wait_time_applies_to_every_receive(mocked_aws, receive_wait_times, options, wait_time):
+    source_queue_url, destination_queue_url = create_queue('source'), create_queue('destination')
+    send_messages(source_queue_url, [f'message {index}' for index in range(25)])
+
+    run_copy(source_queue_url, destination_queue_url, **options)
+
+    assert sorted(receive_all(destination_queue_url)) == sorted(f'message {index}' for index in range(25))
+    assert receive_wait_times and set(receive_wait_times) == {wait_time}
+
+
+@pytest.fixture
+def failing_sends(monkeypatch):
+    """
+    Make sends of chosen message bodies fail, returns the dict to fill with body -> number of sends to fail
+    (None for all) and the number of failed sends of every body.
+    """
+    send_entries = copy_sqs_from_to_acc.send_entries
+    failures = {}
+    attempts = {}
+
+    def partly_failing_send_entries(destination_sqs, destination_queue_url, entries, stats, send_retries=2):
+        failing = []
+        for entry in entries:
+            body = entry['MessageBody']
+            if body in failures and (failures[body] is None or attempts.get(body, 0) < failures[body]):
+                attempts[body] = attempts.get(body, 0) + 1
+                failing.append(entry)
+        sent_ids, failed = [], []
+        entries = [entry for entry in entries if entry not in failing]
+        if entries:
+            sent_ids, failed = send_entries(destination_sqs, destination_queue_url, entries, stats, send_retries)
+        failed += [
+            {'Id': entry['Id'], 'SenderFault': True, 'Code': 'InjectedFailure', 'Message': 'Injected failure'}
+            for entry in failing
+        ]
+        return sent_ids, failed
+
+    monkeypatch.setattr(copy_sqs_from_to_acc, 'send_entries', partly_failing_send_entries)
+    return failures, attempts
+
+
+def queue_size(queue_url):
+    """
+    Number of messages left in a queue, visible or not.
+    """
+    attributes = aws.client('sqs').get_queue_attributes(
+        QueueUrl=queue_url, AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible']
+    )['Attributes']
+    return sum(int(count) for count in attributes.values())
+
+
+def test_fifo_order_is_kept_within_every_group(mocked_aws):
+    source_queue_url, destination_queue_url = create_queue('source', fifo=True), create_queue('destination', fifo=True)
+    groups = {group: [f'{group}{index}' for index in range(25)] for group in 'abc'}
+    for group, bodies in groups.items():
+        send_messages(source_queue_url, bodies, group)
+
+    run_copy(source_queue_url, destination_queue_url, workers=3, long_running=True, wait_time_seconds=0)
+
+    delivered = receive_all(destination_queue_url)
+    assert {group: [body for body in delivered if body[0] == group] for group in groups} == groups
+    assert queue_size(source_queue_url) == 0
+
+
+def test_failed_fifo_message_holds_back_the_rest_of_its_group(mocked_aws, failing_sends):
+    # moto hands out only the last message of a group once a failed receive times out, so redelivery in order is
+    # checked on a single batch
+    source_queue_url, destination_queue_url = create_queue('source', fifo=True), create_queue('destination', fifo=True)
+    send_messages(source_queue_url, ['a0', 'a1', 'a2', 'a3'], 'a')
+    send_messages(source_queue_url, ['b0', 'b1', 'b2'], 'b')
+    send_messages(source_queue_url, ['c0', 'c1', 'c2'], 'c')
+    failures, attempts = failing_sends
+    failures.update({'a1': None, 'c0': None})
+    sqs = aws.client('sqs')
+    messages = sqs.receive_message(
+        QueueUrl=source_queue_url, MaxNumberOfMessages=10, AttributeNames=['All']
+    )['Messages']
+    assert len(messages) == 10
+
+    failed = copy_sqs_from_to_acc.forward_batch(
+        sqs, source_queue_url, sqs, destination_queue_url, messages, copy_sqs_from_to_acc.TransferStats()
+    )
+
+    assert sorted(message['Body'] for message in failed) == ['a1', 'c0']
+    assert attempts == {'a1': 1, 'c0': 1}
+    delivered = receive_all(destination_queue_url)
+    assert sorted(delivered) == ['a0', 'b0', 'b1', 'b2']
+    assert [body for body in delivered if body[0] == 'b'] == ['b0', 'b1', 'b2']
+    # Only the sent messages are deleted, the failed ones and those held back stay in the source queue
+    assert queue_size(source_queue_url) == 6
+
+
+def test_message_that_keeps_failing_is_given_up(mocked_aws, failing_sends, capsys):
+    source_queue_url, destination_queue_url = create_queue('source'), create_queue('destination')
+    bodies = [f'message {index}' for index in range(20)]
+    send_messages(source_queue_url, bodies[:10] + ['poison'] + bodies[10:])
+    failures, attempts = failing_sends
+    failures['poison'] = None
+
+    run_copy(source_queue_url, destination_queue_url, long_running=True, wait_time_seconds=0, visibility_timeout=1,
+             max_attempts=3)
+
+    output = capsys.readouterr().out
+    assert "Giving up on message" in output
+    assert "20 messages moved" in output and "1 messages given up" in output
+    assert attempts == {'poison': 3}
+    assert sorted(receive_all(destination_queue_url)) == sorted(bodies)
+    assert queue_size(source_queue_url) == 1
+
+
+def test_fifo_group_of_a_given_up_message_is_blocked(mocked_aws, failing_sends, capsys):
+    source_queue_url, destination_queue_url = create_queue('source', fifo=True), create_queue('destination', fifo=True)
+    send_messages(source_queue_url, ['a0', 'poison'], 'a')
+    send_messages(source_queue_url, ['b0', 'b1', 'b2'], 'b')
+    failures, attempts = failing_sends
+    failures['poison'] = None
+
+    run_copy(source_queue_url, destination_queue_url, long_running=True, wait_time_seconds=0, visibility_timeout=1,
+             max_attempts=2)
+
+    assert "with the later messages of group a" in capsys.readouterr().out
+    assert attempts == {'poison': 2}
+    delivered = receive_all(destination_queue_url)
+    assert sorted(delivered) == ['a0', 'b0', 'b1', 'b2']
+    assert [body for body in delivered if body[0] == 'b'] == ['b0', 'b1', 'b2']
+    assert queue_size(source_queue_url) == 1
+
+
+def test_long_running_transfer_waits_for_delayed_messages_and_stops_when_drained(mocked_aws, capsys):
+    source_queue_url, destination_queue_url = create_queue('source'), create_queue('destination')
+    send_messages(source_queue_url, [f'message {index}' for index in range(30)])
+    aws.client('sqs').send_message(QueueUrl=source_queue_url, MessageBody='delayed', DelaySeconds=2)
+
+    run_copy(source_queue_url, destination_queue_url, workers=3, long_running=True, wait_time_seconds=0,
+             visibility_timeout=5)
+
+    assert "No more messages to copy." in capsys.readouterr().out
+    # moto may hand a message to two concurrent receives, SQS delivers at least once, so duplicates are allowed
+    assert set(receive_all(destination_queue_url)) == {f'message {index}' for index in range(30)} | {'delayed'}
+    assert queue_size(source_queue_url) == 0
+
+
+def test_command_falls_back_to_the_default_credential_chain(mocked_aws, capsys):
+    source_queue_url, destination_queue_url = create_queue('source'), create_queue('destination')
+    send_messages(source_queue_url, ['message'])
+
+    copy_sqs_from_to_acc.main([source_queue_url, destination_queue_url, '--wait-time', '0'])
+
+    assert "1 messages moved" in capsys.readouterr().out
+    assert receive_all(destination_queue_url) == ['message']
+
+
+@pytest.mark.parametrize('credentials', [
+    ['--source-access-key', 'key'], ['--destination-secret-key', 'secret'], ['--source-session-token', 'token'],
+])
+def test_command_rejects_incomplete_credentials(credentials, capsys):
+    with pytest.raises(SystemExit):
+        copy_sqs_from_to_acc.main(['source', 'destination'] + credentials)
+    assert "must be given together" in capsys.readouterr().err
@@ -0,0 +1,176 @@
+import json
+
+import pytest
+
+from toolbox.create_postman_from_openapi import MAX_EXAMPLE_DEPTH, build_collection, convert_specs
+
+
+def make_spec(path_count):
+    return {
+        "openapi": "3.0.0",
+        "servers": [{"url": "https://api.example.com"}],
+        "components": {
+            "schemas": {"Pet": {"type": "object", "example": {"id": 1, "name": "Rex"}}},
+            "securitySchemes": {"bearer": {"type": "http", "scheme": "bearer"}},
+        },
+        "paths": {
+            f"/pets{index}": {
+                "get": {"operationId": f"get{index}", "parameters": [{"name": "q", "in": "query"}]},
+                "post": {"requestBody": {"content": {"application/json": {
+                    "schema": {"$ref": "#/components/schemas/Pet"}
+                }}}},
+            }
+            for index in range(path_count)
+        },
+    }
+
+
+def write_json(path, value):
+    with open(path, "w") as file:
+        json.dump(value, file, indent=2)
+
+
+def convert(tmp_path, capsys):
+    assert convert_specs([str(tmp_path / "specs")], str(tmp_path / "out"), workers=1) == 0
+    return capsys.readouterr().out
+
+
+def assert_collection_matches(tmp_path, name):
+    with open(tmp_path / "specs" / f"{name}.json") as file:
+        expected = json.dumps(build_collection(json.load(file), name), indent=2)
+    with open(tmp_path / "out" / f"{name}_postman_collection.json") as file:
+        assert file.read() == expected
+
+
+def test_batch_reuses_unchanged_path_items(tmp_path, capsys):
+    (tmp_path / "specs").mkdir()
+    spec = make_spec(20)
+    write_json(tmp_path / "specs" / "pets.json", spec)
+    assert "20 path items rebuilt, 0 reused" in convert(tmp_path, capsys)
+    assert_collection_matches(tmp_path, "pets")
+
+    spec["paths"]["/pets3"]["get"]["operationId"] = "changed"
+    del spec["paths"]["/pets5"]
+    spec["paths"]["/empty"] = {}
+    write_json(tmp_path / "specs" / "pets.json", spec)
+    assert "2 path items rebuilt, 18 reused" in convert(tmp_path, capsys)
+    assert_collection_matches(tmp_path, "pets")
+
+    assert "0 specs, 1 unchanged" in convert(tmp_path, capsys)
+
+
+def test_batch_rebuilds_everything_when_components_change(tmp_path, capsys):
+    (tmp_path / "specs").mkdir()
+    spec = make_spec(5)
+    write_json(tmp_path / "specs" / "pets.json", spec)
+    convert(tmp_path, capsys)
+
+    spec["components"]["schemas"]["Pet"]["example"] = {"id": 2}
+    write_json(tmp_path / "specs" / "pets.json", spec)
+    assert "5 path items rebuilt, 0 reused" in convert(tmp_path, capsys)
+    assert_collection_matches(tmp_path, "pets")
+
+
+def test_batch_rebuilds_everything_when_collection_was_edited(tmp_path, capsys):
+    (tmp_path / "specs").mkdir()
+    spec = make_spec(5)
+    write_json(tmp_path / "specs" / "pets.json", spec)
+    convert(tmp_path, capsys)
+
+    collection_path = tmp_path / "out" / "pets_postman_collection.json"
+    collection_path.write_text(collection_path.read_text().replace('"get1"', '"edited"'))
+    spec["paths"]["/pets0"]["get"]["operationId"] = "changed"
+    write_json(tmp_path / "specs" / "pets.json", spec)
+    assert "5 path items rebuilt, 0 reused" in convert(tmp_path, capsys)
+    assert_collection_matches(tmp_path, "pets")
+
+
+def test_batch_skips_json_files_that_are_not_specs(tmp_path, capsys):
+    (tmp_path / "specs").mkdir()
+    write_json(tmp_path / "specs" / "pets.json", make_spec(2))
+    write_json(tmp_path / "specs" / "postman_manifest.json", {"version": 1, "specs": {}})
+    write_json(tmp_path / "specs" / "list.json", [1, 2])
+    output = convert(tmp_path, capsys)
+    assert "Converted 1 specs, 0 unchanged, 2 not OpenAPI specs, 0 failed" in output
+    assert "postman_manifest.json: no openapi or swagger key" in output
+    assert sorted(path.name for path in (tmp_path / "out").iterdir()) == [
+        "pets_postman_collection.json", "postman_manifest.json"
+    ]
+    with open(tmp_path / "out" / "postman_manifest.json") as file:
+        entries = json.load(file)["specs"]
+    assert "skipped" in entries[str(tmp_path / "specs" / "list.json")]
+
+    assert "Converted 0 specs, 1 unchanged, 2 not OpenAPI specs" in convert(tmp_path, capsys)
+
+    write_json(tmp_path / "specs" / "list.json", {"swagger": "2.0", "paths": {"/a": {"get": {}}}})
+    assert "Converted 1 specs, 1 unchanged, 1 not OpenAPI specs" in convert(tmp_path, capsys)
+
+
+def request_body(schema, components):
+    spec = {
+        "openapi": "3.0.0",
+        "components": {"schemas": components},
+        "paths": {"/pets": {"post": {"requestBody": {"content": {"application/json": {"schema": schema}}}}}},
+    }
+    request = build_collection(spec, "pets")["item"][0]["request"]
+    return json.loads(request["body"]["raw"])
+
+
+def test_example_body_resolves_nested_references():
+    components = {
+        "Pet": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "name": {"type": "string", "example": "Rex"},
+                "kind": {"$ref": "#/components/schemas/Kind"},
+                "tags": {"type": "array", "items": {"$ref": "#/components/schemas/Tag"}},
+                "vaccinated": {"type": "boolean", "default": False},
+            },
+        },
+        "Kind": {"type": "string", "enum": ["dog", "cat"]},
+        "Tag": {"allOf": [{"$ref": "#/components/schemas/Named"}, {"properties": {"id": {"type": "number"}}}]},
+        "Named": {"type": "object", "properties": {"name": {"type": "string"}}},
+    }
+    assert request_body({"$ref": "#/components/schemas/Pet"}, components) == {
+        "id": 0, "name": "Rex", "kind": "dog", "tags": [{"name": "string", "id": 0}], "vaccinated": False
+    }
+
+
+def test_example_body_prefers_given_examples():
+    components = {"Pet": {"type": "object", "example": {"id": 7}, "properties": {"id": {"type": "integer"}}}}
+    assert request_body({"$ref": "#/components/schemas/Pet"}, components) == {"id": 7}
+    assert request_body({"type": "array", "items": {"$ref": "#/components/schemas/Pet"}}, components) == [{"id": 7}]
+
+
+def test_example_body_cuts_recursive_schemas():
+    components = {
+        "Node": {
+            "type": "object",
+            "properties": {
+                "value": {"type": "string"},
+                "parent": {"$ref": "#/components/schemas/Node"},
+                "children": {"type": "array", "items": {"$ref": "#/components/schemas/Node"}},
+            },
+        },
+    }
+    assert request_body({"$ref": "#/components/schemas/Node"}, components) == {"value": "string", "children": []}
+
+
+def test_reference_cycles_are_reported():
+    components = {"A": {"$ref": "#/components/schemas/B"}, "B": {"$ref": "#/components/schemas/A"}}
+    with pytest.raises(ValueError, match="Circular reference"):
+        request_body({"$ref": "#/components/schemas/A"}, components)
+
+
+def test_example_body_depth_is_limited():
+    components = {
+        f"Level{index}": {"type": "object", "properties": {"next": {"$ref": f"#/components/schemas/Level{index + 1}"}}}
+        for index in range(MAX_EXAMPLE_DEPTH + 5)
+    }
+    body = request_body({"$ref": "#/components/schemas/Level0"}, components)
+    depth = 0
+    while body:
+        body = body["next"]
+        depth += 1
+    assert depth == MAX_EXAMPLE_DEPTH - 1
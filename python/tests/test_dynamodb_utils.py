@@ -0,0 +1,178 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from toolbox import aws, dynamodb_utils
+from toolbox.dynamodb_utils import copy_table, delta_sync, item_key, table_config
+
+# Large enough for moto to split the scans into pages of about 50 items
+PADDING = 'x' * 20000
+
+
+def create_table(name):
+    table = aws.resource('dynamodb').create_table(
+        TableName=name,
+        KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}, {'AttributeName': 'version', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'id', 'AttributeType': 'S'}, {'AttributeName': 'version', 'AttributeType': 'N'}
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    table.wait_until_exists()
+    return table
+
+
+def make_item(index):
+    return {
+        'id': f'item-{index:04}',
+        'version': Decimal(index % 3),
+        'amount': Decimal(f'{index}.25'),
+        'tags': {f'tag-{index % 5}', 'common'},
+        'payload': bytes([index % 256]) * 4,
+        'details': {'nested': [Decimal(index), 'text', {'flag': index % 2 == 0}]},
+        'padding': PADDING,
+    }
+
+
+def put_items(table, items):
+    with table.batch_writer() as writer:
+        for item in items:
+            writer.put_item(Item=item)
+
+
+def table_items(name):
+    table = aws.resource('dynamodb').Table(name)
+    response = table.scan()
+    items = response['Items']
+    while 'LastEvaluatedKey' in response:
+        response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
+        items.extend(response['Items'])
+    return sorted(items, key=lambda item: (item['id'], item['version']))
+
+
+def config(name):
+    return table_config(name, None, None, None)
+
+
+@pytest.fixture
+def source_items(mocked_aws):
+    items = [make_item(index) for index in range(200)]
+    put_items(create_table('source'), items)
+    return sorted(items, key=lambda item: (item['id'], item['version']))
+
+
+@pytest.mark.parametrize('total_segments, max_workers', [(4, None), (7, 3)])
+def test_parallel_copy_matches_serial_copy(source_items, total_segments, max_workers):
+    create_table('serial')
+    create_table('parallel')
+
+    serial_stats = copy_table(config('source'), config('serial'))
+    parallel_stats = copy_table(config('source'), config('parallel'), total_segments, max_workers)
+
+    assert serial_stats['items'] == parallel_stats['items'] == len(source_items)
+    assert table_items('serial') == table_items('parallel') == source_items
+
+
+@pytest.mark.parametrize('total_segments', [1, 3])
+def test_resume_after_crash_copies_only_uncommitted_pages(source_items, tmp_path, monkeypatch, total_segments):
+    create_table('destination')
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+
+    # Fail a batch halfway through the copy, in the middle of a page
+    write_batch = dynamodb_utils.BatchWriter._write_batch
+    calls = []
+
+    def failing_write_batch(writer, requests):
+        calls.append(len(requests))
+        if len(calls) == 5:
+            raise RuntimeError('Injected failure')
+        return write_batch(writer, requests)
+
+    monkeypatch.setattr(dynamodb_utils.BatchWriter, '_write_batch', failing_write_batch)
+    with pytest.raises(RuntimeError, match='Injected failure'):
+        copy_table(config('source'), config('destination'), total_segments, checkpoint_path=checkpoint_path)
+    monkeypatch.setattr(dynamodb_utils.BatchWriter, '_write_batch', write_batch)
+
+    with open(checkpoint_path) as file:
+        segments = json.load(file)['segments']
+    committed = sum(state['items'] for state in segments.values())
+    assert 0 < committed < len(source_items)
+
+    # Record every page scanned by the resumed copy
+    scan_pages = dynamodb_utils.scan_pages
+    start_keys = {}
+    scanned = []
+
+    def recording_scan_pages(table, segment=0, total_segments=1, exclusive_start_key=None, governor=None):
+        start_keys[segment] = exclusive_start_key
+        for response in scan_pages(table, segment, total_segments, exclusive_start_key, governor):
+            scanned.append(len(response['Items']))
+            yield response
+
+    monkeypatch.setattr(dynamodb_utils, 'scan_pages', recording_scan_pages)
+    stats = copy_table(config('source'), config('destination'), total_segments, checkpoint_path=checkpoint_path,
+                       resume=True)
+
+    assert sum(scanned) == stats['items'] == len(source_items) - committed
+    for segment, state in segments.items():
+        if state['done']:
+            assert int(segment) not in start_keys
+        else:
+            expected = state['exclusive_start_key'] and dynamodb_utils.deserialize_item(state['exclusive_start_key'])
+            assert start_keys[int(segment)] == expected
+    assert table_items('destination') == source_items
+
+    with open(checkpoint_path) as file:
+        segments = json.load(file)['segments']
+    assert all(state['done'] for state in segments.values())
+    assert sum(state['items'] for state in segments.values()) == len(source_items)
+
+
+@pytest.fixture
+def differing_destination(source_items):
+    """
+    Fill the destination with the source items except for 10 missing ones, 10 changed ones and 5 extra ones.
+    """
+    destination_items = [dict(item) for item in source_items[10:]]
+    for item in destination_items[:10]:
+        item['amount'] += 1
+    destination_items.extend(make_item(index) for index in range(1000, 1005))
+    put_items(create_table('destination'), destination_items)
+
+    keys = [item_key(item, ['id', 'version']) for item in source_items + destination_items[-5:]]
+    return {'new': keys[:10], 'changed': keys[10:20], 'unchanged': len(source_items) - 20, 'orphaned': keys[-5:]}
+
+
+def assert_report(report, expected):
+    assert sorted(report['new']) == expected['new']
+    assert sorted(report['changed']) == expected['changed']
+    assert report['unchanged'] == expected['unchanged']
+    assert sorted(report['orphaned']) == expected['orphaned']
+
+
+def test_delta_sync_dry_run_leaves_destination_untouched(source_items, differing_destination):
+    before = table_items('destination')
+    report = delta_sync(config('source'), config('destination'), total_segments=3, dry_run=True, delete_orphans=True)
+
+    assert_report(report, differing_destination)
+    assert table_items('destination') == before
+
+
+@pytest.mark.parametrize('total_segments', [1, 3])
+def test_delta_sync_writes_new_and_changed_items(source_items, differing_destination, total_segments):
+    orphans = [item for item in table_items('destination') if int(item['id'][5:]) >= 1000]
+    report = delta_sync(config('source'), config('destination'), total_segments)
+
+    assert_report(report, differing_destination)
+    assert table_items('destination') == sorted(source_items + orphans, key=lambda item: (item['id'], item['version']))
+
+    report = delta_sync(config('source'), config('destination'), total_segments)
+    assert (report['new'], report['changed'], report['unchanged']) == ([], [], len(source_items))
+
+
+def test_delta_sync_deletes_orphans(source_items, differing_destination):
+    report = delta_sync(config('source'), config('destination'), total_segments=2, delete_orphans=True)
+
+    assert_report(report, differing_destination)
+    assert table_items('destination') == source_items
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from toolbox.export_import_dynamodb import export_dynamodb_table, import_dynamodb_table
+
+from test_dynamodb_utils import create_table, make_item, put_items, table_items
+
+
+@pytest.fixture
+def exports(mocked_aws, tmp_path):
+    """
+    Export two tables into the same directory, return the directory and the items of each table.
+    """
+    items = {'orders': [make_item(index) for index in range(30)], 'customers': [make_item(index) for index in range(50, 60)]}
+    for name, exported_items in items.items():
+        put_items(create_table(name), exported_items)
+        export_dynamodb_table(name, str(tmp_path), None, None, None, total_segments=2, chunk_items=8)
+    return str(tmp_path), items
+
+
+def sort_items(items):
+    return sorted(items, key=lambda item: (item['id'], item['version']))
+
+
+def test_import_reads_only_the_files_of_the_chosen_table(exports, capsys):
+    directory, items = exports
+    create_table('restored')
+
+    import_dynamodb_table(directory, 'restored', None, None, None, source_table_name='orders')
+
+    assert "Successfully imported 30 items" in capsys.readouterr().out
+    assert table_items('restored') == sort_items(items['orders'])
+
+
+def test_import_asks_for_the_table_when_several_were_exported(exports, capsys):
+    directory, items = exports
+    create_table('restored')
+
+    import_dynamodb_table(directory, 'restored', None, None, None)
+
+    assert "holds exports of several tables (customers, orders), choose one with --source-table" in capsys.readouterr().out
+    assert table_items('restored') == []
+
+
+def test_import_skips_stale_files_of_an_earlier_export(mocked_aws, tmp_path, capsys):
+    table = create_table('orders')
+    put_items(table, [make_item(index) for index in range(30)])
+    export_dynamodb_table('orders', str(tmp_path), None, None, None, chunk_items=8)
+    for index in range(10, 30):
+        item = make_item(index)
+        table.delete_item(Key={'id': item['id'], 'version': item['version']})
+    export_dynamodb_table('orders', str(tmp_path), None, None, None, chunk_items=8)
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.ndjson.gz')]) == 4
+    create_table('restored')
+
+    import_dynamodb_table(str(tmp_path), 'restored', None, None, None)
+
+    assert "Successfully imported 10 items from 2 files" in capsys.readouterr().out
+    assert table_items('restored') == sort_items(make_item(index) for index in range(10))
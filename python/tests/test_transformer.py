@@ -0,0 +1,117 @@
+import pytest
+
+from toolbox.transformer import (
+    MAX_FORMULA_DEPTH, MAX_FORMULA_TOKENS, FormulaSyntaxError, evaluate_formula, evaluate_formulas_batch, json_data
+)
+
+
+# Results of the eval-based evaluator the parser replaced, for the formulas documented in the transformer
+@pytest.mark.parametrize('formula, expected', [
+    ('SUM(input.lines.amount)-SUM(input.lines.taxAmount)/SUM(input.lines.amount)', 189.9),
+    ('SUM(input.lines.amount)', 190),
+    ("CONCATENATE(input.no, ' ', input.description)", '123 Test Description'),
+    ("CONCATENATE(input.no ' ' input.description)", '123 Test Description'),
+    ('MAX(input.lines.amount)', 100),
+    ('MIN(input.lines.amount)', 90),
+    ('MAX(input.lines.taxAmount)+SUM(input.lines.amount)', 200),
+    ('MAX(input.lines.taxAmount)+MAX(input.lines.amount)', 110),
+    ('SUM(input.lines.amount, input.lines.taxAmount)', 209),
+    ('SUM(input.lines.amount)*2-1', 379),
+    ('input.no', '123'),
+])
+def test_documented_formulas(formula, expected):
+    result = evaluate_formula(formula, json_data)
+    assert (type(result), result) == (type(expected), expected)
+
+
+@pytest.mark.parametrize('formula, expected', [
+    ('2+3*4', 14), ('(2+3)*4', 20), ('2*3+4', 10), ('10-4-3', 3), ('8/4/2', 1.0), ('10/4', 2.5), ('-2*3', -6),
+    ('2*-3', -6), ('--2', 2), ('-(1+2)', -3), ('SUM(1, 2)*MAX(3, 4)', 12), ('SUM(MAX(1, 5), MIN(7, 2))', 7),
+    ("CONCATENATE('a', SUM(1, 2), 'b')", 'a3b'),
+])
+def test_precedence_and_nesting(formula, expected):
+    result = evaluate_formula(formula, {})
+    assert (type(result), result) == (type(expected), expected)
+
+
+def test_nesting_limit():
+    nested = '(' * MAX_FORMULA_DEPTH + '1' + ')' * MAX_FORMULA_DEPTH
+    assert evaluate_formula(nested, {}) == 1
+    with pytest.raises(FormulaSyntaxError, match='nested too deeply'):
+        evaluate_formula('(' + nested + ')', {})
+    with pytest.raises(FormulaSyntaxError, match='nested too deeply'):
+        evaluate_formula('SUM(' * (MAX_FORMULA_DEPTH + 1) + '1' + ')' * (MAX_FORMULA_DEPTH + 1), {})
+    with pytest.raises(FormulaSyntaxError, match='nested too deeply'):
+        evaluate_formula('-' * (MAX_FORMULA_DEPTH + 1) + '1', {})
+
+
+def test_token_limit():
+    assert evaluate_formula('+'.join(['1'] * (MAX_FORMULA_TOKENS // 2)), {}) == MAX_FORMULA_TOKENS // 2
+    with pytest.raises(FormulaSyntaxError, match='tokens'):
+        evaluate_formula('+'.join(['1'] * (MAX_FORMULA_TOKENS // 2 + 1)), {})
+
+
+@pytest.mark.parametrize('formula, message', [
+    ('', "Expected a value, found end"),
+    ('a $ b', r"Unexpected character '\$'"),
+    ('FOO(1)', "Unknown function 'FOO'"),
+    ("__import__('os')", "Unknown function '__import__'"),
+    ('SUM(a', r"Expected '\)', found end"),
+    ('SUM(', r"Expected '\)', found end"),
+    ('(a', r"Expected '\)', found end"),
+    ('a)', r"Unexpected '\)'"),
+    ('a b', "Unexpected 'b'"),
+    ('SUM(a,', "Expected a value, found end"),
+    ('a +', "Expected a value, found end"),
+    ('a * * b', r"Expected a value, found '\*'"),
+])
+def test_syntax_errors(formula, message):
+    with pytest.raises(FormulaSyntaxError, match=message):
+        evaluate_formula(formula, {'a': 1, 'b': 2})
+
+
+def test_syntax_error_is_value_error():
+    assert issubclass(FormulaSyntaxError, ValueError)
+
+
+def test_strings_are_not_repeated():
+    with pytest.raises(TypeError):
+        evaluate_formula('input.no * 1000', json_data)
+
+
+def _outcome(evaluate):
+    # The result with the type of every value, or the type of the error raised
+    try:
+        return [(type(value), value) for value in evaluate()]
+    except Exception as e:
+        return type(e)
+
+
+@pytest.mark.parametrize('formula', [
+    'a*4', 'a+a', 'a-b', 'a+b', 'a/b', 'SUM(l)', 'MAX(l)', 'SUM(a, b)', 'MAX(a, b)', 'MIN(a, 3)',
+    'SUM(a, b, 0.1)', 'SUM(l)/SUM(a, 1)', '-a*2', "CONCATENATE(s, ' ', a)"
+])
+@pytest.mark.parametrize('records', [
+    pytest.param([{'a': 2, 'b': 5, 'l': [1, 2], 's': 'x'}, {'a': 3, 'b': 4, 'l': [], 's': 'y'}], id='ints'),
+    pytest.param([{'a': 2.5, 'b': 0.1, 'l': [0.1, 0.2, 0.3], 's': 'x'}, {'a': 1e308, 'b': 4.0, 'l': [0.7], 's': 'y'}],
+                 id='floats'),
+    pytest.param([{'a': 2, 'b': 5.0, 'l': [1, 2.5], 's': 'x'}, {'a': 3.5, 'b': 4, 'l': [3], 's': 'y'}], id='mixed'),
+    pytest.param([{'a': 2 ** 62, 'b': 2 ** 62 + 1, 'l': [2 ** 62, 2 ** 62], 's': 'x'},
+                  {'a': 3, 'b': 4, 'l': [2 ** 70], 's': 'y'}], id='large-ints'),
+])
+def test_batch_matches_per_record(formula, records):
+    expected = _outcome(lambda: [evaluate_formula(formula, record) for record in records])
+    assert _outcome(lambda: evaluate_formulas_batch([formula], records)[formula]) == expected
+
+
+@pytest.mark.parametrize('formula, expected', [('SUM(7)', 7), ('SUM(1.5)', 1.5), ('MAX(1, 2.5)', 2.5), ("'x'", 'x')])
+def test_batch_constant_formulas(formula, expected):
+    assert _outcome(lambda: evaluate_formulas_batch([formula], [{}, {}])[formula]) == [(type(expected), expected)] * 2
+
+
+def test_batch_errors_like_per_record():
+    records = [{'a': 1, 'b': 0}]
+    with pytest.raises(ZeroDivisionError):
+        evaluate_formulas_batch(['a/b'], records)
+    with pytest.raises(ValueError):
+        evaluate_formulas_batch(['MAX(l)'], [{'l': [1]}, {'l': []}])
@@ -0,0 +1,222 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from botocore.exceptions import ClientError
+
+from . import aws
+from .copy_sqs_from_to_acc import TransferStats, forward_batch
+from .dynamodb_utils import MAX_BATCH_SIZE, THROTTLING_ERROR_CODES, WriteStats, backoff_delay
+from .metrics import registry
+
+
+class AsyncTransport:
+    """
+    Runs blocking botocore calls from asyncio code.
+
+    All clients created by one transport share a thread pool and a semaphore, so the number of requests in flight
+    is bounded across all of them, and every client gets a connection pool large enough for that bound.
+    """
+
+    def __init__(self, max_in_flight=32):
+        """
+        :param max_in_flight: Maximum number of concurrent requests over all clients of this transport.
+        :type max_in_flight: int
+        """
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    def client(self, service, aws_access_key, aws_secret_key, aws_session_token, endpoint_url=None):
+        return aws.client(
+            service, aws_access_key, aws_secret_key, aws_session_token, endpoint_url,
+            max_pool_connections=self.max_in_flight, retries={'max_attempts': 10, 'mode': 'adaptive'}
+        )
+
+    async def call(self, client, operation, **kwargs):
+        """
+        Call a client operation, e.g. await transport.call(sqs, 'receive_message', QueueUrl=...).
+        """
+        return await self.run(getattr(client, operation), **kwargs)
+
+    async def run(self, function, *args, **kwargs):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(function, *args, **kwargs))
+
+    def close(self):
+        self._executor.shutdown()
+
+
+async def async_copy_dynamodb_table(source_config, destination_config, total_segments=1, max_in_flight=32):
+    """
+    Copy a table with asyncio: every scan segment is read by its own task while writer tasks drain the scanned
+    items as 25-item BatchWriteItem calls, so reads and writes overlap.
+
+    The low-level client is used on both sides, items stay in their typed DynamoDB JSON form and are never
+    (de)serialized.
+
+    :param source_config: Source table configuration, see dynamodb_utils.table_config.
+    :type source_config: dict
+    :param destination_config: Destination table configuration.
+    :type destination_config: dict
+    :param total_segments: Number of parallel scan segments.
+    :type total_segments: int
+    :param max_in_flight: Maximum number of concurrent scan and write requests.
+    :type max_in_flight: int
+    :return: WriteStats snapshot.
+    :rtype: dict
+    """
+    transport = AsyncTransport(max_in_flight)
+    source_dynamodb = transport.client(
+        'dynamodb', source_config['aws_access_key'], source_config['aws_secret_key'],
+        source_config['aws_session_token'], source_config['endpoint_url']
+    )
+    destination_dynamodb = transport.client(
+        'dynamodb', destination_config['aws_access_key'], destination_config['aws_secret_key'],
+        destination_config['aws_session_token'], destination_config['endpoint_url']
+    )
+    destination_table_name = destination_config['table_name']
+    stats = WriteStats()
+    # Bounded so scanning pauses when the writers fall behind
+    batches = asyncio.Queue(maxsize=max_in_flight * 2)
+
+    async def scan_segment(segment):
+        scan_kwargs = {'TableName': source_config['table_name']}
+        if total_segments > 1:
+            scan_kwargs['Segment'] = segment
+            scan_kwargs['TotalSegments'] = total_segments
+
+        while True:
+            with registry.timer('dynamodb_scan_page_seconds'):
+                response = await transport.call(source_dynamodb, 'scan', **scan_kwargs)
+            items = response.get('Items', [])
+            registry.increment('dynamodb_scanned_items_total', len(items))
+            for start in range(0, len(items), MAX_BATCH_SIZE):
+                await batches.put([{'PutRequest': {'Item': item}} for item in items[start:start + MAX_BATCH_SIZE]])
+
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    async def write_batches():
+        while True:
+            requests = await batches.get()
+            if requests is None:
+                return
+
+            stats.record(batches=1)
+            attempt = 0
+            while requests:
+                try:
+                    with registry.timer('dynamodb_batch_write_seconds'):
+                        response = await transport.call(
+                            destination_dynamodb, 'batch_write_item', RequestItems={destination_table_name: requests}
+                        )
+                except ClientError as e:
+                    if e.response['Error']['Code'] not in THROTTLING_ERROR_CODES:
+                        raise
+                    stats.record(throttles=1)
+                    unprocessed = requests
+                else:
+                    unprocessed = response.get('UnprocessedItems', {}).get(destination_table_name, [])
+                    stats.record(items=len(requests) - len(unprocessed))
+
+                if unprocessed:
+                    attempt += 1
+                    if attempt > 10:
+                        raise RuntimeError(f"Giving up on {len(unprocessed)} unprocessed items "
+                                           f"for {destination_table_name}.")
+                    stats.record(retries=1)
+                    await asyncio.sleep(backoff_delay(attempt))
+                requests = unprocessed
+
+    writer_count = max(1, max_in_flight - total_segments)
+
+    async def scan_all():
+        await asyncio.gather(*(scan_segment(segment) for segment in range(total_segments)))
+        for _ in range(writer_count):
+            await batches.put(None)
+
+    try:
+        # Scanners and writers run side by side; a failing writer fails the copy instead of stalling the scanners
+        await asyncio.gather(scan_all(), *(write_batches() for _ in range(writer_count)))
+    finally:
+        transport.close()
+
+    return stats.as_dict()
+
+
+async def async_copy_sqs_messages(source_queue_url, source_credentials, destination_queue_url,
+                                  destination_credentials, workers=4, max_in_flight=32, source_endpoint_url=None,
+                                  destination_endpoint_url=None, wait_time_seconds=1):
+    """
+    Move all messages of a queue with asyncio: receiver tasks keep polling while earlier batches are still being
+    sent and deleted. Forwarding uses the same batch logic as copy_sqs_from_to_acc, including FIFO handling.
+
+    Every receiver keeps at most max_in_flight / workers batches waiting to be forwarded. Without that bound a slow
+    destination would let received messages pile up until their visibility timeout expires and they are received,
+    and sent, a second time.
+
+    :param source_queue_url: URL of the source queue.
+    :type source_queue_url: str
+    :param source_credentials: Access key, secret key and session token of the source account.
+    :type source_credentials: Tuple[str, str, str]
+    :param destination_queue_url: URL of the destination queue.
+    :type destination_queue_url: str
+    :param destination_credentials: Access key, secret key and session token of the destination account.
+    :type destination_credentials: Tuple[str, str, str]
+    :param workers: Number of concurrent receiver tasks.
+    :type workers: int
+    :param max_in_flight: Maximum number of concurrent requests.
+    :type max_in_flight: int
+    :param wait_time_seconds: Long polling wait time of every receive (at most 20).
+    :type wait_time_seconds: int
+    :return: Transfer statistics.
+    :rtype: TransferStats
+    """
+    transport = AsyncTransport(max_in_flight)
+    source_sqs = transport.client('sqs', *source_credentials, endpoint_url=source_endpoint_url)
+    destination_sqs = transport.client('sqs', *destination_credentials, endpoint_url=destination_endpoint_url)
+    stats = TransferStats()
+    max_pending = max(1, max_in_flight // workers)
+
+    async def receive_and_forward():
+        forwarding = set()
+        while True:
+            if len(forwarding) >= max_pending:
+                # Stop receiving until a forward finished
+                finished, forwarding = await asyncio.wait(forwarding, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    # Raises the error of a failed forward
+                    task.result()
+
+            started = time.monotonic()
+            response = await transport.call(
+                source_sqs, 'receive_message', QueueUrl=source_queue_url, MaxNumberOfMessages=10,
+                WaitTimeSeconds=wait_time_seconds,
+                AttributeNames=['All'], MessageAttributeNames=['All']
+            )
+            messages = response.get('Messages', [])
+            stats.record('receive', time.monotonic() - started, received=len(messages))
+            if not messages:
+                break
+
+            # Forward in the background and go straight back to receiving
+            forwarding.add(asyncio.create_task(transport.run(
+                forward_batch, source_sqs, source_queue_url, destination_sqs, destination_queue_url, messages, stats
+            )))
+            finished = {task for task in forwarding if task.done()}
+            for task in finished:
+                # Raises the error of a failed forward
+                task.result()
+            forwarding -= finished
+        await asyncio.gather(*forwarding)
+
+    try:
+        await asyncio.gather(*(receive_and_forward() for _ in range(workers)))
+    finally:
+        transport.close()
+
+    return stats
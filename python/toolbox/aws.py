@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+
+# boto3 is imported on first use: loading it dominates the start-up time of the commands, and the commands that
+# never talk to AWS do not pay for it
+
+# Sessions by credentials, clients by credentials, service, endpoint and configuration
+_sessions = {}
+_clients = {}
+# Creating clients and resources from a session is not thread-safe
+_lock = threading.RLock()
+
+
+def session(aws_access_key=None, aws_secret_key=None, aws_session_token=None, region_name=None):
+    """
+    Return the boto3 session of a set of credentials, created once per process.
+
+    :param aws_access_key: AWS access key id, the default credential chain is used if not given.
+    :type aws_access_key: str
+    :param aws_secret_key: AWS secret access key.
+    :type aws_secret_key: str
+    :param aws_session_token: AWS session token.
+    :type aws_session_token: str
+    :param region_name: AWS region, from the environment or the AWS config if not given.
+    :type region_name: str
+    :return: The session.
+    :rtype: boto3.session.Session
+    """
+    key = (aws_access_key, aws_secret_key, aws_session_token, region_name)
+    with _lock:
+        if key not in _sessions:
+            import boto3.session
+
+            _sessions[key] = boto3.session.Session(
+                aws_access_key_id=aws_access_key,
+                aws_secret_access_key=aws_secret_key,
+                aws_session_token=aws_session_token,
+                region_name=region_name
+            )
+        return _sessions[key]
+
+
+def client(service, aws_access_key=None, aws_secret_key=None, aws_session_token=None, endpoint_url=None, **config):
+    """
+    Return a client, shared by all callers asking for the same service, credentials, endpoint and configuration.
+
+    Clients are thread-safe. Reusing them in a long-lived process keeps their connection pools warm and saves
+    loading the service model again.
+
+    :param service: Service name, e.g. 'sqs'.
+    :type service: str
+    :param endpoint_url: Optional endpoint, e.g. a local moto server.
+    :type endpoint_url: str
+    :param config: Options of botocore.config.Config, e.g. max_pool_connections=50.
+    :return: The client.
+    :rtype: botocore.client.BaseClient
+    """
+    key = (service, aws_access_key, aws_secret_key, aws_session_token, endpoint_url, json.dumps(config, sort_keys=True))
+    with _lock:
+        if key not in _clients:
+            from botocore.config import Config
+
+            _clients[key] = session(aws_access_key, aws_secret_key, aws_session_token).client(
+                service, endpoint_url=endpoint_url, config=Config(**config) if config else None
+            )
+        return _clients[key]
+
+
+def resource(service, aws_access_key=None, aws_secret_key=None, aws_session_token=None, endpoint_url=None):
+    """
+    Create a resource from the shared session of the credentials. Resources are not thread-safe and therefore
+    not cached here, see dynamodb_utils.open_table for a cache per thread.
+
+    :return: The resource.
+    :rtype: boto3.resources.base.ServiceResource
+    """
+    with _lock:
+        return session(aws_access_key, aws_secret_key, aws_session_token).resource(service, endpoint_url=endpoint_url)
+
+
+def add_credential_arguments(parser, prefix='aws', account=None):
+    """
+    Add the optional --PREFIX-access-key, --PREFIX-secret-key and --PREFIX-session-token options of a command.
+    Omitted, the default credential chain is used: the AWS_* environment variables, the AWS_PROFILE profile or
+    the role of the instance or container.
+
+    :param parser: Parser of the command.
+    :type parser: argparse.ArgumentParser
+    :param prefix: Option prefix, the values are stored as PREFIX_access_key, PREFIX_secret_key and
+        PREFIX_session_token.
+    :type prefix: str
+    :param account: Account the credentials are for, e.g. 'source', shown in the help.
+    :type account: str
+    """
+    of_account = f" of the {account} account" if account else ""
+    parser.add_argument(f"--{prefix}-access-key", help=f"AWS access key id{of_account} "
+                                                        f"(default: the default credential chain)")
+    parser.add_argument(f"--{prefix}-secret-key", help=f"AWS secret access key{of_account}, with --{prefix}-access-key")
+    parser.add_argument(f"--{prefix}-session-token", help=f"AWS session token{of_account}, with --{prefix}-access-key")
+
+
+def check_credential_arguments(parser, args, prefix='aws'):
+    """
+    Exit with a usage error unless the options added by add_credential_arguments were given as a complete set or
+    not at all.
+    """
+    access_key, secret_key, session_token = (
+        getattr(args, f"{prefix}_{name}") for name in ('access_key', 'secret_key', 'session_token')
+    )
+    if bool(access_key) != bool(secret_key) or (session_token and not access_key):
+        parser.error(f"--{prefix}-access-key and --{prefix}-secret-key must be given together, "
+                     f"--{prefix}-session-token only with them")
+
+
+def clear():
+    """
+    Drop all sessions and clients, e.g. after the credentials they were created with expired.
+    """
+    with _lock:
+        _sessions.clear()
+        _clients.clear()
+
+
+def _after_fork():
+    # A forked worker process must not share the connections of its parent, nor wait for a lock held by one of
+    # the parent's threads
+    global _lock
+    _lock = threading.RLock()
+    _sessions.clear()
+    _clients.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
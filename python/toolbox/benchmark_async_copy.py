@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from moto.server import ThreadedMotoServer
+
+from .async_copy import async_copy_dynamodb_table, async_copy_sqs_messages
+from .copy_sqs_from_to_acc import TransferStats, move_message_batches
+from .dynamodb_utils import copy_segment, parallel_copy, table_config
+
+# Any credentials work against moto, it only needs them to be present
+CREDENTIALS = ('testing', 'testing', 'testing')
+
+
+def create_table(dynamodb, table_name):
+    dynamodb.create_table(
+        TableName=table_name,
+        KeySchema=[{'AttributeName': 'pk', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'pk', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+
+def scan_all(dynamodb, table_name):
+    items = []
+    for page in dynamodb.get_paginator('scan').paginate(TableName=table_name):
+        items.extend(page['Items'])
+    return sorted(items, key=lambda item: item['pk']['S'])
+
+
+def benchmark_dynamodb(endpoint_url, item_count, item_size, segments, max_in_flight):
+    """
+    Copy the same table once with the sync engine and once with the asyncio engine and compare the results.
+
+    :return: Durations, throughput and whether both destinations hold identical items.
+    :rtype: dict
+    """
+    dynamodb = boto3.client('dynamodb', endpoint_url=endpoint_url)
+    for table_name in ('bench-source', 'bench-sync', 'bench-async'):
+        create_table(dynamodb, table_name)
+
+    padding = 'x' * item_size
+    for start in range(0, item_count, 25):
+        dynamodb.batch_write_item(RequestItems={'bench-source': [
+            {'PutRequest': {'Item': {
+                'pk': {'S': f'item-{index:08d}'}, 'n': {'N': str(index)}, 'data': {'S': padding}
+            }}}
+            for index in range(start, min(start + 25, item_count))
+        ]})
+
+    source_config = table_config('bench-source', *CREDENTIALS, endpoint_url=endpoint_url)
+
+    started = time.monotonic()
+    destination_config = table_config('bench-sync', *CREDENTIALS, endpoint_url=endpoint_url)
+    if segments > 1:
+        parallel_copy(source_config, destination_config, segments)
+    else:
+        copy_segment(source_config, destination_config)
+    sync_seconds = time.monotonic() - started
+
+    started = time.monotonic()
+    destination_config = table_config('bench-async', *CREDENTIALS, endpoint_url=endpoint_url)
+    asyncio.run(async_copy_dynamodb_table(source_config, destination_config, segments, max_in_flight))
+    async_seconds = time.monotonic() - started
+
+    source_items = scan_all(dynamodb, 'bench-source')
+    identical = source_items == scan_all(dynamodb, 'bench-sync') == scan_all(dynamodb, 'bench-async')
+    for table_name in ('bench-source', 'bench-sync', 'bench-async'):
+        dynamodb.delete_table(TableName=table_name)
+
+    return {
+        'items': item_count,
+        'item_size': item_size,
+        'segments': segments,
+        'sync_seconds': sync_seconds,
+        'async_seconds': async_seconds,
+        'sync_items_per_second': item_count / sync_seconds,
+        'async_items_per_second': item_count / async_seconds,
+        'identical': identical
+    }
+
+
+def received_bodies(sqs, queue_url):
+    """
+    Bodies of all messages in a queue, each message is received once and left invisible. moto can deliver a message
+    twice, so the destinations are checked by their bodies rather than by their message count.
+    """
+    bodies = set()
+    while True:
+        messages = sqs.receive_message(
+            QueueUrl=queue_url, MaxNumberOfMessages=10, WaitTimeSeconds=0, VisibilityTimeout=600
+        ).get('Messages', [])
+        if not messages:
+            return bodies
+        bodies.update(message['Body'] for message in messages)
+
+
+def benchmark_sqs(endpoint_url, message_count, workers, max_in_flight):
+    """
+    Move the same messages once with the sync engine and once with the asyncio engine.
+
+    :return: Durations, throughput, the number of distinct messages that arrived in each destination and whether
+        every message arrived.
+    :rtype: dict
+    """
+    sqs = boto3.client('sqs', endpoint_url=endpoint_url)
+    queue_urls = {
+        name: sqs.create_queue(QueueName=name)['QueueUrl'] for name in ('bench-source', 'bench-sync', 'bench-async')
+    }
+
+    def fill_source():
+        for start in range(0, message_count, 10):
+            sqs.send_message_batch(QueueUrl=queue_urls['bench-source'], Entries=[
+                {'Id': str(index), 'MessageBody': f'message-{index}'}
+                for index in range(start, min(start + 10, message_count))
+            ])
+
+    fill_source()
+    started = time.monotonic()
+    stats = TransferStats()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(move_message_batches, sqs, queue_urls['bench-source'], sqs, queue_urls['bench-sync'], stats)
+            for _ in range(workers)
+        ]
+        for future in futures:
+            future.result()
+    sync_seconds = time.monotonic() - started
+
+    fill_source()
+    started = time.monotonic()
+    asyncio.run(async_copy_sqs_messages(
+        queue_urls['bench-source'], CREDENTIALS, queue_urls['bench-async'], CREDENTIALS, workers, max_in_flight,
+        endpoint_url, endpoint_url
+    ))
+    async_seconds = time.monotonic() - started
+
+    expected = {f'message-{index}' for index in range(message_count)}
+    bodies = {name: received_bodies(sqs, queue_urls[name]) for name in ('bench-sync', 'bench-async')}
+    for queue_url in queue_urls.values():
+        sqs.delete_queue(QueueUrl=queue_url)
+
+    return {
+        'messages': message_count,
+        'workers': workers,
+        'sync_seconds': sync_seconds,
+        'async_seconds': async_seconds,
+        'sync_messages_per_second': message_count / sync_seconds,
+        'async_messages_per_second': message_count / async_seconds,
+        'sync_delivered': len(bodies['bench-sync']),
+        'async_delivered': len(bodies['bench-async']),
+        'sync_complete': bodies['bench-sync'] == expected,
+        'async_complete': bodies['bench-async'] == expected
+    }
+
+
+def start_moto_server(port):
+    """
+    Start a local moto server standing in for DynamoDB and SQS.
+
+    :param port: Port to listen on.
+    :type port: int
+    :return: The running server, stop it with server.stop(), and its endpoint URL.
+    :rtype: Tuple[ThreadedMotoServer, str]
+    """
+    # The stand-in accepts any credentials and region, but boto3 still needs them to sign requests
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ['AWS_ACCESS_KEY_ID'], os.environ['AWS_SECRET_ACCESS_KEY'], os.environ['AWS_SESSION_TOKEN'] = CREDENTIALS
+
+    server = ThreadedMotoServer(port=port)
+    server.start()
+    return server, f"http://127.0.0.1:{port}"
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Compare the sync and asyncio copy engines against a local moto server.")
+    parser.add_argument("--items", type=int, default=5000, help="Number of DynamoDB items (default: 5000)")
+    parser.add_argument("--item-size", type=int, default=512, help="Approximate item size in bytes (default: 512)")
+    parser.add_argument("--segments", type=int, default=4, help="Number of scan segments (default: 4)")
+    parser.add_argument("--messages", type=int, default=2000, help="Number of SQS messages (default: 2000)")
+    parser.add_argument("--workers", type=int, default=4, help="Number of SQS workers (default: 4)")
+    parser.add_argument("--max-in-flight", type=int, default=32, help="Concurrent requests of the asyncio engine (default: 32)")
+    parser.add_argument("--port", type=int, default=5055, help="Port of the local moto server (default: 5055)")
+    args = parser.parse_args(argv)
+
+    server, endpoint_url = start_moto_server(args.port)
+    try:
+        results = {
+            'dynamodb': benchmark_dynamodb(endpoint_url, args.items, args.item_size, args.segments, args.max_in_flight),
+            'sqs': benchmark_sqs(endpoint_url, args.messages, args.workers, args.max_in_flight)
+        }
+    finally:
+        server.stop()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
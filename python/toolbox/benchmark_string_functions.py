@@ -0,0 +1,141 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import string
+import textwrap
+import types
+
+from .benchmark_suite import measure
+
+# The template of the string-functions macro in this repository
+TEMPLATE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'cloudformation',
+    'string-functions.yaml'
+)
+
+# Operations measured, with their parameters
+OPERATIONS = {
+    'Upper': {},
+    'Title': {},
+    'Strip': {'Chars': ' x'},
+    'Replace': {'Old': 'a', 'New': 'b'},
+    'MaxLength': {'Length': '16', 'StripFrom': 'Left'},
+    'GenerateKey': {}
+}
+
+
+def extract_inline_code(template_path, resource='TransformFunction'):
+    """
+    Return the inline code (Code.ZipFile) of a Lambda function of a CloudFormation template.
+
+    The template is read as text, loading it as YAML would need a loader for the short form intrinsic
+    functions like !GetAtt.
+
+    :param template_path: Path of the template.
+    :type template_path: str
+    :param resource: Logical id of the function.
+    :type resource: str
+    :return: The source code of the index module.
+    :rtype: str
+    """
+    with open(template_path) as file:
+        lines = file.read().splitlines()
+
+    found = False
+    for index, line in enumerate(lines):
+        if line.strip() == f'{resource}:':
+            found = True
+        elif found and line.strip() == 'ZipFile: |':
+            indent = len(line) - len(line.lstrip())
+            code = []
+            for code_line in lines[index + 1:]:
+                if code_line.strip() and len(code_line) - len(code_line.lstrip()) <= indent:
+                    break
+                code.append(code_line)
+            return textwrap.dedent('\n'.join(code)) + '\n'
+    raise ValueError(f"No inline code of {resource} found in {template_path}.")
+
+
+def load_function(template_path=TEMPLATE_PATH, resource='TransformFunction'):
+    """
+    Load the inline code of a Lambda function as a module, like the Lambda runtime imports index.py.
+
+    :return: The module, call its handler(event, context).
+    :rtype: types.ModuleType
+    """
+    module = types.ModuleType('index')
+    module.__file__ = f"{template_path}:{resource}"
+    exec(compile(extract_inline_code(template_path, resource), module.__file__, 'exec'), module.__dict__)
+    return module
+
+
+def make_inputs(rng, rows, distinct):
+    values = [
+        ''.join(rng.choice(string.ascii_letters + ' ') for _ in range(rng.randrange(8, 64))) for _ in range(distinct)
+    ]
+    return [rng.choice(values) for _ in range(rows)]
+
+
+def benchmark_string_functions(metrics, index, rows=1000, distinct=100, min_seconds=0.1):
+    """
+    Measure the per-row throughput of the handler, once with an invocation per row (InputString) and once with
+    all rows in one invocation (InputStrings), and check that both return the same results.
+
+    Handlers without batch support, e.g. an older version of the template, are measured per row only.
+
+    :param index: Module loaded by load_function.
+    :type index: types.ModuleType
+    :param rows: Number of input strings.
+    :type rows: int
+    :param distinct: Number of distinct input strings.
+    :type distinct: int
+    """
+    inputs = make_inputs(random.Random(42), rows, distinct)
+    for operation, params in OPERATIONS.items():
+        events = [
+            {'requestId': str(row), 'params': dict(params, Operation=operation, InputString=value)}
+            for row, value in enumerate(inputs)
+        ]
+        batch_event = {'requestId': 'batch', 'params': dict(params, Operation=operation, InputStrings=inputs)}
+
+        single = [index.handler(event, None) for event in events]
+        if any(response['status'] != 'success' for response in single):
+            raise RuntimeError(f"{operation} failed: {single[0]}")
+        metrics[f'lambda.single.{operation}'] = (
+            measure(lambda: [index.handler(event, None) for event in events], min_seconds) * rows, 'rows/s'
+        )
+
+        # A handler without batch support fails on the missing InputString and prints the traceback
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            batch = index.handler(batch_event, None)
+        if batch['status'] != 'success' or not isinstance(batch.get('fragment'), list):
+            continue
+        if operation != 'GenerateKey' and batch['fragment'] != [response['fragment'] for response in single]:
+            raise RuntimeError(f"The batch results of {operation} differ from the single row results.")
+        metrics[f'lambda.batch.{operation}'] = (measure(lambda: index.handler(batch_event, None), min_seconds) * rows, 'rows/s')
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmark the string-functions Lambda locally, per row and in batches.")
+    parser.add_argument("--template", default=TEMPLATE_PATH, help="CloudFormation template holding the function (default: the one of this repository)")
+    parser.add_argument("--rows", type=int, default=1000, help="Number of input strings (default: 1000)")
+    parser.add_argument("--distinct", type=int, default=100, help="Number of distinct input strings (default: 100)")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Minimum seconds per timed run (default: 0.1)")
+    args = parser.parse_args(argv)
+
+    metrics = {}
+    benchmark_string_functions(metrics, load_function(args.template), args.rows, args.distinct, args.min_time)
+    results = {name: {'value': round(value, 2), 'unit': unit} for name, (value, unit) in sorted(metrics.items())}
+    for operation in OPERATIONS:
+        single = metrics.get(f'lambda.single.{operation}')
+        batch = metrics.get(f'lambda.batch.{operation}')
+        if single and batch:
+            results[f'lambda.speedup.{operation}'] = {'value': round(batch[0] / single[0], 2), 'unit': 'x'}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+
+from .transformer import CompiledFormula, compile_formula, compile_path, evaluate_formulas_batch
+
+# Formulas measured by the transformer benchmarks, keyed by the name used in the metric
+FORMULAS = {
+    'net_amount': "SUM(input.lines.amount)-SUM(input.lines.taxAmount)/SUM(input.lines.amount)",
+    'sum': "SUM(input.lines.amount)",
+    'concatenate': "CONCATENATE(input.no, ' ', input.description)",
+    'max_plus_sum': "MAX(input.lines.taxAmount)+SUM(input.lines.amount)",
+    'arithmetic': "(input.total*2+input.discount/4-1)*(input.total-input.discount)",
+    'nested': "MAX(SUM(input.lines.amount), MIN(input.lines.taxAmount)*100, input.total)-input.discount"
+}
+
+# Default fraction by which a metric may fall below the baseline before it counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(function, min_seconds=0.1, repeat=5):
+    """
+    Time a function and return the best observed rate, the minimum over several runs being the least noisy.
+
+    The calls per run are doubled until a run takes at least min_seconds, which also warms up caches.
+
+    :param function: Function to call.
+    :type function: Callable
+    :param min_seconds: Minimum duration of a run.
+    :type min_seconds: float
+    :param repeat: Number of runs.
+    :type repeat: int
+    :return: Calls per second.
+    :rtype: float
+    """
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < min_seconds:
+        number *= 2
+    return number / min(timer.repeat(repeat, number))
+
+
+def make_record(rng, line_count):
+    return {
+        'input': {
+            'no': str(rng.randrange(100000)),
+            'description': 'Benchmark record',
+            'total': rng.randrange(1000),
+            'discount': rng.randrange(1, 100),
+            'lines': [{'amount': rng.randrange(1000), 'taxAmount': rng.randrange(100)} for _ in range(line_count)]
+        }
+    }
+
+
+def benchmark_transformer(metrics, min_seconds):
+    rng = random.Random(42)
+    record = make_record(rng, 10)
+
+    for name, formula in FORMULAS.items():
+        # Bypass the formula cache, this measures tokenizing, parsing and compiling
+        metrics[f'transformer.compile.{name}'] = (measure(lambda: CompiledFormula(formula), min_seconds), 'formulas/s')
+
+        compiled = compile_formula(formula)
+        metrics[f'transformer.evaluate.{name}'] = (measure(lambda: compiled(record), min_seconds), 'evaluations/s')
+
+    records = [make_record(rng, rng.randrange(1, 20)) for _ in range(1000)]
+    formulas = list(FORMULAS.values())
+    metrics['transformer.batch.records'] = (
+        measure(lambda: evaluate_formulas_batch(formulas, records), min_seconds, repeat=3) * len(records), 'records/s'
+    )
+
+
+def benchmark_paths(metrics, min_seconds):
+    # Lookup cost by path depth, in a document of nested objects
+    for depth in (1, 4, 16):
+        document = value = {}
+        for _ in range(depth - 1):
+            value['k'] = {}
+            value = value['k']
+        value['k'] = 1
+        accessor = compile_path('.'.join(['k'] * depth))
+        metrics[f'path.depth.{depth}'] = (measure(lambda: accessor(document), min_seconds), 'lookups/s')
+
+    # Lookup cost by fan-out, a path through a list of objects
+    for width in (1, 10, 100, 1000):
+        document = {'items': [{'value': index} for index in range(width)]}
+        accessor = compile_path('items.value')
+        metrics[f'path.fanout.{width}'] = (measure(lambda: accessor(document), min_seconds) * width, 'values/s')
+        metrics[f'path.fanout_lazy.{width}'] = (
+            measure(lambda: sum(accessor.iter_values(document)), min_seconds) * width, 'values/s'
+        )
+
+
+def benchmark_aws(metrics, item_counts, item_sizes, message_counts, segments, workers, max_in_flight, port):
+    # Imported here, so the local benchmarks run without boto3 and moto installed
+    from .benchmark_async_copy import benchmark_dynamodb, benchmark_sqs, start_moto_server
+
+    server, endpoint_url = start_moto_server(port)
+    try:
+        for item_count in item_counts:
+            for item_size in item_sizes:
+                result = benchmark_dynamodb(endpoint_url, item_count, item_size, segments, max_in_flight)
+                if not result['identical']:
+                    raise RuntimeError(f"DynamoDB copy of {item_count} items of {item_size} bytes lost items.")
+                for engine in ('sync', 'async'):
+                    metrics[f'dynamodb.{engine}.items{item_count}.size{item_size}'] = (
+                        result[f'{engine}_items_per_second'], 'items/s'
+                    )
+
+        for message_count in message_counts:
+            result = benchmark_sqs(endpoint_url, message_count, workers, max_in_flight)
+            for engine in ('sync', 'async'):
+                if not result[f'{engine}_complete']:
+                    raise RuntimeError(f"SQS {engine} copy delivered {result[f'{engine}_delivered']} "
+                                       f"of {message_count} distinct messages.")
+                metrics[f'sqs.{engine}.messages{message_count}'] = (result[f'{engine}_messages_per_second'], 'messages/s')
+    finally:
+        server.stop()
+
+
+def benchmark_cli(metrics, runs):
+    """
+    Cold start of every command: a new interpreter running toolbox COMMAND --help, which imports the command's
+    module and builds its parser. The bare interpreter start is measured as cli.cold_start.python for reference.
+    Commands whose dependencies are missing are skipped.
+    """
+    from .cli import COMMANDS
+
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get('PYTHONPATH')])))
+    runs_by_name = {'python': [sys.executable, '-c', 'pass'], 'toolbox': [sys.executable, '-m', __package__, '--help']}
+    for command in COMMANDS:
+        runs_by_name[command] = [sys.executable, '-m', __package__, command, '--help']
+
+    for name, arguments in runs_by_name.items():
+        seconds = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            completed = subprocess.run(arguments, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            seconds.append(time.perf_counter() - started)
+            if completed.returncode:
+                break
+        if completed.returncode:
+            print(f"Skipped the cold start of {name}: {completed.stderr.decode().strip().splitlines()[-1]}",
+                  file=sys.stderr)
+            continue
+        metrics[f'cli.cold_start.{name}'] = (1 / min(seconds), 'starts/s')
+
+
+def find_regressions(metrics, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare metrics with a baseline produced by an earlier run. All metrics are rates, lower is worse.
+
+    The baseline may contain a "thresholds" object mapping metric names to their own allowed fraction,
+    for metrics that are noisier or more critical than the rest.
+
+    :param metrics: Metrics of this run.
+    :type metrics: dict
+    :param baseline: Output of an earlier run.
+    :type baseline: dict
+    :param threshold: Fraction a metric may fall below the baseline.
+    :type threshold: float
+    :return: The metrics that fell below their threshold.
+    :rtype: List[dict]
+    """
+    regressions = []
+    thresholds = baseline.get('thresholds', {})
+    for name, metric in metrics.items():
+        if name not in baseline.get('metrics', {}):
+            continue
+        baseline_value = baseline['metrics'][name]['value']
+        allowed = thresholds.get(name, threshold)
+        change = metric['value'] / baseline_value - 1
+        if change < -allowed:
+            regressions.append({
+                'metric': name,
+                'baseline': baseline_value,
+                'value': metric['value'],
+                'change': round(change, 4),
+                'threshold': allowed
+            })
+    return regressions
+
+
+def parse_counts(value):
+    return [int(count) for count in value.split(',') if count]
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmark the transformer and the AWS copy tools, print the results as JSON.")
+    parser.add_argument("--groups", default="transformer,path", help="Comma separated benchmark groups out of transformer, path, "
+                                                                     "cli, lambda and aws (default: transformer,path)")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Minimum seconds per timed run, raise it for steadier results (default: 0.1)")
+    parser.add_argument("--baseline", help="Output of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed fractional drop below the baseline (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--output", help="Also write the results to this file, e.g. to serve as the next baseline")
+    parser.add_argument("--cold-starts", type=int, default=5, help="With cli, interpreter starts per command (default: 5)")
+    parser.add_argument("--items", type=parse_counts, default=[1000, 5000], help="With aws, DynamoDB item counts (default: 1000,5000)")
+    parser.add_argument("--item-sizes", type=parse_counts, default=[100, 1000], help="With aws, item sizes in bytes (default: 100,1000)")
+    parser.add_argument("--messages", type=parse_counts, default=[1000], help="With aws, SQS message counts (default: 1000)")
+    parser.add_argument("--segments", type=int, default=4, help="With aws, number of scan segments (default: 4)")
+    parser.add_argument("--workers", type=int, default=4, help="With aws, number of SQS workers (default: 4)")
+    parser.add_argument("--max-in-flight", type=int, default=32, help="With aws, concurrent requests of the asyncio engine (default: 32)")
+    parser.add_argument("--port", type=int, default=5055, help="With aws, port of the local moto server (default: 5055)")
+    args = parser.parse_args(argv)
+
+    groups = set(args.groups.split(','))
+    metrics = {}
+    # Progress printed by the measured tools and the moto server goes to stderr, stdout only carries the results
+    with contextlib.redirect_stdout(sys.stderr):
+        if 'transformer' in groups:
+            benchmark_transformer(metrics, args.min_time)
+        if 'path' in groups:
+            benchmark_paths(metrics, args.min_time)
+        if 'cli' in groups:
+            benchmark_cli(metrics, args.cold_starts)
+        if 'lambda' in groups:
+            # Imported here, the harness imports this module
+            from .benchmark_string_functions import benchmark_string_functions, load_function
+
+            benchmark_string_functions(metrics, load_function(), min_seconds=args.min_time)
+        if 'aws' in groups:
+            benchmark_aws(metrics, args.items, args.item_sizes, args.messages, args.segments, args.workers,
+                          args.max_in_flight, args.port)
+
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'metrics': {name: {'value': round(value, 2), 'unit': unit} for name, (value, unit) in sorted(metrics.items())}
+    }
+    if args.baseline:
+        with open(args.baseline) as file:
+            results['regressions'] = find_regressions(results['metrics'], json.load(file), args.threshold)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+            file.write('\n')
+
+    if results.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
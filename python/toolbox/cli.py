@@ -0,0 +1,47 @@
+import importlib
+import sys
+
+# Commands with the module implementing them and their description. Only the module of the command being run is
+# imported, so e.g. create-postman-from-openapi never loads boto3
+COMMANDS = {
+    'copy-dynamodb-content': ('copy_dynamodb_content', "Copy the content of a DynamoDB table into another table"),
+    'copy-dynamodb-from-to-acc': ('copy_dynamodb_from_to_acc', "Copy or sync a DynamoDB table into another account"),
+    'copy-sqs-from-to-acc': ('copy_sqs_from_to_acc', "Move all messages of an SQS queue into another account"),
+    'export-import-dynamodb': ('export_import_dynamodb', "Export a DynamoDB table to compressed files or import them"),
+    'create-postman-from-openapi': ('create_postman_from_openapi', "Create Postman collections from OpenAPI specs"),
+    'transform-records': ('transform_records', "Apply transformer formulas to the records of an NDJSON or JSON file"),
+    'benchmark-suite': ('benchmark_suite', "Benchmark the toolbox and check for regressions"),
+    'benchmark-async-copy': ('benchmark_async_copy', "Compare the sync and asyncio copy engines against moto"),
+    'benchmark-string-functions': ('benchmark_string_functions', "Benchmark the string-functions Lambda locally")
+}
+
+
+def usage():
+    width = max(len(command) for command in COMMANDS)
+    lines = ["usage: toolbox COMMAND [ARGS]", "", "commands:"]
+    lines += [f"  {command:<{width}}  {description}" for command, (_, description) in COMMANDS.items()]
+    lines += ["", "Run toolbox COMMAND --help for the arguments of a command."]
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """
+    Run a toolbox command, e.g. main(['transform-records', 'in.ndjson', 'out.ndjson', '--formula', 'x=input.a']).
+
+    :param argv: Command and its arguments (default: sys.argv[1:]).
+    :type argv: List[str]
+    :return: Exit status.
+    :rtype: int
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0 if argv else 2
+
+    command, arguments = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"toolbox: unknown command '{command}'\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    module = importlib.import_module(f"{__package__}.{COMMANDS[command][0]}")
+    return module.main(arguments, prog=f"toolbox {command}") or 0
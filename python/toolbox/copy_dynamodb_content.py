@@ -0,0 +1,70 @@
+import argparse
+from botocore.exceptions import NoCredentialsError, PartialCredentialsError
+
+from .aws import add_credential_arguments, check_credential_arguments
+from .dynamodb_utils import copy_table, format_write_stats, table_config
+from .metrics import add_arguments, instrumented
+
+def copy_dynamodb_table(source_table_name, destination_table_name, aws_access_key, aws_secret_key, aws_session_token,
+                        total_segments=1, max_workers=None, use_processes=False, write_concurrency=4, endpoint_url=None,
+                        checkpoint_path=None, resume=False, read_capacity=None, write_capacity=None,
+                        capacity_percent=None, use_async=False, max_in_flight=32):
+    try:
+        source_config = table_config(source_table_name, aws_access_key, aws_secret_key, aws_session_token, endpoint_url)
+        destination_config = table_config(destination_table_name, aws_access_key, aws_secret_key, aws_session_token, endpoint_url)
+
+        stats = copy_table(
+            source_config, destination_config, total_segments, max_workers, use_processes, write_concurrency,
+            checkpoint_path, resume, read_capacity, write_capacity, capacity_percent, use_async, max_in_flight
+        )
+
+        print(f"Successfully copied {stats['items']} items from {source_table_name} to {destination_table_name}: "
+              f"{format_write_stats(stats)}.")
+
+    except NoCredentialsError:
+        print("AWS credentials not provided.")
+    except PartialCredentialsError:
+        print("Incomplete AWS credentials provided.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        if checkpoint_path:
+            print(f"Progress is saved in {checkpoint_path}, rerun with --resume to continue.")
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Copy the content of a DynamoDB table into another table.")
+    parser.add_argument("source_table_name")
+    parser.add_argument("destination_table_name")
+    add_credential_arguments(parser)
+    parser.add_argument("--segments", type=int, default=1, help="Number of parallel scan segments (default: 1, sequential scan)")
+    parser.add_argument("--workers", type=int, help="Size of the worker pool (default: one worker per segment)")
+    parser.add_argument("--processes", action="store_true", help="Use a process pool instead of a thread pool")
+    parser.add_argument("--write-concurrency", type=int, default=4, help="Concurrent BatchWriteItem calls per segment (default: 4)")
+    parser.add_argument("--endpoint-url", help="Custom DynamoDB endpoint, e.g. http://localhost:8000 for DynamoDB Local")
+    parser.add_argument("--checkpoint", help="Checkpoint file recording the progress of every scan segment")
+    parser.add_argument("--resume", action="store_true", help="Continue the copy recorded in the --checkpoint file")
+    parser.add_argument("--read-capacity", type=float, help="Read capacity units per second the copy may use on the source table")
+    parser.add_argument("--write-capacity", type=float, help="Write capacity units per second the copy may use on the destination table")
+    parser.add_argument("--capacity-percent", type=float, help="Percentage of the provisioned capacity the copy may use, "
+                                                                "for the limits not given explicitly")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use the asyncio engine (does not support --checkpoint or capacity limits)")
+    parser.add_argument("--max-in-flight", type=int, default=32, help="With --async, maximum concurrent requests (default: 32)")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    check_credential_arguments(parser, args)
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    if args.use_async and (args.checkpoint or args.read_capacity or args.write_capacity or args.capacity_percent):
+        parser.error("--async does not support --checkpoint or capacity limits")
+
+    with instrumented(args):
+        copy_dynamodb_table(
+            args.source_table_name, args.destination_table_name, args.aws_access_key, args.aws_secret_key, args.aws_session_token,
+            args.segments, args.workers, args.processes, args.write_concurrency, args.endpoint_url,
+            args.checkpoint, args.resume, args.read_capacity, args.write_capacity, args.capacity_percent, args.use_async,
+            args.max_in_flight
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import argparse
+import json
+from botocore.exceptions import NoCredentialsError, PartialCredentialsError
+
+from .aws import add_credential_arguments, check_credential_arguments
+from .dynamodb_utils import (
+    CapacityGovernor, capacity_budget, capacity_governor, copy_table, delta_sync, format_write_stats, open_table,
+    table_config
+)
+from .metrics import add_arguments, instrumented
+
+def copy_dynamodb_table(
+    source_table_name, source_access_key, source_secret_key, source_session_token,
+    destination_table_name, destination_access_key, destination_secret_key, destination_session_token,
+    total_segments=1, max_workers=None, use_processes=False, write_concurrency=4,
+    source_endpoint_url=None, destination_endpoint_url=None, checkpoint_path=None, resume=False,
+    read_capacity=None, write_capacity=None, capacity_percent=None, use_async=False, max_in_flight=32
+):
+    try:
+        source_config = table_config(
+            source_table_name, source_access_key, source_secret_key, source_session_token, source_endpoint_url
+        )
+        destination_config = table_config(
+            destination_table_name, destination_access_key, destination_secret_key, destination_session_token,
+            destination_endpoint_url
+        )
+
+        stats = copy_table(
+            source_config, destination_config, total_segments, max_workers, use_processes, write_concurrency,
+            checkpoint_path, resume, read_capacity, write_capacity, capacity_percent, use_async, max_in_flight
+        )
+
+        print(f"Successfully copied {stats['items']} items from {source_table_name} to {destination_table_name}: "
+              f"{format_write_stats(stats)}.")
+
+    except NoCredentialsError:
+        print("AWS credentials not provided.")
+    except PartialCredentialsError:
+        print("Incomplete AWS credentials provided.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        if checkpoint_path:
+            print(f"Progress is saved in {checkpoint_path}, rerun with --resume to continue.")
+
+def sync_dynamodb_table(
+    source_table_name, source_access_key, source_secret_key, source_session_token,
+    destination_table_name, destination_access_key, destination_secret_key, destination_session_token,
+    total_segments=1, max_workers=None, write_concurrency=4, source_endpoint_url=None, destination_endpoint_url=None,
+    delete_orphans=False, dry_run=False, report_path=None, read_capacity=None, write_capacity=None,
+    capacity_percent=None
+):
+    try:
+        source_config = table_config(
+            source_table_name, source_access_key, source_secret_key, source_session_token, source_endpoint_url
+        )
+        destination_config = table_config(
+            destination_table_name, destination_access_key, destination_secret_key, destination_session_token,
+            destination_endpoint_url
+        )
+
+        # Limit reads and writes to a fraction of the tables' capacity so live traffic is not throttled
+        governor = capacity_governor(source_config, destination_config, read_capacity, write_capacity, capacity_percent)
+        destination_governor = None
+        if governor is not None:
+            # The destination table is scanned too, within its own read capacity
+            destination_governor = CapacityGovernor(
+                capacity_budget(open_table(destination_config), read_capacity, capacity_percent, 'ReadCapacityUnits')
+            )
+
+        # Compare both tables by primary key and content hash, write only what differs
+        report = delta_sync(
+            source_config, destination_config, total_segments, max_workers, write_concurrency, delete_orphans,
+            dry_run, governor, destination_governor
+        )
+
+        action = "Would sync" if dry_run else "Synced"
+        orphan_action = "deleted" if delete_orphans and not dry_run else "kept"
+        print(f"{action} {source_table_name} to {destination_table_name}: {len(report['new'])} new, "
+              f"{len(report['changed'])} changed, {report['unchanged']} unchanged, "
+              f"{len(report['orphaned'])} orphaned items ({orphan_action}).")
+
+        if report_path:
+            with open(report_path, "w") as file:
+                json.dump(report, file, indent=2)
+            print(f"Diff report written to {report_path}.")
+
+    except NoCredentialsError:
+        print("AWS credentials not provided.")
+    except PartialCredentialsError:
+        print("Incomplete AWS credentials provided.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Copy the content of a DynamoDB table into a table in another account.")
+    parser.add_argument("source_table_name")
+    parser.add_argument("destination_table_name")
+    add_credential_arguments(parser, 'source', 'source')
+    add_credential_arguments(parser, 'destination', 'destination')
+    parser.add_argument("--segments", type=int, default=1, help="Number of parallel scan segments (default: 1, sequential scan)")
+    parser.add_argument("--workers", type=int, help="Size of the worker pool (default: one worker per segment)")
+    parser.add_argument("--processes", action="store_true", help="Use a process pool instead of a thread pool")
+    parser.add_argument("--write-concurrency", type=int, default=4, help="Concurrent BatchWriteItem calls per segment (default: 4)")
+    parser.add_argument("--source-endpoint-url", help="Custom endpoint for the source table, e.g. DynamoDB Local")
+    parser.add_argument("--destination-endpoint-url", help="Custom endpoint for the destination table, e.g. DynamoDB Local")
+    parser.add_argument("--checkpoint", help="Checkpoint file recording the progress of every scan segment")
+    parser.add_argument("--resume", action="store_true", help="Continue the copy recorded in the --checkpoint file")
+    parser.add_argument("--read-capacity", type=float, help="Read capacity units per second the copy may use on the source table "
+                                                             "(with --sync, on each table)")
+    parser.add_argument("--write-capacity", type=float, help="Write capacity units per second the copy may use on the destination table")
+    parser.add_argument("--capacity-percent", type=float, help="Percentage of the provisioned capacity the copy may use, "
+                                                                "for the limits not given explicitly")
+    parser.add_argument("--sync", action="store_true", help="Write only new or changed items instead of copying everything "
+                                                            "(keeps about 200 bytes per destination item in memory)")
+    parser.add_argument("--delete-orphans", action="store_true", help="With --sync, delete destination items missing in the source")
+    parser.add_argument("--dry-run", action="store_true", help="With --sync, only report the differences")
+    parser.add_argument("--report", help="With --sync, write the keys of new, changed and orphaned items to this JSON file")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use the asyncio engine (does not support --checkpoint or capacity limits)")
+    parser.add_argument("--max-in-flight", type=int, default=32, help="With --async, maximum concurrent requests (default: 32)")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    check_credential_arguments(parser, args, 'source')
+    check_credential_arguments(parser, args, 'destination')
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    if args.use_async and (args.checkpoint or args.read_capacity or args.write_capacity or args.capacity_percent):
+        parser.error("--async does not support --checkpoint or capacity limits")
+    if args.sync and (args.processes or args.checkpoint or args.use_async):
+        parser.error("--sync does not support --processes, --checkpoint or --async")
+    if not args.sync and (args.delete_orphans or args.dry_run or args.report):
+        parser.error("--delete-orphans, --dry-run and --report require --sync")
+
+    with instrumented(args):
+        if args.sync:
+            sync_dynamodb_table(
+                args.source_table_name, args.source_access_key, args.source_secret_key, args.source_session_token,
+                args.destination_table_name, args.destination_access_key, args.destination_secret_key,
+                args.destination_session_token, args.segments, args.workers, args.write_concurrency,
+                args.source_endpoint_url, args.destination_endpoint_url, args.delete_orphans, args.dry_run, args.report,
+                args.read_capacity, args.write_capacity, args.capacity_percent
+            )
+        else:
+            copy_dynamodb_table(
+                args.source_table_name, args.source_access_key, args.source_secret_key, args.source_session_token,
+                args.destination_table_name, args.destination_access_key, args.destination_secret_key,
+                args.destination_session_token, args.segments, args.workers, args.processes, args.write_concurrency,
+                args.source_endpoint_url, args.destination_endpoint_url, args.checkpoint, args.resume,
+                args.read_capacity, args.write_capacity, args.capacity_percent, args.use_async, args.max_in_flight
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,540 @@
+import argparse
+import threading
+import time
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import NoCredentialsError, PartialCredentialsError
+
+from . import aws
+from .metrics import add_arguments, instrumented, registry
+
+
+class TransferStats:
+    """
+    Thread-safe counters and per-stage latencies of an SQS transfer.
+    """
+
+    STAGES = ('receive', 'send', 'delete')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.received = 0
+        self.sent = 0
+        self.deleted = 0
+        self.failed_sends = 0
+        self.failed_deletes = 0
+        self.given_up = 0
+        self._stage_seconds = {stage: 0.0 for stage in self.STAGES}
+        self._stage_calls = {stage: 0 for stage in self.STAGES}
+
+    def record(self, stage, seconds, **counters):
+        with self._lock:
+            self._stage_seconds[stage] += seconds
+            self._stage_calls[stage] += 1
+        registry.observe(f'sqs_{stage}_seconds', seconds)
+        self.record_counters(**counters)
+
+    def record_counters(self, **counters):
+        with self._lock:
+            for counter, value in counters.items():
+                setattr(self, counter, getattr(self, counter) + value)
+        for counter, value in counters.items():
+            registry.increment(f'sqs_{counter}_total', value)
+
+    def summary(self):
+        with self._lock:
+            seconds = time.monotonic() - self.started
+            latencies = ", ".join(
+                f"{stage} {self._stage_seconds[stage] / self._stage_calls[stage] * 1000:.0f} ms"
+                for stage in self.STAGES if self._stage_calls[stage]
+            )
+            rate = self.deleted / seconds if seconds > 0 else 0.0
+            return (f"{self.deleted} messages moved in {seconds:.1f}s ({rate:.0f} messages/s), "
+                    f"{self.failed_sends} failed sends, {self.failed_deletes} failed deletes, "
+                    f"{self.given_up} messages given up; "
+                    f"average latency per call: {latencies or 'n/a'}")
+
+
+def is_fifo_queue(queue_url):
+    return queue_url.endswith('.fifo')
+
+
+def build_send_entry(index, message, fifo):
+    """
+    Build a SendMessageBatch entry that carries over the body, message attributes and the system attributes
+    that can be set on send.
+
+    :param index: Position of the message in the batch, used as entry id.
+    :type index: int
+    :param message: Message as returned by receive_message with all attributes requested.
+    :type message: dict
+    :param fifo: Whether the destination is a FIFO queue.
+    :type fifo: bool
+    :return: Batch entry.
+    :rtype: dict
+    """
+    entry = {
+        'Id': str(index),
+        'MessageBody': message['Body'],
+        'MessageAttributes': message.get('MessageAttributes', {})
+    }
+    attributes = message.get('Attributes', {})
+    if 'AWSTraceHeader' in attributes:
+        entry['MessageSystemAttributes'] = {
+            'AWSTraceHeader': {'StringValue': attributes['AWSTraceHeader'], 'DataType': 'String'}
+        }
+    if fifo:
+        # Keep the group for ordering and the deduplication id so a re-sent message is dropped by the destination
+        entry['MessageGroupId'] = attributes.get('MessageGroupId', 'default')
+        entry['MessageDeduplicationId'] = attributes.get('MessageDeduplicationId', message['MessageId'])
+    return entry
+
+
+def receive_batch(source_sqs, source_queue_url, stats, wait_time_seconds=1, visibility_timeout=None):
+    """
+    Receive up to 10 messages including all message and system attributes.
+
+    :return: Received messages, empty if the wait time passed without messages.
+    :rtype: List[dict]
+    """
+    started = time.monotonic()
+    receive_kwargs = {
+        'QueueUrl': source_queue_url,
+        'MaxNumberOfMessages': 10,
+        'WaitTimeSeconds': wait_time_seconds,
+        'AttributeNames': ['All'],
+        'MessageAttributeNames': ['All']
+    }
+    if visibility_timeout:
+        receive_kwargs['VisibilityTimeout'] = visibility_timeout
+    messages = source_sqs.receive_message(**receive_kwargs).get('Messages', [])
+    stats.record('receive', time.monotonic() - started, received=len(messages))
+    return messages
+
+
+def send_entries(destination_sqs, destination_queue_url, entries, stats, send_retries=2):
+    """
+    Send batch entries, retrying entries that failed through no fault of the sender.
+
+    :return: Ids of the entries that were sent and the failures of the entries that were not.
+    :rtype: Tuple[List[str], List[dict]]
+    """
+    sent_ids = []
+    for attempt in range(send_retries + 1):
+        started = time.monotonic()
+        response = destination_sqs.send_message_batch(QueueUrl=destination_queue_url, Entries=entries)
+        successful_ids = [entry['Id'] for entry in response.get('Successful', [])]
+        failed = response.get('Failed', [])
+        sent_ids.extend(successful_ids)
+        stats.record('send', time.monotonic() - started, sent=len(successful_ids))
+
+        retry_ids = {failure['Id'] for failure in failed if not failure.get('SenderFault')}
+        entries = [entry for entry in entries if entry['Id'] in retry_ids]
+        if not failed or not entries or attempt == send_retries:
+            return sent_ids, failed
+
+
+def forward_batch(source_sqs, source_queue_url, destination_sqs, destination_queue_url, messages, stats,
+                  send_retries=2):
+    """
+    Send a batch of messages to the destination queue and delete the ones that were sent from the source queue.
+
+    Failed entries are retried up to send_retries times. Messages that still fail are not deleted and become
+    visible again in the source queue after their visibility timeout. For a FIFO destination the batch is sent in
+    rounds holding at most one message per group, and a group whose message fails sends nothing further, so a
+    later message can never overtake an earlier one of the same group.
+
+    :param source_sqs: SQS client of the source account.
+    :param source_queue_url: URL of the source queue.
+    :type source_queue_url: str
+    :param destination_sqs: SQS client of the destination account.
+    :param destination_queue_url: URL of the destination queue.
+    :type destination_queue_url: str
+    :param messages: Received messages, at most 10.
+    :type messages: List[dict]
+    :param stats: Counters shared by all workers.
+    :type stats: TransferStats
+    :param send_retries: Number of times failed entries are sent again.
+    :type send_retries: int
+    :return: The messages that failed to send.
+    :rtype: List[dict]
+    """
+    fifo = is_fifo_queue(destination_queue_url)
+    # Batch entry ids only need to be unique within the batch, the position in the batch is enough
+    entries = [build_send_entry(index, message, fifo) for index, message in enumerate(messages)]
+
+    rounds = [entries]
+    if fifo:
+        rounds = []
+        group_positions = {}
+        for entry in entries:
+            position = group_positions.get(entry['MessageGroupId'], 0)
+            group_positions[entry['MessageGroupId']] = position + 1
+            if position == len(rounds):
+                rounds.append([])
+            rounds[position].append(entry)
+
+    sent = []
+    failed_messages = []
+    blocked_groups = set()
+    for round_entries in rounds:
+        round_entries = [entry for entry in round_entries if entry.get('MessageGroupId') not in blocked_groups]
+        if not round_entries:
+            continue
+
+        sent_ids, failed = send_entries(destination_sqs, destination_queue_url, round_entries, stats, send_retries)
+        sent.extend(messages[int(entry_id)] for entry_id in sent_ids)
+        stats.record_counters(failed_sends=len(failed))
+        for failure in failed:
+            failed_entry = entries[int(failure['Id'])]
+            blocked_groups.add(failed_entry.get('MessageGroupId'))
+            failed_messages.append(messages[int(failure['Id'])])
+            print(f"Failed to send message {messages[int(failure['Id'])]['MessageId']}: {failure.get('Message')}")
+    if not sent:
+        return failed_messages
+
+    # Delete only the messages that reached the destination queue
+    started = time.monotonic()
+    response = source_sqs.delete_message_batch(
+        QueueUrl=source_queue_url,
+        Entries=[
+            {'Id': str(index), 'ReceiptHandle': message['ReceiptHandle']}
+            for index, message in enumerate(sent)
+        ]
+    )
+    stats.record('delete', time.monotonic() - started, deleted=len(response.get('Successful', [])),
+                 failed_deletes=len(response.get('Failed', [])))
+    return failed_messages
+
+
+def move_message_batches(source_sqs, source_queue_url, destination_sqs, destination_queue_url, stats,
+                         wait_time_seconds=1):
+    """
+    Receive, send and delete batches of up to 10 messages until the source queue returns no messages.
+
+    :param source_sqs: SQS client of the source account.
+    :param source_queue_url: URL of the source queue.
+    :type source_queue_url: str
+    :param destination_sqs: SQS client of the destination account.
+    :param destination_queue_url: URL of the destination queue.
+    :type destination_queue_url: str
+    :param stats: Counters shared by all workers.
+    :type stats: TransferStats
+    :param wait_time_seconds: Long polling wait time of every receive (at most 20), the last receive waits this long
+        for messages that never come.
+    :type wait_time_seconds: int
+    """
+    while True:
+        messages = receive_batch(source_sqs, source_queue_url, stats, wait_time_seconds)
+        if not messages:
+            return
+        forward_batch(source_sqs, source_queue_url, destination_sqs, destination_queue_url, messages, stats)
+
+
+class VisibilityHeartbeat:
+    """
+    Background thread that keeps extending the visibility timeout of in-flight messages, so a slow send or delete
+    never lets a message reappear in the source queue and get transferred twice.
+    """
+
+    def __init__(self, sqs, queue_url, visibility_timeout):
+        """
+        :param sqs: SQS client of the queue the messages were received from.
+        :param queue_url: URL of that queue.
+        :type queue_url: str
+        :param visibility_timeout: Visibility timeout in seconds set on every extension.
+        :type visibility_timeout: int
+        """
+        self._sqs = sqs
+        self._queue_url = queue_url
+        self._visibility_timeout = visibility_timeout
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def track(self, messages):
+        with self._lock:
+            self._in_flight.update(message['ReceiptHandle'] for message in messages)
+
+    def release(self, messages):
+        with self._lock:
+            self._in_flight.difference_update(message['ReceiptHandle'] for message in messages)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        # Extend well before the timeout expires, leaving room for a slow ChangeMessageVisibilityBatch call
+        while not self._stopped.wait(self._visibility_timeout / 3):
+            with self._lock:
+                receipt_handles = list(self._in_flight)
+            for start in range(0, len(receipt_handles), 10):
+                try:
+                    self._sqs.change_message_visibility_batch(
+                        QueueUrl=self._queue_url,
+                        Entries=[
+                            {'Id': str(index), 'ReceiptHandle': receipt_handle,
+                             'VisibilityTimeout': self._visibility_timeout}
+                            for index, receipt_handle in enumerate(receipt_handles[start:start + 10])
+                        ]
+                    )
+                except Exception as e:
+                    print(f"Failed to extend message visibility: {e}")
+
+
+class DrainMonitor:
+    """
+    Decides when the source queue is empty: only after several consecutive empty long polls, each confirmed by
+    the queue reporting no visible, in-flight or delayed messages. A single empty receive is not enough.
+
+    Messages that failed to send max_attempts times are given up on. They stay in the source queue, and so do the
+    later messages of their group in a FIFO queue, which must not overtake them. Receiving such messages again is not
+    progress, and the queue counts as empty when only they are left. Messages further back in a blocked FIFO group
+    are never handed out, so the visible messages of a FIFO queue are not counted once a group is blocked.
+    """
+
+    ATTRIBUTES = ['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible',
+                  'ApproximateNumberOfMessagesDelayed']
+
+    def __init__(self, sqs, queue_url, checks=3, max_attempts=5):
+        """
+        :param sqs: SQS client of the source queue.
+        :param queue_url: URL of the source queue.
+        :type queue_url: str
+        :param checks: Number of consecutive confirmed empty receives before the queue counts as drained.
+        :type checks: int
+        :param max_attempts: Number of receives whose send failed before a message is given up on.
+        :type max_attempts: int
+        """
+        self._sqs = sqs
+        self._queue_url = queue_url
+        self._checks = checks
+        self._empty_checks = 0
+        self._failed_attempts = {}
+        self._blocked_groups = set()
+        # Ids of the given-up messages and of the messages of blocked groups received since
+        self._left_behind = set()
+        self._lock = threading.Lock()
+        self.max_attempts = max_attempts
+        self.given_up = set()
+        self.drained = threading.Event()
+
+    def pending(self, messages):
+        """
+        :return: The received messages to forward, without those given up on and those of blocked groups.
+        :rtype: List[dict]
+        """
+        pending = []
+        with self._lock:
+            for message in messages:
+                group = message.get('Attributes', {}).get('MessageGroupId')
+                if message['MessageId'] in self._left_behind or group in self._blocked_groups:
+                    self._left_behind.add(message['MessageId'])
+                else:
+                    pending.append(message)
+        return pending
+
+    def record_failures(self, messages):
+        """
+        Count a failed send of every message.
+
+        :return: The messages that have now failed max_attempts times and are given up on.
+        :rtype: List[dict]
+        """
+        given_up = []
+        with self._lock:
+            for message in messages:
+                attempts = self._failed_attempts.get(message['MessageId'], 0) + 1
+                self._failed_attempts[message['MessageId']] = attempts
+                if attempts >= self.max_attempts:
+                    self.given_up.add(message['MessageId'])
+                    self._left_behind.add(message['MessageId'])
+                    group = message.get('Attributes', {}).get('MessageGroupId')
+                    if group is not None:
+                        self._blocked_groups.add(group)
+                    given_up.append(message)
+        return given_up
+
+    def messages_received(self):
+        with self._lock:
+            self._empty_checks = 0
+
+    def empty_receive(self):
+        attributes = self._sqs.get_queue_attributes(
+            QueueUrl=self._queue_url, AttributeNames=self.ATTRIBUTES
+        )['Attributes']
+        counts = {name: int(attributes.get(name, 0)) for name in self.ATTRIBUTES}
+        with self._lock:
+            if self._blocked_groups:
+                counts['ApproximateNumberOfMessages'] = 0
+            empty = sum(counts.values()) <= len(self._left_behind)
+            self._empty_checks = self._empty_checks + 1 if empty else 0
+            if self._empty_checks >= self._checks:
+                self.drained.set()
+
+
+def transfer_message_batches(source_sqs, source_queue_url, destination_sqs, destination_queue_url, stats,
+                             heartbeat, drain_monitor, wait_time_seconds=20, visibility_timeout=60):
+    """
+    Long-polling variant of move_message_batches that runs until the drain monitor reports an empty queue,
+    keeping received messages invisible through the heartbeat while they are being forwarded. Messages that keep
+    failing to send are given up on through the drain monitor and reported.
+
+    :param source_sqs: SQS client of the source account.
+    :param source_queue_url: URL of the source queue.
+    :type source_queue_url: str
+    :param destination_sqs: SQS client of the destination account.
+    :param destination_queue_url: URL of the destination queue.
+    :type destination_queue_url: str
+    :param stats: Counters shared by all workers.
+    :type stats: TransferStats
+    :param heartbeat: Heartbeat extending the visibility of in-flight messages.
+    :type heartbeat: VisibilityHeartbeat
+    :param drain_monitor: Drain detection shared by all workers.
+    :type drain_monitor: DrainMonitor
+    :param wait_time_seconds: Long polling wait time of every receive (at most 20).
+    :type wait_time_seconds: int
+    :param visibility_timeout: Visibility timeout of received messages in seconds.
+    :type visibility_timeout: int
+    """
+    while not drain_monitor.drained.is_set():
+        messages = receive_batch(source_sqs, source_queue_url, stats, wait_time_seconds, visibility_timeout)
+        messages = drain_monitor.pending(messages)
+        if not messages:
+            drain_monitor.empty_receive()
+            continue
+
+        drain_monitor.messages_received()
+        heartbeat.track(messages)
+        try:
+            failed = forward_batch(
+                source_sqs, source_queue_url, destination_sqs, destination_queue_url, messages, stats
+            )
+        finally:
+            heartbeat.release(messages)
+
+        for message in drain_monitor.record_failures(failed):
+            stats.record_counters(given_up=1)
+            group = message.get('Attributes', {}).get('MessageGroupId')
+            print(f"Giving up on message {message['MessageId']} after {drain_monitor.max_attempts} failed sends, "
+                  f"it stays in the source queue" + (f" with the later messages of group {group}." if group else "."))
+
+
+def copy_sqs_messages(
+    source_queue_url, source_access_key, source_secret_key, source_session_token,
+    destination_queue_url, destination_access_key, destination_secret_key, destination_session_token,
+    workers=1, long_running=False, wait_time_seconds=None, visibility_timeout=60, use_async=False, max_in_flight=32,
+    max_attempts=5
+):
+    if wait_time_seconds is None:
+        # Without --long-running the first empty receive ends the transfer, a long wait would only delay the end
+        wait_time_seconds = 20 if long_running else 1
+
+    try:
+        if use_async:
+            # Imported here, the asyncio engine reuses the batch logic of this module
+            import asyncio
+
+            from .async_copy import async_copy_sqs_messages
+
+            stats = asyncio.run(async_copy_sqs_messages(
+                source_queue_url, (source_access_key, source_secret_key, source_session_token),
+                destination_queue_url, (destination_access_key, destination_secret_key, destination_session_token),
+                workers, max_in_flight, wait_time_seconds=wait_time_seconds
+            ))
+            print(f"Successfully copied and deleted messages: {stats.summary()}.")
+            return
+
+        # Initialize the SQS clients for source and destination. Clients are thread-safe and shared by all
+        # workers, so their connection pools need room for every worker.
+        max_pool_connections = max(10, workers)
+        source_sqs = aws.client(
+            'sqs', source_access_key, source_secret_key, source_session_token,
+            max_pool_connections=max_pool_connections
+        )
+        destination_sqs = aws.client(
+            'sqs', destination_access_key, destination_secret_key, destination_session_token,
+            max_pool_connections=max_pool_connections
+        )
+
+        # Run concurrent receive -> send -> delete workers until the source queue is empty. With a FIFO source
+        # queue, SQS hands out further messages of a group only after the in-flight ones are deleted, so the
+        # workers process different groups in parallel while every group stays in order.
+        stats = TransferStats()
+        with ExitStack() as stack:
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=workers))
+            if long_running:
+                heartbeat = stack.enter_context(VisibilityHeartbeat(source_sqs, source_queue_url, visibility_timeout))
+                drain_monitor = DrainMonitor(source_sqs, source_queue_url, max_attempts=max_attempts)
+                futures = [
+                    executor.submit(
+                        transfer_message_batches, source_sqs, source_queue_url, destination_sqs,
+                        destination_queue_url, stats, heartbeat, drain_monitor, wait_time_seconds, visibility_timeout
+                    )
+                    for _ in range(workers)
+                ]
+            else:
+                futures = [
+                    executor.submit(
+                        move_message_batches, source_sqs, source_queue_url, destination_sqs, destination_queue_url,
+                        stats, wait_time_seconds
+                    )
+                    for _ in range(workers)
+                ]
+            for future in futures:
+                future.result()
+
+        print("No more messages to copy.")
+        print(f"Successfully copied and deleted messages: {stats.summary()}.")
+
+    except NoCredentialsError:
+        print("AWS credentials not provided.")
+    except PartialCredentialsError:
+        print("Incomplete AWS credentials provided.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Move all messages of an SQS queue into a queue in another account.")
+    parser.add_argument("source_queue_url")
+    parser.add_argument("destination_queue_url")
+    aws.add_credential_arguments(parser, 'source', 'source')
+    aws.add_credential_arguments(parser, 'destination', 'destination')
+    parser.add_argument("--workers", type=int, default=1, help="Number of concurrent receive/send/delete workers (default: 1)")
+    parser.add_argument("--long-running", action="store_true",
+                        help="Long poll until the queue reports no visible, in-flight or delayed messages, "
+                             "extending the visibility of in-flight messages")
+    parser.add_argument("--wait-time", type=int,
+                        help="Long polling wait time of every receive in seconds (default: 20 with --long-running, otherwise 1)")
+    parser.add_argument("--visibility-timeout", type=int, default=60,
+                        help="Visibility timeout of received messages in seconds (default: 60)")
+    parser.add_argument("--max-attempts", type=int, default=5,
+                        help="With --long-running, failed sends of a message before it is left in the source queue (default: 5)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use the asyncio engine (does not support --long-running)")
+    parser.add_argument("--max-in-flight", type=int, default=32, help="With --async, maximum concurrent requests (default: 32)")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    aws.check_credential_arguments(parser, args, 'source')
+    aws.check_credential_arguments(parser, args, 'destination')
+    if args.use_async and args.long_running:
+        parser.error("--async does not support --long-running")
+
+    with instrumented(args):
+        copy_sqs_messages(
+            args.source_queue_url, args.source_access_key, args.source_secret_key, args.source_session_token,
+            args.destination_queue_url, args.destination_access_key, args.destination_secret_key, args.destination_session_token,
+            args.workers, args.long_running, args.wait_time, args.visibility_timeout, args.use_async, args.max_in_flight,
+            args.max_attempts
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,766 @@
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from urllib.parse import unquote
+
+from .json_stream import JsonStreamReader
+from .metrics import add_arguments, instrumented
+
+HTTP_METHODS = ["get", "post", "put", "delete", "patch", "options", "head"]
+
+# Version of the manifest written by the batch mode, bump it when the generated items change so that no
+# item built by an older version is reused
+MANIFEST_VERSION = 3
+
+COLLECTION_SCHEMA = "https://schema.getpostman.com/json/collection/v2.1.0/collection.json"
+
+# Ending of the file names of the collections, see output_file_name
+COLLECTION_SUFFIX = "_postman_collection.json"
+
+# Example values of the primitive schema types, for schemas without example, default or enum
+EXAMPLE_PLACEHOLDERS = {"string": "string", "integer": 0, "number": 0, "boolean": True}
+
+# Schema levels an example goes down, deeper schemas are cut off like recursive ones
+MAX_EXAMPLE_DEPTH = 8
+
+# Example of a schema cut off, because it recurs inside itself or is nested too deeply, left out of the object or
+# array containing it
+_CUT_OFF = object()
+
+
+class RefResolver:
+    """
+    Resolves local $ref references ("#/components/schemas/Pet") of an OpenAPI document.
+
+    Every reference is looked up once and cached, shared components are returned as they are instead of being
+    copied, so resolving stays linear in the number of references however often components are reused.
+    References to other files are left unresolved.
+
+    The resolver also creates example values of schemas, see example, and caches them the same way.
+    """
+
+    def __init__(self, document):
+        """
+        :param document: The OpenAPI document, or the part of it references point into.
+        :type document: dict
+        """
+        self.document = document
+        self._cache = {}
+        # References being resolved, a reference met again is part of a cycle
+        self._resolving = set()
+        # Examples by the id of their resolved schema, which the document keeps alive
+        self._examples = {}
+
+    def resolve(self, value):
+        """
+        Follow the reference of an object until a concrete object is reached, other values are returned as they are.
+
+        :param value: Any value of the document.
+        :type value: any
+        :return: The referenced object.
+        :rtype: any
+        """
+        if not isinstance(value, dict) or not isinstance(value.get("$ref"), str):
+            return value
+        ref = value["$ref"]
+        if ref in self._cache:
+            return self._cache[ref]
+        if not ref.startswith("#"):
+            return value
+        if ref in self._resolving:
+            raise ValueError(f"Circular reference: {ref}")
+
+        self._resolving.add(ref)
+        try:
+            resolved = self.resolve(self._lookup(ref))
+        finally:
+            self._resolving.discard(ref)
+        self._cache[ref] = resolved
+        return resolved
+
+    def example(self, schema):
+        """
+        Create an example value of a schema: its example, default or first enum value, otherwise one built from
+        its properties, items and allOf, oneOf or anyOf members, with a placeholder for each primitive type.
+
+        References are resolved at every level. A schema containing itself, e.g. a tree node, is cut off where it
+        recurs, and any schema MAX_EXAMPLE_DEPTH levels down: the property is left out, the array left empty.
+
+        :param schema: The schema, or a reference to it.
+        :type schema: dict
+        :return: The example value.
+        :rtype: any
+        """
+        value, _ = self._example(schema, frozenset())
+        return {} if value is _CUT_OFF else value
+
+    def _example(self, schema, path):
+        # Returns the example and whether it is complete, i.e. independent of the path of schemas leading to it.
+        # Only complete examples are cached, the others depend on where they were cut off
+        schema = self.resolve(schema)
+        if not isinstance(schema, dict):
+            return None, True
+        key = id(schema)
+        if key in self._examples:
+            return self._examples[key], True
+        if key in path or len(path) == MAX_EXAMPLE_DEPTH:
+            return _CUT_OFF, False
+
+        value, complete = self._build_example(schema, path | {key})
+        if complete:
+            self._examples[key] = value
+        return value, complete
+
+    def _build_example(self, schema, path):
+        for keyword in ("example", "default"):
+            if keyword in schema:
+                return schema[keyword], True
+        if schema.get("enum"):
+            return schema["enum"][0], True
+
+        value = None
+        complete = True
+        # Objects of all allOf members are merged, of oneOf and anyOf only the first member is used
+        for member in schema.get("allOf", []) + schema.get("oneOf", [])[:1] + schema.get("anyOf", [])[:1]:
+            member_value, member_complete = self._example(member, path)
+            complete = complete and member_complete
+            if isinstance(value, dict) and isinstance(member_value, dict):
+                value = {**value, **member_value}
+            elif value is None and member_value is not _CUT_OFF:
+                value = member_value
+
+        schema_type = schema.get("type")
+        if isinstance(schema_type, list):
+            # OpenAPI 3.1 type lists, e.g. ["string", "null"]
+            schema_type = next((name for name in schema_type if name != "null"), None)
+
+        if "properties" in schema or schema_type == "object":
+            example = dict(value) if isinstance(value, dict) else {}
+            for name, property_schema in schema.get("properties", {}).items():
+                property_value, property_complete = self._example(property_schema, path)
+                complete = complete and property_complete
+                if property_value is not _CUT_OFF:
+                    example[name] = property_value
+            return example, complete
+        if value is not None:
+            return value, complete
+        if "items" in schema:
+            item, item_complete = self._example(schema["items"], path)
+            return ([] if item is _CUT_OFF else [item]), item_complete
+        if schema_type == "array":
+            return [], True
+        return EXAMPLE_PLACEHOLDERS.get(schema_type), True
+
+    def _lookup(self, ref):
+        target = self.document
+        for token in ref[1:].split("/")[1:]:
+            # JSON pointer escapes, see RFC 6901
+            token = unquote(token).replace("~1", "/").replace("~0", "~")
+            try:
+                target = target[int(token)] if isinstance(target, list) else target[token]
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise ValueError(f"Reference not found: {ref}")
+        return target
+
+
+def build_variables(servers):
+    """
+    Create a collection variable for the URL of every OpenAPI server.
+
+    :param servers: The servers of the OpenAPI spec.
+    :type servers: List[dict]
+    :return: Postman variables server1_url, server2_url, ...
+    :rtype: List[dict]
+    """
+    return [{"key": f"server{idx + 1}_url", "value": server["url"]} for idx, server in enumerate(servers)]
+
+
+def build_auth(security_schemes, resolver=None):
+    """
+    Create the variables and request headers for the supported security schemes (HTTP bearer).
+
+    :param security_schemes: The components.securitySchemes of the OpenAPI spec.
+    :type security_schemes: dict
+    :param resolver: Resolver of schemes given as $ref.
+    :type resolver: RefResolver
+    :return: Variables to add to the collection and headers to add to every request.
+    :rtype: Tuple[List[dict], List[dict]]
+    """
+    for scheme_name, scheme in security_schemes.items():
+        if resolver:
+            scheme = resolver.resolve(scheme)
+        # Bearer schemes all share the token variable, one Authorization header covers them
+        if scheme["type"] == "http" and scheme["scheme"] == "bearer":
+            variables = [{
+                "key": "auth_bearer_token",
+                "value": "",
+                "type": "string"
+            }]
+            headers = [{
+                "key": "Authorization",
+                "value": "Bearer {{auth_bearer_token}}"
+            }]
+            return variables, headers
+    return [], []
+
+
+def build_request_item(path, method, operation, auth_headers=(), resolver=None):
+    """
+    Create the Postman request item of one operation.
+
+    :param path: The path of the operation, e.g. /pets/{petId}.
+    :type path: str
+    :param method: The lower-case HTTP method.
+    :type method: str
+    :param operation: The OpenAPI operation object.
+    :type operation: dict
+    :param auth_headers: Headers added after the operation's own headers, see build_auth.
+    :type auth_headers: List[dict]
+    :param resolver: Resolver of the $ref in parameters, request bodies and schemas, by default one that only
+        resolves references within the operation.
+    :type resolver: RefResolver
+    :return: The Postman request item.
+    :rtype: dict
+    """
+    resolver = resolver or RefResolver(operation)
+    resolve = resolver.resolve
+    request_item = {
+        "name": operation.get("operationId", f"{method.upper()} {path}"),
+        "request": {
+            "method": method.upper(),
+            "header": [],
+            "url": {
+                "raw": f"{{{{server1_url}}}}{path}",
+                "host": ["{{server1_url}}"],
+                "path": path.strip("/").split("/")
+            },
+        }
+    }
+
+    # Add parameters
+    if "parameters" in operation:
+        request_item["request"]["url"]["query"] = []
+        for param in operation["parameters"]:
+            param = resolve(param)
+            request_item["request"]["url"]["query"].append({
+                "key": param["name"],
+                "value": param.get("example", ""),
+                "description": param.get("description", ""),
+                "disabled": not param.get("required", False)
+            })
+
+    # Add requestBody if present
+    request_body = resolve(operation.get("requestBody"))
+    if request_body and "content" in request_body:
+        for content_type, media_type in request_body["content"].items():
+            if "example" in media_type:
+                body = media_type["example"]
+            elif media_type.get("examples"):
+                # Named examples, the first one is used
+                body = resolve(next(iter(media_type["examples"].values()))).get("value", {})
+            elif media_type.get("schema"):
+                body = resolver.example(media_type["schema"])
+            else:
+                body = {}
+
+            request_item["request"]["body"] = {
+                "mode": "raw",
+                "raw": json.dumps(body, indent=2),
+                "options": {
+                    "raw": {
+                        "language": "json"
+                    }
+                }
+            }
+            request_item["request"]["header"].append({
+                "key": "Content-Type",
+                "value": content_type
+            })
+
+    request_item["request"]["header"].extend(auth_headers)
+    return request_item
+
+
+def iter_request_items(path, path_item, auth_headers=(), resolver=None):
+    """
+    Create the request items of all operations of one path item.
+    """
+    if resolver:
+        path_item = resolver.resolve(path_item)
+    for method in HTTP_METHODS:
+        if method in path_item:
+            yield build_request_item(path, method, path_item[method], auth_headers, resolver)
+
+
+def build_settings(servers, components, resolver):
+    """
+    Create the collection variables and the headers shared by all requests.
+
+    :param servers: The servers of the OpenAPI spec.
+    :type servers: List[dict]
+    :param components: The components of the OpenAPI spec.
+    :type components: dict
+    :param resolver: Resolver of the security schemes given as $ref.
+    :type resolver: RefResolver
+    :return: The variables and the auth headers, see build_auth.
+    :rtype: Tuple[List[dict], List[dict]]
+    """
+    variables = build_variables(servers)
+    auth_variables, auth_headers = build_auth(components.get("securitySchemes", {}), resolver)
+    variables.extend(auth_variables)
+    return variables, auth_headers
+
+
+def output_file_name(collection_name):
+    return f"{collection_name.replace(' ', '_').lower()}{COLLECTION_SUFFIX}"
+
+
+def build_collection(openapi_data, collection_name):
+    """
+    Create the Postman collection of an OpenAPI spec.
+
+    :param openapi_data: The OpenAPI spec.
+    :type openapi_data: dict
+    :param collection_name: Name of the collection.
+    :type collection_name: str
+    :return: The Postman collection.
+    :rtype: dict
+    """
+    # Add variables (global variables from OpenAPI servers and components) and handle Authentication
+    resolver = RefResolver(openapi_data)
+    variables, auth_headers = build_settings(openapi_data.get("servers", []), openapi_data.get("components", {}), resolver)
+
+    # Parse paths and create requests
+    items = []
+    for path, path_item in openapi_data.get("paths", {}).items():
+        items.extend(iter_request_items(path, path_item, auth_headers, resolver))
+
+    return {
+        "info": {
+            "name": collection_name,
+            "schema": COLLECTION_SCHEMA
+        },
+        "item": items,
+        "variable": variables,
+    }
+
+
+def create_postman_collection_from_openapi(openapi_file_path, collection_name):
+    try:
+        # Load and parse OpenAPI file
+        with open(openapi_file_path, "r") as file:
+            openapi_data = json.load(file)
+
+        postman_collection = build_collection(openapi_data, collection_name)
+
+        # Output Postman Collection JSON
+        output_file = output_file_name(collection_name)
+        with open(output_file, "w") as file:
+            json.dump(postman_collection, file, indent=2)
+
+        print(f"Postman Collection created: {output_file}")
+
+    except FileNotFoundError:
+        print("OpenAPI file not found.")
+    except Exception as e:
+        print("An error occurred:", e)
+
+
+def _indented(value, level):
+    """
+    Encode a value like json.dump(..., indent=2) does when the value is nested at the given level.
+    """
+    return json.dumps(value, indent=2).replace("\n", "\n" + "  " * level)
+
+
+def _items_text(request_items):
+    """
+    Encode request items as they appear in the "item" array of a collection written by CollectionWriter.
+    """
+    return ",\n    ".join(_indented(request_item, 2) for request_item in request_items)
+
+
+class CollectionWriter:
+    """
+    Writes a collection one request item at a time, in exactly the layout of json.dump(collection, indent=2).
+
+    The output is ASCII only, since json.dumps escapes everything else, so the position counts bytes as well as
+    characters; together with the SHA-256 of everything written it lets the batch mode find the text of the
+    items again in the next run.
+    """
+
+    def __init__(self, file, collection_name):
+        """
+        :param file: File opened in text mode.
+        :param collection_name: Name of the collection.
+        :type collection_name: str
+        """
+        self.file = file
+        self.position = 0
+        self.item_count = 0
+        self._sha256 = hashlib.sha256()
+        info = {"name": collection_name, "schema": COLLECTION_SCHEMA}
+        self._write(f'{{\n  "info": {_indented(info, 1)},\n  "item": [')
+
+    def _write(self, text):
+        self.file.write(text)
+        self.position += len(text)
+        self._sha256.update(text.encode("ascii"))
+
+    def write_items(self, text, count=1):
+        """
+        Add encoded request items, see _items_text.
+
+        :param text: The encoded items.
+        :type text: str
+        :param count: Number of items in text.
+        :type count: int
+        :return: Position of text in the file.
+        :rtype: int
+        """
+        if not text:
+            return self.position
+        self._write(f'{"," if self.item_count else ""}\n    ')
+        start = self.position
+        self._write(text)
+        self.item_count += count
+        return start
+
+    def close(self, variables):
+        """
+        Write the end of the collection.
+
+        :param variables: The collection variables.
+        :type variables: List[dict]
+        :return: SHA-256 of the collection.
+        :rtype: str
+        """
+        self._write(f'{chr(10) + "  " if self.item_count else ""}],\n  "variable": {_indented(variables, 1)}\n}}')
+        return self._sha256.hexdigest()
+
+
+def read_spec_header(openapi_file_path):
+    """
+    First pass of the streaming mode: read the servers and the components, skipping over the paths.
+
+    :return: The servers and the components.
+    :rtype: Tuple[List[dict], dict]
+    """
+    servers = []
+    components = {}
+    with open(openapi_file_path, "r") as file:
+        reader = JsonStreamReader(file)
+        for key in reader.iter_object():
+            if key == "servers":
+                servers = reader.read_value()
+            elif key == "components":
+                components = reader.read_value()
+    return servers, components
+
+
+def stream_postman_collection_from_openapi(openapi_file_path, collection_name):
+    """
+    Create the same collection as create_postman_collection_from_openapi without holding the spec or the
+    collection in memory.
+
+    The spec is read twice: the first pass collects the servers and the components, which may come after the
+    paths; the second decodes one path item at a time and writes its request items right away. Memory use
+    depends on the components and the largest path item, not on the size of the spec. The output is identical
+    to that of create_postman_collection_from_openapi, except that only references into the components can be
+    resolved.
+    """
+    try:
+        servers, components = read_spec_header(openapi_file_path)
+        resolver = RefResolver({"components": components})
+        variables, auth_headers = build_settings(servers, components, resolver)
+
+        output_file = output_file_name(collection_name)
+        with open(openapi_file_path, "r") as spec_file, open(output_file, "w") as file:
+            writer = CollectionWriter(file, collection_name)
+            reader = JsonStreamReader(spec_file)
+            for key in reader.iter_object():
+                if key != "paths":
+                    continue
+                for path in reader.iter_object():
+                    for request_item in iter_request_items(path, reader.read_value(), auth_headers, resolver):
+                        writer.write_items(_indented(request_item, 2))
+            writer.close(variables)
+
+        print(f"Postman Collection created: {output_file} ({writer.item_count} requests)")
+
+    except FileNotFoundError:
+        print("OpenAPI file not found.")
+    except Exception as e:
+        print("An error occurred:", e)
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def convert_spec(spec_path, output_path, collection_name, entry=None):
+    """
+    Convert one spec of a batch, reusing the request items of the path items that did not change since the
+    previous conversion.
+
+    The collection is written item by item with CollectionWriter. The manifest entry records where the text of
+    every path item's request items starts and ends in it, so the text of an unchanged path item is copied from
+    the previous collection as it is, without decoding or encoding it again.
+
+    Request items depend on their path item and on the components (references, security schemes), so when
+    the components changed too everything is rebuilt.
+
+    JSON files without an openapi or swagger key at the top level, e.g. a manifest of another batch, are not
+    converted: their entry only records the hash and why the file was skipped.
+
+    :param spec_path: Path of the OpenAPI spec.
+    :type spec_path: str
+    :param output_path: Path of the collection, also holding the request items of the previous conversion.
+    :type output_path: str
+    :param collection_name: Name of the collection.
+    :type collection_name: str
+    :param entry: Manifest entry of the previous conversion, if any.
+    :type entry: dict
+    :return: The new manifest entry, the number of path items rebuilt and the number reused.
+    :rtype: Tuple[dict, int, int]
+    """
+    with open(spec_path, "rb") as file:
+        content = file.read()
+
+    # Path items are hashed by their text in the spec, which is what the spec's hash covers too, instead of being
+    # encoded again
+    openapi_data = {}
+    path_item_texts = {}
+    reader = JsonStreamReader(io.StringIO(content.decode("utf-8")))
+    if reader.peek() == "{":
+        for key in reader.iter_object():
+            if key != "paths":
+                openapi_data[key] = reader.read_value()
+                continue
+            openapi_data["paths"] = {}
+            for path in reader.iter_object():
+                openapi_data["paths"][path], path_item_texts[path] = reader.read_value_text()
+    if "openapi" not in openapi_data and "swagger" not in openapi_data:
+        return {"hash": _digest(content), "skipped": "no openapi or swagger key, not an OpenAPI spec"}, 0, 0
+
+    components = openapi_data.get("components", {})
+    components_hash = _digest(json.dumps(components).encode())
+
+    # Position of the request items of the previous conversion by path, with the hash of the path item they were
+    # built from
+    previous = {}
+    previous_text = ""
+    if entry and entry["components_hash"] == components_hash and os.path.exists(output_path):
+        with open(output_path, "rb") as file:
+            previous_content = file.read()
+        # Unless the collection was modified since, then everything is rebuilt
+        if _digest(previous_content) == entry["output_hash"]:
+            previous_text = previous_content.decode("ascii")
+            previous = {path: (path_item_hash, start, end, count)
+                        for path, path_item_hash, start, end, count in entry["path_items"]}
+
+    resolver = RefResolver(openapi_data)
+    variables, auth_headers = build_settings(openapi_data.get("servers", []), components, resolver)
+    path_items = []
+    rebuilt = reused = 0
+
+    temporary_path = f"{output_path}.tmp"
+    with open(temporary_path, "w") as file:
+        writer = CollectionWriter(file, collection_name)
+        for path, path_item in openapi_data.get("paths", {}).items():
+            path_item_hash = _digest(path_item_texts[path].encode("utf-8"))
+            cached = previous.get(path)
+            if cached and cached[0] == path_item_hash:
+                text = previous_text[cached[1]:cached[2]]
+                count = cached[3]
+                reused += 1
+            else:
+                request_items = list(iter_request_items(path, path_item, auth_headers, resolver))
+                text = _items_text(request_items)
+                count = len(request_items)
+                rebuilt += 1
+            start = writer.write_items(text, count)
+            path_items.append([path, path_item_hash, start, start + len(text), count])
+        output_hash = writer.close(variables)
+    os.replace(temporary_path, output_path)
+
+    entry = {
+        "hash": _digest(content),
+        "output": output_path,
+        "output_hash": output_hash,
+        "components_hash": components_hash,
+        "path_items": path_items
+    }
+    return entry, rebuilt, reused
+
+
+def find_specs(patterns, exclude=()):
+    """
+    Expand directories (their *.json files) and glob patterns into a sorted list of spec paths.
+
+    Collections (*_postman_collection.json) and the files in exclude are left out, so a batch writing into one of
+    its spec directories does not convert its own output on the next run.
+    """
+    excluded = {os.path.abspath(path) for path in exclude}
+    spec_paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.json")
+        spec_paths.update(
+            os.path.normpath(path) for path in glob.glob(pattern, recursive=True)
+            if not path.endswith(COLLECTION_SUFFIX) and os.path.abspath(path) not in excluded
+        )
+    return sorted(spec_paths)
+
+
+def convert_specs(patterns, output_dir=".", manifest_path=None, workers=None, force=False):
+    """
+    Convert many specs on a process pool, each into the collection named after its file, e.g. orders.json into
+    orders_postman_collection.json.
+
+    A manifest in the output directory records the content hash of every spec and of each of its path items.
+    Specs that did not change are skipped, of the others only the changed path items are rebuilt. JSON files that
+    are not OpenAPI specs are recorded as skipped and only looked at again when they change.
+
+    :param patterns: Directories or glob patterns of OpenAPI specs in JSON format.
+    :type patterns: List[str]
+    :param output_dir: Directory of the collections.
+    :type output_dir: str
+    :param manifest_path: Path of the manifest (default: OUTPUT_DIR/postman_manifest.json).
+    :type manifest_path: str
+    :param workers: Number of worker processes, one per CPU by default. With 1 specs are converted in-process.
+    :type workers: int
+    :param force: Ignore the manifest and rebuild everything.
+    :type force: bool
+    :return: Number of specs that failed to convert.
+    :rtype: int
+    """
+    started = time.monotonic()
+    manifest_path = manifest_path or os.path.join(output_dir, "postman_manifest.json")
+    manifest = {"version": MANIFEST_VERSION, "specs": {}}
+    if not force and os.path.exists(manifest_path):
+        with open(manifest_path, "r") as file:
+            previous_manifest = json.load(file)
+        if previous_manifest.get("version") == MANIFEST_VERSION:
+            manifest = previous_manifest
+
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = []
+    outputs = {}
+    skipped = not_specs = 0
+    for spec_path in find_specs(patterns, exclude=(manifest_path, f"{manifest_path}.tmp")):
+        collection_name = os.path.splitext(os.path.basename(spec_path))[0]
+        output_path = os.path.join(output_dir, output_file_name(collection_name))
+        if output_path in outputs:
+            raise ValueError(f"{spec_path} and {outputs[output_path]} would both be written to {output_path}.")
+        outputs[output_path] = spec_path
+
+        entry = manifest["specs"].get(spec_path)
+        with open(spec_path, "rb") as file:
+            unchanged = entry and entry["hash"] == _digest(file.read())
+        if unchanged and "skipped" in entry:
+            not_specs += 1
+            continue
+        if unchanged and entry["output"] == output_path and os.path.exists(output_path):
+            skipped += 1
+            continue
+        jobs.append((spec_path, output_path, collection_name, entry if entry and "skipped" not in entry else None))
+
+    converted = failed = rebuilt = reused = 0
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(jobs) > 1 else _InProcess() as executor:
+        futures = {executor.submit(convert_spec, *job): job[0] for job in jobs}
+        for future in as_completed(futures):
+            spec_path = futures[future]
+            try:
+                entry, spec_rebuilt, spec_reused = future.result()
+            except Exception as e:
+                print(f"An error occurred converting {spec_path}: {e}")
+                # Retried on the next run
+                manifest["specs"].pop(spec_path, None)
+                failed += 1
+                continue
+            manifest["specs"][spec_path] = entry
+            if "skipped" in entry:
+                print(f"Skipped {spec_path}: {entry['skipped']}")
+                not_specs += 1
+                continue
+            converted += 1
+            rebuilt += spec_rebuilt
+            reused += spec_reused
+            print(f"Postman Collection created: {entry['output']} ({spec_rebuilt} path items rebuilt, "
+                  f"{spec_reused} reused)")
+
+    temporary_path = f"{manifest_path}.tmp"
+    with open(temporary_path, "w") as file:
+        # Encoded at once and not indented, which is the only way json uses its C encoder: with an entry per path
+        # item, json.dump would take longer than converting a few changed path items
+        file.write(json.dumps(manifest))
+    os.replace(temporary_path, manifest_path)
+
+    print(f"Converted {converted} specs, {skipped} unchanged, {not_specs} not OpenAPI specs, "
+          f"{failed} failed; {rebuilt} path items rebuilt, {reused} reused in {time.monotonic() - started:.1f}s.")
+    return failed
+
+
+class _InProcess:
+    """
+    Executor running submitted functions right away, for a single worker or a single job.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def submit(self, function, *args):
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Create a Postman collection from an OpenAPI spec in JSON format.")
+    parser.add_argument("openapi_file_path", nargs="?")
+    parser.add_argument("collection_name", nargs="?")
+    parser.add_argument("--stream", action="store_true",
+                        help="Parse the paths incrementally and write requests as they are created, for very large specs")
+    parser.add_argument("--batch", nargs="+", metavar="SPECS",
+                        help="Instead of one spec, convert the specs of these directories or glob patterns on a process pool, "
+                             "skipping the unchanged ones")
+    parser.add_argument("--output-dir", default=".", help="With --batch, directory of the collections (default: .)")
+    parser.add_argument("--manifest", help="With --batch, manifest of the converted specs (default: OUTPUT_DIR/postman_manifest.json)")
+    parser.add_argument("--workers", type=int, help="With --batch, number of worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="With --batch, ignore the manifest and convert all specs")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    if not args.batch and not args.collection_name:
+        parser.error("an OpenAPI file and a collection name are required unless --batch is given")
+
+    with instrumented(args):
+        if args.batch:
+            try:
+                failed = convert_specs(args.batch, args.output_dir, args.manifest, args.workers, args.force)
+            except Exception as e:
+                print("An error occurred:", e)
+                failed = 1
+            if failed:
+                sys.exit(1)
+        elif args.stream:
+            stream_postman_collection_from_openapi(args.openapi_file_path, args.collection_name)
+        else:
+            create_postman_collection_from_openapi(args.openapi_file_path, args.collection_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1053 @@
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from contextlib import ExitStack
+from functools import lru_cache
+from multiprocessing import Manager
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+
+from botocore.exceptions import ClientError
+
+from . import aws
+from .metrics import registry
+
+# BatchWriteItem accepts at most 25 put/delete requests per call
+MAX_BATCH_SIZE = 25
+
+THROTTLING_ERROR_CODES = ('ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded')
+
+# One DynamoDB resource per thread (and therefore per process). boto3 resources are not thread-safe,
+# so workers never share them.
+_local = threading.local()
+
+
+def _reset_resources():
+    global _local
+    # A forked worker process inherits the resources of the forking thread, it opens its own connections instead
+    _local = threading.local()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_resources)
+
+
+@lru_cache(maxsize=None)
+def _type_converters():
+    # Imported on first use like boto3 itself, see aws
+    from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+    return TypeSerializer(), TypeDeserializer()
+
+
+def table_config(table_name, aws_access_key, aws_secret_key, aws_session_token, endpoint_url=None):
+    """
+    Build a picklable description of a DynamoDB table and the credentials used to reach it.
+
+    :param table_name: Name of the DynamoDB table.
+    :type table_name: str
+    :param aws_access_key: AWS access key id.
+    :type aws_access_key: str
+    :param aws_secret_key: AWS secret access key.
+    :type aws_secret_key: str
+    :param aws_session_token: AWS session token.
+    :type aws_session_token: str
+    :param endpoint_url: Optional endpoint, e.g. DynamoDB Local (http://localhost:8000).
+    :type endpoint_url: str
+    :return: Table configuration.
+    :rtype: dict
+    """
+    return {
+        'table_name': table_name,
+        'aws_access_key': aws_access_key,
+        'aws_secret_key': aws_secret_key,
+        'aws_session_token': aws_session_token,
+        'endpoint_url': endpoint_url
+    }
+
+
+def open_table(config):
+    """
+    Return a Table resource for the given configuration, reusing the resource created by the current thread.
+
+    :param config: Table configuration created by table_config.
+    :type config: dict
+    :return: DynamoDB Table resource.
+    :rtype: boto3.resources.factory.dynamodb.Table
+    """
+    resources = getattr(_local, 'resources', None)
+    if resources is None:
+        resources = _local.resources = {}
+
+    resource_key = (config['aws_access_key'], config['aws_session_token'], config['endpoint_url'])
+    if resource_key not in resources:
+        resources[resource_key] = aws.resource(
+            'dynamodb', config['aws_access_key'], config['aws_secret_key'], config['aws_session_token'],
+            config['endpoint_url']
+        )
+    return resources[resource_key].Table(config['table_name'])
+
+
+def scan_pages(table, segment=0, total_segments=1, exclusive_start_key=None, governor=None):
+    """
+    Scan a table (or one segment of it) and yield the raw scan responses page by page.
+
+    :param table: DynamoDB Table resource.
+    :type table: boto3.resources.factory.dynamodb.Table
+    :param segment: Zero-based segment to scan.
+    :type segment: int
+    :param total_segments: Number of segments the table is split into. 1 means a plain sequential scan.
+    :type total_segments: int
+    :param exclusive_start_key: Key to continue the scan from.
+    :type exclusive_start_key: dict
+    :param governor: Optional read budget; pages are paced and sized to stay within it.
+    :type governor: CapacityGovernor
+    :return: Generator of scan responses.
+    :rtype: Iterator[dict]
+    """
+    scan_kwargs = {}
+    if total_segments > 1:
+        scan_kwargs['Segment'] = segment
+        scan_kwargs['TotalSegments'] = total_segments
+    if exclusive_start_key:
+        scan_kwargs['ExclusiveStartKey'] = exclusive_start_key
+    if governor is not None and governor.read_bucket is not None:
+        scan_kwargs['ReturnConsumedCapacity'] = 'TOTAL'
+
+    while True:
+        if governor is not None and governor.read_bucket is not None:
+            registry.observe('dynamodb_read_capacity_wait_seconds', governor.read_bucket.wait())
+            scan_kwargs['Limit'] = governor.page_limit()
+
+        with registry.timer('dynamodb_scan_page_seconds'):
+            response = table.scan(**scan_kwargs)
+        registry.increment('dynamodb_scanned_items_total', len(response.get('Items', [])))
+        if governor is not None:
+            governor.record_read(response)
+        yield response
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def serialize_item(item):
+    """
+    Convert an item (or key) with Python values into JSON-serializable typed DynamoDB JSON.
+    Binary values are base64 encoded.
+
+    :param item: Item as returned by the DynamoDB resource API.
+    :type item: dict
+    :return: Typed DynamoDB JSON, e.g. {"id": {"S": "123"}}.
+    :rtype: dict
+    """
+    serializer = _type_converters()[0]
+    return {name: _encode_binary(serializer.serialize(value)) for name, value in item.items()}
+
+
+def deserialize_item(data):
+    """
+    Convert typed DynamoDB JSON created by serialize_item back into an item with Python values.
+
+    :param data: Typed DynamoDB JSON.
+    :type data: dict
+    :return: Item usable with the DynamoDB resource API.
+    :rtype: dict
+    """
+    deserializer = _type_converters()[1]
+    return {name: deserializer.deserialize(_decode_binary(value)) for name, value in data.items()}
+
+
+def _encode_binary(value):
+    (type_name, content), = value.items()
+    if type_name == 'B':
+        return {'B': base64.b64encode(content).decode('ascii')}
+    if type_name == 'BS':
+        return {'BS': [base64.b64encode(element).decode('ascii') for element in content]}
+    if type_name == 'M':
+        return {'M': {name: _encode_binary(element) for name, element in content.items()}}
+    if type_name == 'L':
+        return {'L': [_encode_binary(element) for element in content]}
+    return value
+
+
+def _decode_binary(value):
+    (type_name, content), = value.items()
+    if type_name == 'B':
+        return {'B': base64.b64decode(content)}
+    if type_name == 'BS':
+        return {'BS': [base64.b64decode(element) for element in content]}
+    if type_name == 'M':
+        return {'M': {name: _decode_binary(element) for name, element in content.items()}}
+    if type_name == 'L':
+        return {'L': [_decode_binary(element) for element in content]}
+    return value
+
+
+def item_key(item, key_names):
+    """
+    Return a hashable, canonical representation of the primary key of an item.
+
+    :param item: Item as returned by the DynamoDB resource API.
+    :type item: dict
+    :param key_names: Names of the key attributes.
+    :type key_names: List[str]
+    :return: Typed DynamoDB JSON of the key as a string; deserialize_item(json.loads(key)) turns it back into a key.
+    :rtype: str
+    """
+    return json.dumps(serialize_item({name: item[name] for name in key_names}), sort_keys=True, separators=(',', ':'))
+
+
+def item_digest(item):
+    """
+    Return a content hash of an item that does not depend on attribute or set element order.
+
+    :param item: Item as returned by the DynamoDB resource API.
+    :type item: dict
+    :return: 16-byte BLAKE2b digest.
+    :rtype: bytes
+    """
+    typed_item = {name: _sort_sets(value) for name, value in serialize_item(item).items()}
+    canonical = json.dumps(typed_item, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).digest()
+
+
+def _sort_sets(value):
+    (type_name, content), = value.items()
+    if type_name in ('SS', 'NS', 'BS'):
+        return {type_name: sorted(content)}
+    if type_name == 'M':
+        return {'M': {name: _sort_sets(element) for name, element in content.items()}}
+    if type_name == 'L':
+        return {'L': [_sort_sets(element) for element in content]}
+    return value
+
+
+class Checkpoint:
+    """
+    JSON file recording, per scan segment, the ExclusiveStartKey to continue from and the number of copied items.
+
+    The file is rewritten atomically (temporary file + rename) after every page that has been fully written to
+    the destination, so a crashed copy can resume without re-reading or re-writing finished pages.
+    """
+
+    def __init__(self, path, lock=None):
+        """
+        :param path: Path of the checkpoint file.
+        :type path: str
+        :param lock: Lock serializing updates. Pass a multiprocessing.Manager lock when segments run in processes.
+        :type lock: threading.Lock
+        """
+        self.path = path
+        self._lock = lock if lock is not None else threading.Lock()
+
+    def start(self, source_table_name, destination_table_name, total_segments):
+        """
+        Create a fresh checkpoint, overwriting an existing one.
+        """
+        self._save({
+            'source_table': source_table_name,
+            'destination_table': destination_table_name,
+            'total_segments': total_segments,
+            'segments': {
+                str(segment): {'exclusive_start_key': None, 'items': 0, 'done': False}
+                for segment in range(total_segments)
+            }
+        })
+
+    def validate(self, source_table_name, destination_table_name, total_segments):
+        """
+        Check that an existing checkpoint belongs to the copy that is about to be resumed.
+
+        :raises ValueError: If the checkpoint is missing or was created for different tables or segments.
+        """
+        if not os.path.exists(self.path):
+            raise ValueError(f"Checkpoint file {self.path} does not exist.")
+
+        state = self._load()
+        expected = (source_table_name, destination_table_name, total_segments)
+        found = (state['source_table'], state['destination_table'], state['total_segments'])
+        if expected != found:
+            raise ValueError(f"Checkpoint {self.path} was created for {found[0]} -> {found[1]} with {found[2]} segments, "
+                             f"not {expected[0]} -> {expected[1]} with {expected[2]} segments.")
+
+    def segment_state(self, segment):
+        """
+        Return the saved state of a segment.
+
+        :param segment: Zero-based segment.
+        :type segment: int
+        :return: Dictionary with 'exclusive_start_key' (resource API key or None), 'items' and 'done'.
+        :rtype: dict
+        """
+        state = dict(self._load()['segments'][str(segment)])
+        if state['exclusive_start_key']:
+            state['exclusive_start_key'] = deserialize_item(state['exclusive_start_key'])
+        return state
+
+    def record_page(self, segment, last_evaluated_key, items):
+        """
+        Record a page whose items have been written to the destination.
+
+        :param segment: Zero-based segment.
+        :type segment: int
+        :param last_evaluated_key: LastEvaluatedKey of the page, None for the last page of the segment.
+        :type last_evaluated_key: dict
+        :param items: Number of items of the page.
+        :type items: int
+        """
+        with self._lock:
+            state = self._load()
+            segment_state = state['segments'][str(segment)]
+            segment_state['items'] += items
+            segment_state['exclusive_start_key'] = serialize_item(last_evaluated_key) if last_evaluated_key else None
+            segment_state['done'] = last_evaluated_key is None
+            self._save(state)
+
+    def _load(self):
+        with open(self.path, 'r') as file:
+            return json.load(file)
+
+    def _save(self, state):
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, 'w') as file:
+            json.dump(state, file, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+
+
+def backoff_delay(attempt, base_delay=0.05, max_delay=5.0):
+    """
+    Return a jittered exponential backoff delay ("full jitter") for the given retry attempt.
+
+    :param attempt: One-based retry attempt.
+    :type attempt: int
+    :param base_delay: Delay of the first attempt in seconds.
+    :type base_delay: float
+    :param max_delay: Upper bound of the delay in seconds.
+    :type max_delay: float
+    :return: Delay in seconds.
+    :rtype: float
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at a fixed rate of capacity units per second.
+
+    Consumption is recorded after the fact (DynamoDB reports consumed capacity in the response), so the bucket
+    can go into debt; wait() then blocks until the debt has been paid back.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        :param rate: Capacity units added per second.
+        :type rate: float
+        :param burst: Maximum number of stored units. Defaults to one second worth of units.
+        :type burst: float
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        Block until at least one unit is available.
+
+        :return: Number of seconds spent waiting.
+        :rtype: float
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens > 0:
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def consume(self, units):
+        with self._lock:
+            self._refill()
+            self._tokens -= units
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def __getstate__(self):
+        # Locks cannot be pickled; a bucket sent to a worker process gets its own
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class CapacityGovernor:
+    """
+    Read and write capacity budget shared by all workers of a copy.
+
+    Reads are paced by a token bucket fed with the scan's ConsumedCapacity and the scan Limit is sized so one page
+    uses about one second of a worker's share of the budget. Writes are paced by a second bucket; BatchWriter
+    lowers its concurrency whenever it has to wait for that bucket.
+    """
+
+    def __init__(self, read_capacity=None, write_capacity=None, workers=1):
+        """
+        :param read_capacity: Read capacity units per second to stay within, None for unlimited.
+        :type read_capacity: float
+        :param write_capacity: Write capacity units per second to stay within, None for unlimited.
+        :type write_capacity: float
+        :param workers: Number of segments scanning concurrently with this governor.
+        :type workers: int
+        """
+        self.read_bucket = TokenBucket(read_capacity) if read_capacity else None
+        self.write_bucket = TokenBucket(write_capacity) if write_capacity else None
+        self.workers = workers
+        # Estimated number of items read per consumed read capacity unit
+        self._items_per_unit = None
+
+    def split(self, workers):
+        """
+        Return a governor with 1/workers of this budget, for a worker that cannot share this one (another process).
+
+        :param workers: Number of workers the budget is split between.
+        :type workers: int
+        :return: Governor for one worker.
+        :rtype: CapacityGovernor
+        """
+        return CapacityGovernor(
+            self.read_bucket.rate / workers if self.read_bucket else None,
+            self.write_bucket.rate / workers if self.write_bucket else None
+        )
+
+    def page_limit(self):
+        """
+        Return the scan Limit for the next page of one worker.
+
+        :return: Number of items to request.
+        :rtype: int
+        """
+        page_units = self.read_bucket.rate / self.workers
+        # Until the first page has been measured assume one item per capacity unit (items of up to 8 KB)
+        items_per_unit = self._items_per_unit or 1.0
+        return max(1, int(page_units * items_per_unit))
+
+    def record_read(self, response):
+        consumed = response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+        if self.read_bucket is not None and consumed:
+            self.read_bucket.consume(consumed)
+            items_per_unit = response.get('Count', len(response.get('Items', []))) / consumed
+            # Smooth the estimate so one page of unusually large items does not swing the page size
+            if self._items_per_unit is None:
+                self._items_per_unit = items_per_unit
+            else:
+                self._items_per_unit = 0.7 * self._items_per_unit + 0.3 * items_per_unit
+
+    def record_write(self, response):
+        if self.write_bucket is not None:
+            consumed = sum(capacity.get('CapacityUnits', 0) for capacity in response.get('ConsumedCapacity', []))
+            self.write_bucket.consume(consumed)
+
+
+def capacity_budget(table, capacity=None, capacity_percent=None, capacity_type='ReadCapacityUnits'):
+    """
+    Resolve the capacity budget of a table from an absolute value or a percentage of its provisioned capacity.
+
+    :param table: DynamoDB Table resource.
+    :type table: boto3.resources.factory.dynamodb.Table
+    :param capacity: Absolute capacity units per second. Takes precedence over capacity_percent.
+    :type capacity: float
+    :param capacity_percent: Percentage of the provisioned capacity.
+    :type capacity_percent: float
+    :param capacity_type: 'ReadCapacityUnits' or 'WriteCapacityUnits'.
+    :type capacity_type: str
+    :return: Capacity units per second, None for unlimited.
+    :rtype: float
+    :raises ValueError: If a percentage is requested for an on-demand table.
+    """
+    if capacity:
+        return capacity
+    if not capacity_percent:
+        return None
+
+    provisioned = (table.provisioned_throughput or {}).get(capacity_type, 0)
+    if not provisioned:
+        raise ValueError(f"Table {table.name} uses on-demand capacity, "
+                         f"pass an absolute capacity instead of a percentage.")
+    return provisioned * capacity_percent / 100
+
+
+def capacity_governor(source_config, destination_config, read_capacity=None, write_capacity=None,
+                      capacity_percent=None):
+    """
+    Create the governor limiting the reads of the source table and the writes of the destination table.
+
+    :param source_config: Source table configuration.
+    :type source_config: dict
+    :param destination_config: Destination table configuration.
+    :type destination_config: dict
+    :param read_capacity: Read capacity units per second on the source table.
+    :type read_capacity: float
+    :param write_capacity: Write capacity units per second on the destination table.
+    :type write_capacity: float
+    :param capacity_percent: Percentage of the provisioned capacity, for the limits not given explicitly.
+    :type capacity_percent: float
+    :return: The governor, None without any limit.
+    :rtype: CapacityGovernor
+    """
+    if not (read_capacity or write_capacity or capacity_percent):
+        return None
+    return CapacityGovernor(
+        capacity_budget(open_table(source_config), read_capacity, capacity_percent, 'ReadCapacityUnits'),
+        capacity_budget(open_table(destination_config), write_capacity, capacity_percent, 'WriteCapacityUnits')
+    )
+
+
+class WriteStats:
+    """
+    Thread-safe throughput counters of a BatchWriter.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.items = 0
+        self.batches = 0
+        self.retries = 0
+        self.throttles = 0
+
+    def record(self, items=0, batches=0, retries=0, throttles=0):
+        with self._lock:
+            self.items += items
+            self.batches += batches
+            self.retries += retries
+            self.throttles += throttles
+        for name, value in (('items', items), ('batches', batches), ('retries', retries), ('throttles', throttles)):
+            if value:
+                registry.increment(f'dynamodb_write_{name}_total', value)
+
+    def as_dict(self):
+        """
+        Return a picklable snapshot of the counters.
+
+        :return: Counters including elapsed seconds and items per second.
+        :rtype: dict
+        """
+        with self._lock:
+            seconds = time.monotonic() - self.started
+            return {
+                'items': self.items,
+                'batches': self.batches,
+                'retries': self.retries,
+                'throttles': self.throttles,
+                'seconds': seconds,
+                'items_per_second': self.items / seconds if seconds > 0 else 0.0
+            }
+
+
+def merge_write_stats(snapshots, seconds):
+    """
+    Combine WriteStats snapshots of several writers that ran concurrently.
+
+    :param snapshots: Snapshots returned by WriteStats.as_dict.
+    :type snapshots: Iterable[dict]
+    :param seconds: Wall-clock duration of the whole run.
+    :type seconds: float
+    :return: Combined snapshot.
+    :rtype: dict
+    """
+    merged = {'items': 0, 'batches': 0, 'retries': 0, 'throttles': 0}
+    for snapshot in snapshots:
+        for counter in merged:
+            merged[counter] += snapshot[counter]
+    merged['seconds'] = seconds
+    merged['items_per_second'] = merged['items'] / seconds if seconds > 0 else 0.0
+    return merged
+
+
+def format_write_stats(stats):
+    """
+    Format a WriteStats snapshot for printing.
+
+    :param stats: Snapshot returned by WriteStats.as_dict or merge_write_stats.
+    :type stats: dict
+    :return: Human readable summary.
+    :rtype: str
+    """
+    return (f"{stats['items']} items in {stats['batches']} batches, {stats['seconds']:.1f}s "
+            f"({stats['items_per_second']:.0f} items/s), {stats['retries']} retries, {stats['throttles']} throttles")
+
+
+class BatchWriter:
+    """
+    Groups items into 25-item BatchWriteItem calls and runs several batches concurrently.
+
+    Unprocessed items and throttled calls are resubmitted with jittered exponential backoff.
+    The number of batches in flight adapts between 1 and max_concurrency: it is halved on throttling,
+    lowered while the governor's write budget is exhausted, and raised again after unimpeded batches.
+    Call flush() to wait for everything written so far, or use the writer as a context manager.
+    """
+
+    def __init__(self, table, max_concurrency=4, max_retries=10, governor=None):
+        """
+        :param table: Destination DynamoDB Table resource.
+        :type table: boto3.resources.factory.dynamodb.Table
+        :param max_concurrency: Number of BatchWriteItem calls in flight at the same time.
+        :type max_concurrency: int
+        :param max_retries: Number of retries of a batch before giving up.
+        :type max_retries: int
+        :param governor: Optional write budget to stay within.
+        :type governor: CapacityGovernor
+        """
+        # The resource client serializes plain Python values, just like Table.put_item
+        self._client = table.meta.client
+        self._table_name = table.name
+        self._max_concurrency = max_concurrency
+        self._max_retries = max_retries
+        self._governor = governor
+        self._concurrency = max_concurrency
+        self._in_flight = 0
+        self._slot_available = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._buffer = []
+        self._pending = set()
+        self.stats = WriteStats()
+
+    def put(self, item):
+        self._buffer.append({'PutRequest': {'Item': item}})
+        if len(self._buffer) >= MAX_BATCH_SIZE:
+            self._submit()
+
+    def delete(self, key):
+        self._buffer.append({'DeleteRequest': {'Key': key}})
+        if len(self._buffer) >= MAX_BATCH_SIZE:
+            self._submit()
+
+    def write_items(self, items):
+        for item in items:
+            self.put(item)
+
+    def flush(self):
+        """
+        Submit the partially filled batch and wait until all submitted batches are written.
+        """
+        if self._buffer:
+            self._submit()
+        while self._pending:
+            self._wait(return_when=ALL_COMPLETED)
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(cancel_futures=True)
+
+    def _submit(self):
+        # Bound the number of queued batches so a fast scan cannot buffer the whole table in memory
+        while len(self._pending) >= self._max_concurrency * 2:
+            self._wait(return_when=FIRST_COMPLETED)
+        requests, self._buffer = self._buffer, []
+        self._pending.add(self._executor.submit(self._write_batch, requests))
+
+    def _wait(self, return_when):
+        done, self._pending = wait(self._pending, return_when=return_when)
+        for future in done:
+            future.result()
+
+    def _write_batch(self, requests):
+        attempt = 0
+        self.stats.record(batches=1)
+        while requests:
+            self._acquire_slot()
+            throttled = False
+            waited = 0.0
+            try:
+                write_kwargs = {'RequestItems': {self._table_name: requests}}
+                if self._governor is not None and self._governor.write_bucket is not None:
+                    waited = self._governor.write_bucket.wait()
+                    registry.observe('dynamodb_write_capacity_wait_seconds', waited)
+                    write_kwargs['ReturnConsumedCapacity'] = 'TOTAL'
+                with registry.timer('dynamodb_batch_write_seconds'):
+                    response = self._client.batch_write_item(**write_kwargs)
+            except ClientError as e:
+                if e.response['Error']['Code'] not in THROTTLING_ERROR_CODES:
+                    raise
+                self.stats.record(throttles=1)
+                throttled = True
+                unprocessed = requests
+            else:
+                if self._governor is not None:
+                    self._governor.record_write(response)
+                unprocessed = response.get('UnprocessedItems', {}).get(self._table_name, [])
+                throttled = bool(unprocessed)
+                self.stats.record(items=len(requests) - len(unprocessed))
+            finally:
+                self._release_slot(throttled, waited)
+
+            if unprocessed:
+                attempt += 1
+                if attempt > self._max_retries:
+                    raise RuntimeError(f"Giving up on {len(unprocessed)} unprocessed items for {self._table_name} "
+                                       f"after {self._max_retries} retries.")
+                self.stats.record(retries=1)
+                time.sleep(backoff_delay(attempt))
+            requests = unprocessed
+
+    def _acquire_slot(self):
+        with self._slot_available:
+            while self._in_flight >= self._concurrency:
+                self._slot_available.wait()
+            self._in_flight += 1
+
+    def _release_slot(self, throttled, waited):
+        with self._slot_available:
+            self._in_flight -= 1
+            if throttled:
+                self._concurrency = max(1, self._concurrency // 2)
+            elif waited:
+                self._concurrency = max(1, self._concurrency - 1)
+            else:
+                self._concurrency = min(self._max_concurrency, self._concurrency + 1)
+            registry.set_gauge('dynamodb_write_concurrency', self._concurrency)
+            self._slot_available.notify_all()
+
+
+def copy_segment(source_config, destination_config, segment=0, total_segments=1, write_concurrency=4,
+                 checkpoint=None, governor=None):
+    """
+    Copy all items of one scan segment from the source table to the destination table.
+
+    :param source_config: Source table configuration.
+    :type source_config: dict
+    :param destination_config: Destination table configuration.
+    :type destination_config: dict
+    :param segment: Zero-based segment to copy.
+    :type segment: int
+    :param total_segments: Number of segments the table is split into.
+    :type total_segments: int
+    :param write_concurrency: Number of concurrent BatchWriteItem calls.
+    :type write_concurrency: int
+    :param checkpoint: Checkpoint to resume from and to record committed pages in.
+    :type checkpoint: Checkpoint
+    :param governor: Optional read/write capacity budget.
+    :type governor: CapacityGovernor
+    :return: WriteStats snapshot of the segment.
+    :rtype: dict
+    """
+    exclusive_start_key = None
+    if checkpoint is not None:
+        state = checkpoint.segment_state(segment)
+        if state['done']:
+            print(f"Segment {segment + 1}/{total_segments}: already copied ({state['items']} items), skipping.")
+            return WriteStats().as_dict()
+        exclusive_start_key = state['exclusive_start_key']
+        if exclusive_start_key:
+            print(f"Segment {segment + 1}/{total_segments}: resuming after {state['items']} items.")
+
+    source_table = open_table(source_config)
+    destination_table = open_table(destination_config)
+
+    with BatchWriter(destination_table, write_concurrency, governor=governor) as writer:
+        scanned = 0
+        for response in scan_pages(source_table, segment, total_segments, exclusive_start_key, governor):
+            items = response.get('Items', [])
+            writer.write_items(items)
+
+            if checkpoint is not None:
+                # A page is committed only once all of its batches are written
+                writer.flush()
+                checkpoint.record_page(segment, response.get('LastEvaluatedKey'), len(items))
+
+            scanned += len(items)
+            print(f"Segment {segment + 1}/{total_segments}: read {len(items)} items ({scanned} total) "
+                  f"from {source_config['table_name']} for {destination_config['table_name']}.")
+
+    return writer.stats.as_dict()
+
+
+def parallel_copy(source_config, destination_config, total_segments, max_workers=None, use_processes=False,
+                  write_concurrency=4, checkpoint=None, governor=None):
+    """
+    Copy a table using a parallel scan, one task per segment.
+
+    :param source_config: Source table configuration.
+    :type source_config: dict
+    :param destination_config: Destination table configuration.
+    :type destination_config: dict
+    :param total_segments: Number of scan segments.
+    :type total_segments: int
+    :param max_workers: Size of the worker pool. Defaults to one worker per segment.
+    :type max_workers: int
+    :param use_processes: Run segments in a process pool instead of a thread pool.
+    :type use_processes: bool
+    :param write_concurrency: Number of concurrent BatchWriteItem calls per segment.
+    :type write_concurrency: int
+    :param checkpoint: Checkpoint to resume from and to record committed pages in.
+    :type checkpoint: Checkpoint
+    :param governor: Optional read/write capacity budget shared by all segments.
+    :type governor: CapacityGovernor
+    :return: Combined WriteStats snapshot of all segments.
+    :rtype: dict
+    """
+    started = time.monotonic()
+    workers = min(max_workers or total_segments, total_segments)
+    if governor is not None:
+        if use_processes:
+            # Worker processes cannot share the buckets, so each one gets an equal share of the budget
+            governor = governor.split(workers)
+        else:
+            governor.workers = workers
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with ExitStack() as stack:
+        if use_processes and checkpoint is not None:
+            # Worker processes serialize their checkpoint updates through a lock owned by a manager process
+            manager = stack.enter_context(Manager())
+            checkpoint = Checkpoint(checkpoint.path, manager.Lock())
+
+        executor = stack.enter_context(executor_class(max_workers=workers))
+        futures = {
+            executor.submit(
+                copy_segment, source_config, destination_config, segment, total_segments, write_concurrency,
+                checkpoint, governor
+            ): segment
+            for segment in range(total_segments)
+        }
+
+        snapshots = []
+        for future in as_completed(futures):
+            snapshot = future.result()
+            snapshots.append(snapshot)
+            print(f"Segment {futures[future] + 1}/{total_segments} finished: {format_write_stats(snapshot)}.")
+
+    return merge_write_stats(snapshots, time.monotonic() - started)
+
+
+def copy_table(source_config, destination_config, total_segments=1, max_workers=None, use_processes=False,
+               write_concurrency=4, checkpoint_path=None, resume=False, read_capacity=None, write_capacity=None,
+               capacity_percent=None, use_async=False, max_in_flight=32):
+    """
+    Copy a table with the engine chosen by the options of the copy scripts: the asyncio engine, a parallel scan, or
+    a sequential scan, optionally checkpointed and within a capacity budget.
+
+    :param source_config: Source table configuration.
+    :type source_config: dict
+    :param destination_config: Destination table configuration.
+    :type destination_config: dict
+    :param total_segments: Number of scan segments.
+    :type total_segments: int
+    :param max_workers: Size of the worker pool. Defaults to one worker per segment.
+    :type max_workers: int
+    :param use_processes: Run segments in a process pool instead of a thread pool.
+    :type use_processes: bool
+    :param write_concurrency: Number of concurrent BatchWriteItem calls per segment.
+    :type write_concurrency: int
+    :param checkpoint_path: Checkpoint file recording the progress of every segment.
+    :type checkpoint_path: str
+    :param resume: Continue the copy recorded in the checkpoint file instead of starting over.
+    :type resume: bool
+    :param read_capacity: Read capacity units per second on the source table.
+    :type read_capacity: float
+    :param write_capacity: Write capacity units per second on the destination table.
+    :type write_capacity: float
+    :param capacity_percent: Percentage of the provisioned capacity, for the limits not given explicitly.
+    :type capacity_percent: float
+    :param use_async: Use the asyncio engine, which supports neither checkpoints nor capacity limits.
+    :type use_async: bool
+    :param max_in_flight: With use_async, maximum number of concurrent requests.
+    :type max_in_flight: int
+    :return: WriteStats snapshot.
+    :rtype: dict
+    """
+    # Record progress after every written page so an interrupted copy can be resumed
+    checkpoint = None
+    if checkpoint_path:
+        checkpoint = Checkpoint(checkpoint_path)
+        if resume:
+            checkpoint.validate(source_config['table_name'], destination_config['table_name'], total_segments)
+        else:
+            checkpoint.start(source_config['table_name'], destination_config['table_name'], total_segments)
+
+    # Limit reads and writes to a fraction of the tables' capacity so live traffic is not throttled
+    governor = capacity_governor(source_config, destination_config, read_capacity, write_capacity, capacity_percent)
+
+    # Scan the source table (in parallel segments if requested) and copy items to the destination table
+    if use_async:
+        # Imported here, only the asyncio engine needs them
+        import asyncio
+
+        from .async_copy import async_copy_dynamodb_table
+
+        return asyncio.run(async_copy_dynamodb_table(source_config, destination_config, total_segments, max_in_flight))
+    if total_segments > 1:
+        return parallel_copy(
+            source_config, destination_config, total_segments, max_workers, use_processes, write_concurrency,
+            checkpoint, governor
+        )
+    return copy_segment(source_config, destination_config, write_concurrency=write_concurrency, checkpoint=checkpoint,
+                        governor=governor)
+
+
+def digest_segment(config, segment=0, total_segments=1, governor=None):
+    """
+    Read one scan segment and return the content hash of every item by primary key.
+
+    :param config: Table configuration.
+    :type config: dict
+    :param segment: Zero-based segment to read.
+    :type segment: int
+    :param total_segments: Number of segments the table is split into.
+    :type total_segments: int
+    :param governor: Optional read capacity budget.
+    :type governor: CapacityGovernor
+    :return: Item digests keyed by item_key.
+    :rtype: dict
+    """
+    table = open_table(config)
+    key_names = [key['AttributeName'] for key in table.key_schema]
+
+    digests = {}
+    for response in scan_pages(table, segment, total_segments, governor=governor):
+        for item in response.get('Items', []):
+            digests[item_key(item, key_names)] = item_digest(item)
+    return digests
+
+
+def sync_segment(source_config, destination_config, destination_digests, segment=0, total_segments=1,
+                 write_concurrency=4, dry_run=False, governor=None):
+    """
+    Compare one source scan segment against the destination digests and write only new or changed items.
+
+    Every source key found in destination_digests is removed from it, so once all segments have run the keys left
+    over are the destination items that no longer exist in the source.
+
+    :param source_config: Source table configuration.
+    :type source_config: dict
+    :param destination_config: Destination table configuration.
+    :type destination_config: dict
+    :param destination_digests: Digests of the destination table as returned by digest_segment, shared by all segments.
+    :type destination_digests: dict
+    :param segment: Zero-based segment to sync.
+    :type segment: int
+    :param total_segments: Number of segments the table is split into.
+    :type total_segments: int
+    :param write_concurrency: Number of concurrent BatchWriteItem calls.
+    :type write_concurrency: int
+    :param dry_run: Only compare, do not write anything.
+    :type dry_run: bool
+    :param governor: Optional read/write capacity budget.
+    :type governor: CapacityGovernor
+    :return: Keys of new and changed items and the number of unchanged items.
+    :rtype: dict
+    """
+    source_table = open_table(source_config)
+    key_names = [key['AttributeName'] for key in source_table.key_schema]
+    result = {'new': [], 'changed': [], 'unchanged': 0}
+
+    with BatchWriter(open_table(destination_config), write_concurrency, governor=governor) as writer:
+        for response in scan_pages(source_table, segment, total_segments, governor=governor):
+            for item in response.get('Items', []):
+                key = item_key(item, key_names)
+                destination_digest = destination_digests.pop(key, None)
+                if destination_digest is None:
+                    result['new'].append(key)
+                elif destination_digest != item_digest(item):
+                    result['changed'].append(key)
+                else:
+                    result['unchanged'] += 1
+                    continue
+
+                if not dry_run:
+                    writer.put(item)
+
+    return result
+
+
+def delta_sync(source_config, destination_config, total_segments=1, max_workers=None, write_concurrency=4,
+               delete_orphans=False, dry_run=False, governor=None, destination_governor=None):
+    """
+    Bring the destination table in line with the source table by writing only new or changed items.
+
+    Both tables are read with a parallel scan in a thread pool: first the destination, keeping a 16-byte digest per
+    item, then the source, comparing every item against those digests. Writes are proportional to the number of
+    differences rather than the table size.
+
+    The digests of the whole destination table are held in one dict, keyed by the item's serialized primary key.
+    That takes roughly 200 bytes per destination item, about 2 GB per 10 million items, so very large tables need a
+    host with that much memory.
+
+    :param source_config: Source table configuration.
+    :type source_config: dict
+    :param destination_config: Destination table configuration.
+    :type destination_config: dict
+    :param total_segments: Number of scan segments per table.
+    :type total_segments: int
+    :param max_workers: Size of the thread pool. Defaults to one worker per segment.
+    :type max_workers: int
+    :param write_concurrency: Number of concurrent BatchWriteItem calls per segment.
+    :type write_concurrency: int
+    :param delete_orphans: Delete destination items that do not exist in the source.
+    :type delete_orphans: bool
+    :param dry_run: Only report the differences, do not write anything.
+    :type dry_run: bool
+    :param governor: Optional read/write capacity budget shared by all segments.
+    :type governor: CapacityGovernor
+    :param destination_governor: Optional read capacity budget of the destination scan, governor by default.
+    :type destination_governor: CapacityGovernor
+    :return: Keys of new, changed and orphaned items and the number of unchanged items.
+    :rtype: dict
+    """
+    workers = min(max_workers or total_segments, total_segments)
+    destination_governor = destination_governor or governor
+    for shared_governor in (governor, destination_governor):
+        if shared_governor is not None:
+            shared_governor.workers = workers
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        destination_digests = {}
+        for digests in executor.map(
+            lambda segment: digest_segment(destination_config, segment, total_segments, destination_governor),
+            range(total_segments)
+        ):
+            destination_digests.update(digests)
+        print(f"Read {len(destination_digests)} items from {destination_config['table_name']}.")
+
+        report = {'new': [], 'changed': [], 'unchanged': 0}
+        for result in executor.map(
+            lambda segment: sync_segment(source_config, destination_config, destination_digests, segment,
+                                         total_segments, write_concurrency, dry_run, governor),
+            range(total_segments)
+        ):
+            report['new'].extend(result['new'])
+            report['changed'].extend(result['changed'])
+            report['unchanged'] += result['unchanged']
+
+    report['orphaned'] = list(destination_digests)
+    if delete_orphans and not dry_run:
+        with BatchWriter(open_table(destination_config), write_concurrency, governor=governor) as writer:
+            for key in report['orphaned']:
+                writer.delete(deserialize_item(json.loads(key)))
+
+    return report
@@ -0,0 +1,309 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from botocore.exceptions import NoCredentialsError, PartialCredentialsError
+
+from .aws import add_credential_arguments, check_credential_arguments
+from .dynamodb_utils import (
+    BatchWriter, CapacityGovernor, capacity_budget, deserialize_item, format_write_stats, merge_write_stats, open_table,
+    scan_pages, serialize_item, table_config
+)
+from .metrics import add_arguments, instrumented
+
+EXPORT_FILE_SUFFIX = '.ndjson.gz'
+# Written next to the files once an export is complete, listing them, named after the exported table
+EXPORT_MANIFEST_SUFFIX = '.manifest.json'
+
+
+def export_segment(source_config, directory, segment=0, total_segments=1, chunk_items=100000, governor=None):
+    """
+    Stream one scan segment into gzip compressed newline-delimited files of typed DynamoDB JSON.
+
+    Only the current scan page is held in memory. A chunk is written under a temporary name and renamed once it is
+    complete, so an interrupted export never leaves a truncated file that looks finished.
+
+    :param source_config: Source table configuration.
+    :type source_config: dict
+    :param directory: Directory to write the chunk files to.
+    :type directory: str
+    :param segment: Zero-based segment to export.
+    :type segment: int
+    :param total_segments: Number of segments the table is split into.
+    :type total_segments: int
+    :param chunk_items: Maximum number of items per file.
+    :type chunk_items: int
+    :param governor: Optional read capacity budget.
+    :type governor: CapacityGovernor
+    :return: Number of exported items and the paths of the files written.
+    :rtype: Tuple[int, List[str]]
+    """
+    source_table = open_table(source_config)
+    prefix = os.path.join(directory, f"{source_config['table_name']}-{segment:05d}")
+
+    exported = 0
+    chunk = 0
+    chunk_paths = []
+    chunk_path = None
+    file = None
+    try:
+        for response in scan_pages(source_table, segment, total_segments, governor=governor):
+            for item in response.get('Items', []):
+                if file is None:
+                    chunk_path = f"{prefix}-{chunk:05d}{EXPORT_FILE_SUFFIX}"
+                    file = gzip.open(f"{chunk_path}.tmp", 'wt', encoding='utf-8')
+
+                file.write(json.dumps(serialize_item(item), separators=(',', ':')))
+                file.write('\n')
+                exported += 1
+
+                if exported % chunk_items == 0:
+                    file.close()
+                    file = None
+                    os.replace(f"{chunk_path}.tmp", chunk_path)
+                    chunk_paths.append(chunk_path)
+                    chunk += 1
+
+            print(f"Segment {segment + 1}/{total_segments}: exported {exported} items "
+                  f"from {source_config['table_name']}.")
+    finally:
+        if file is not None:
+            file.close()
+
+    if file is not None:
+        os.replace(f"{chunk_path}.tmp", chunk_path)
+        chunk_paths.append(chunk_path)
+    return exported, chunk_paths
+
+
+def write_export_manifest(directory, table_name, exported, paths):
+    """
+    Record the files of a complete export, import reads only the files listed. Stale files of an earlier export of
+    the same table and the files of other tables in the directory are left out.
+
+    :param directory: Directory of the export.
+    :type directory: str
+    :param table_name: Name of the exported table.
+    :type table_name: str
+    :param exported: Number of exported items.
+    :type exported: int
+    :param paths: Files written by export_segment.
+    :type paths: List[str]
+    """
+    manifest_path = os.path.join(directory, f"{table_name}{EXPORT_MANIFEST_SUFFIX}")
+    with open(f"{manifest_path}.tmp", 'w') as file:
+        json.dump({'table': table_name, 'items': exported, 'files': sorted(os.path.basename(path) for path in paths)},
+                  file, indent=2)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+
+def find_export_files(directory, source_table_name=None):
+    """
+    Return the files listed by the export manifest of a table.
+
+    :param directory: Directory of the export.
+    :type directory: str
+    :param source_table_name: Exported table, may be omitted when the directory holds a single export.
+    :type source_table_name: str
+    :return: Paths of the export files.
+    :rtype: List[str]
+    """
+    manifests = sorted(glob.glob(os.path.join(directory, f"*{EXPORT_MANIFEST_SUFFIX}")))
+    if source_table_name is not None:
+        manifests = [
+            path for path in manifests if os.path.basename(path) == f"{source_table_name}{EXPORT_MANIFEST_SUFFIX}"
+        ]
+    if not manifests:
+        raise ValueError(f"No complete export{f' of {source_table_name}' if source_table_name else ''} "
+                         f"found in {directory}.")
+    if len(manifests) > 1:
+        tables = ', '.join(os.path.basename(path)[:-len(EXPORT_MANIFEST_SUFFIX)] for path in manifests)
+        raise ValueError(f"{directory} holds exports of several tables ({tables}), choose one with --source-table.")
+
+    with open(manifests[0]) as file:
+        names = json.load(file)['files']
+    paths = [os.path.join(directory, name) for name in names]
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise ValueError(f"Export files listed in {manifests[0]} are missing: {', '.join(missing)}")
+    return paths
+
+
+def read_export_files(paths):
+    """
+    Lazily read items from export files, one line at a time.
+
+    :param paths: Export files created by export_segment.
+    :type paths: Iterable[str]
+    :return: Generator of items usable with the DynamoDB resource API.
+    :rtype: Iterator[dict]
+    """
+    for path in paths:
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    yield deserialize_item(json.loads(line))
+
+
+def import_files(destination_config, paths, write_concurrency=4, governor=None):
+    """
+    Write the items of export files to a table through a BatchWriter.
+
+    :param destination_config: Destination table configuration.
+    :type destination_config: dict
+    :param paths: Export files created by export_segment.
+    :type paths: List[str]
+    :param write_concurrency: Number of concurrent BatchWriteItem calls.
+    :type write_concurrency: int
+    :param governor: Optional write capacity budget.
+    :type governor: CapacityGovernor
+    :return: WriteStats snapshot.
+    :rtype: dict
+    """
+    with BatchWriter(open_table(destination_config), write_concurrency, governor=governor) as writer:
+        writer.write_items(read_export_files(paths))
+    return writer.stats.as_dict()
+
+
+def export_dynamodb_table(source_table_name, directory, aws_access_key, aws_secret_key, aws_session_token,
+                          total_segments=1, max_workers=None, use_processes=False, chunk_items=100000,
+                          endpoint_url=None, read_capacity=None, capacity_percent=None):
+    try:
+        source_config = table_config(source_table_name, aws_access_key, aws_secret_key, aws_session_token, endpoint_url)
+        os.makedirs(directory, exist_ok=True)
+
+        governor = None
+        if read_capacity or capacity_percent:
+            governor = CapacityGovernor(
+                capacity_budget(open_table(source_config), read_capacity, capacity_percent, 'ReadCapacityUnits')
+            )
+
+        started = time.monotonic()
+        workers = min(max_workers or total_segments, total_segments)
+        if governor is not None:
+            if use_processes:
+                governor = governor.split(workers)
+            else:
+                governor.workers = workers
+
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=workers) as executor:
+            futures = [
+                executor.submit(export_segment, source_config, directory, segment, total_segments, chunk_items, governor)
+                for segment in range(total_segments)
+            ]
+            exported = 0
+            paths = []
+            for future in as_completed(futures):
+                segment_exported, segment_paths = future.result()
+                exported += segment_exported
+                paths.extend(segment_paths)
+        write_export_manifest(directory, source_table_name, exported, paths)
+
+        print(f"Successfully exported {exported} items from {source_table_name} to {directory} "
+              f"in {time.monotonic() - started:.1f}s.")
+
+    except NoCredentialsError:
+        print("AWS credentials not provided.")
+    except PartialCredentialsError:
+        print("Incomplete AWS credentials provided.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+
+def import_dynamodb_table(directory, destination_table_name, aws_access_key, aws_secret_key, aws_session_token,
+                          max_workers=1, use_processes=False, write_concurrency=4, endpoint_url=None,
+                          write_capacity=None, capacity_percent=None, source_table_name=None):
+    try:
+        destination_config = table_config(
+            destination_table_name, aws_access_key, aws_secret_key, aws_session_token, endpoint_url
+        )
+        paths = find_export_files(directory, source_table_name)
+        if not paths:
+            print(f"No export files found in {directory}.")
+            return
+
+        governor = None
+        if write_capacity or capacity_percent:
+            governor = CapacityGovernor(
+                write_capacity=capacity_budget(
+                    open_table(destination_config), write_capacity, capacity_percent, 'WriteCapacityUnits'
+                )
+            )
+
+        # Spread the files round-robin over the workers, each worker streams its files through its own writer
+        started = time.monotonic()
+        workers = min(max_workers, len(paths))
+        if governor is not None and use_processes:
+            governor = governor.split(workers)
+
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=workers) as executor:
+            futures = [
+                executor.submit(import_files, destination_config, paths[worker::workers], write_concurrency, governor)
+                for worker in range(workers)
+            ]
+            stats = merge_write_stats(
+                [future.result() for future in as_completed(futures)], time.monotonic() - started
+            )
+
+        print(f"Successfully imported {stats['items']} items from {len(paths)} files into {destination_table_name}: "
+              f"{format_write_stats(stats)}.")
+
+    except NoCredentialsError:
+        print("AWS credentials not provided.")
+    except PartialCredentialsError:
+        print("Incomplete AWS credentials provided.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Export a DynamoDB table to compressed files or import such files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export a table to gzip compressed NDJSON files")
+    export_parser.add_argument("source_table_name")
+    export_parser.add_argument("directory")
+    export_parser.add_argument("--chunk-items", type=int, default=100000, help="Maximum number of items per file (default: 100000)")
+    export_parser.add_argument("--segments", type=int, default=1, help="Number of parallel scan segments (default: 1, sequential scan)")
+    export_parser.add_argument("--read-capacity", type=float, help="Read capacity units per second the export may use")
+
+    import_parser = subparsers.add_parser("import", help="Import exported files into a table")
+    import_parser.add_argument("directory")
+    import_parser.add_argument("destination_table_name")
+    import_parser.add_argument("--write-concurrency", type=int, default=4, help="Concurrent BatchWriteItem calls per worker (default: 4)")
+    import_parser.add_argument("--write-capacity", type=float, help="Write capacity units per second the import may use")
+    import_parser.add_argument("--source-table", help="Exported table to import, when the directory holds exports of several tables")
+
+    for subparser in (export_parser, import_parser):
+        add_credential_arguments(subparser)
+        subparser.add_argument("--workers", type=int, help="Size of the worker pool")
+        subparser.add_argument("--processes", action="store_true", help="Use a process pool instead of a thread pool")
+        subparser.add_argument("--endpoint-url", help="Custom DynamoDB endpoint, e.g. http://localhost:8000 for DynamoDB Local")
+        subparser.add_argument("--capacity-percent", type=float, help="Percentage of the provisioned capacity to use")
+        # Like every other command, export and import take the options after their own arguments
+        add_arguments(subparser)
+    args = parser.parse_args(argv)
+    check_credential_arguments(parser, args)
+
+    with instrumented(args):
+        if args.command == "export":
+            export_dynamodb_table(
+                args.source_table_name, args.directory, args.aws_access_key, args.aws_secret_key, args.aws_session_token,
+                args.segments, args.workers, args.processes, args.chunk_items, args.endpoint_url,
+                args.read_capacity, args.capacity_percent
+            )
+        else:
+            import_dynamodb_table(
+                args.directory, args.destination_table_name, args.aws_access_key, args.aws_secret_key, args.aws_session_token,
+                args.workers or 1, args.processes, args.write_concurrency, args.endpoint_url,
+                args.write_capacity, args.capacity_percent, args.source_table
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import json
+import re
+
+# Characters read from the file at a time
+READ_BUFFER_SIZE = 1 << 20
+
+_WHITESPACE = ' \t\n\r'
+
+# Strings and brackets, the only tokens that matter to find the end of a skipped object or array. The group is
+# empty for a string cut off at the end of the buffer
+_SKIP_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*(")?|[\[\]{}]')
+
+
+class JsonStreamReader:
+    """
+    Pull parser for JSON documents too large to load at once.
+
+    Objects and arrays are walked member by member and only the values asked for are decoded, so memory holds
+    the read buffer and the current value instead of the whole document::
+
+        reader = JsonStreamReader(file)
+        for key in reader.iter_object():
+            if key == 'paths':
+                for path in reader.iter_object():
+                    path_item = reader.read_value()
+            # Values that are not read are skipped
+
+    Values are decoded with the json module, iterating over a large object or array never holds it in memory.
+    """
+
+    def __init__(self, file, buffer_size=READ_BUFFER_SIZE):
+        """
+        :param file: File opened in text mode, or any object with a read(size) method returning str.
+        :param buffer_size: Characters read at a time.
+        :type buffer_size: int
+        """
+        self.file = file
+        self.buffer_size = buffer_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._position = 0
+        self._eof = False
+        # Number of values consumed, tells iter_object and iter_array whether the caller consumed a member
+        self._consumed = 0
+
+    def _fill(self):
+        # Read at least as much as is buffered, so retrying a large value costs linear time overall
+        data = self.file.read(max(self.buffer_size, len(self._buffer) - self._position))
+        self._eof = not data
+        # Drop what was consumed already, so the buffer does not grow with the file
+        self._buffer = self._buffer[self._position:] + data
+        self._position = 0
+
+    def peek(self):
+        """
+        :return: The next non-whitespace character, '' at the end of the file.
+        :rtype: str
+        """
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in _WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if self._eof:
+                return ''
+            self._fill()
+
+    def _expect(self, expected):
+        char = self.peek()
+        if not char:
+            raise ValueError(f"Unexpected end of JSON document, expected one of {expected!r}.")
+        if char not in expected:
+            raise ValueError(f"Expected one of {expected!r} in JSON document, found {char!r}.")
+        self._position += 1
+        return char
+
+    def read_value(self):
+        """
+        Decode the next value.
+
+        :return: The decoded value.
+        :rtype: any
+        """
+        return self._read()[0]
+
+    def read_value_text(self):
+        """
+        Decode the next value and return it along with its text in the document, e.g. to hash it.
+
+        :return: The decoded value and its text.
+        :rtype: Tuple[any, str]
+        """
+        value, start, end = self._read()
+        return value, self._buffer[start:end]
+
+    def _read(self):
+        # Returns the value and where its text starts and ends in the buffer
+        while True:
+            self.peek()
+            start = self._position
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+                self._fill()
+                continue
+
+            terminator = end
+            while terminator < len(self._buffer) and self._buffer[terminator] in _WHITESPACE:
+                terminator += 1
+            if not self._eof and (terminator == len(self._buffer) or self._buffer[terminator] not in ',]}:'):
+                # The value may continue in the next read, e.g. a number cut off at the buffer boundary
+                self._fill()
+                continue
+
+            self._position = end
+            self._consumed += 1
+            return value, start, end
+
+    def skip_value(self):
+        """
+        Skip the next value. Objects and arrays are scanned for their closing bracket without decoding them,
+        their content is not validated.
+        """
+        if self.peek() not in '{[':
+            self.read_value()
+            return
+
+        depth = 0
+        while True:
+            for match in _SKIP_TOKEN.finditer(self._buffer, self._position):
+                token = match.group()
+                if token[0] == '"':
+                    if match.group(1) is None:
+                        # Rescan the string once more of it is read
+                        break
+                elif token in '{[':
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        self._position = match.end()
+                        self._consumed += 1
+                        return
+                self._position = match.end()
+            else:
+                self._position = len(self._buffer)
+            if self._eof:
+                raise ValueError("Unexpected end of JSON document in a skipped value.")
+            self._fill()
+
+    def iter_object(self):
+        """
+        Iterate over the keys of the next value, an object. After each key the reader is positioned at its value,
+        which the caller reads, skips or iterates over; values the caller leaves alone are skipped.
+
+        :return: Iterator over the keys.
+        :rtype: Iterator[str]
+        """
+        self._expect('{')
+        self._consumed += 1
+        if self.peek() == '}':
+            self._position += 1
+            return
+
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected a string key in JSON object, found {key!r}.")
+            self._expect(':')
+
+            consumed = self._consumed
+            yield key
+            if self._consumed == consumed:
+                self.skip_value()
+
+            if self._expect(',}') == '}':
+                return
+
+    def iter_array(self):
+        """
+        Iterate over the elements of the next value, an array. For each element the reader is positioned at it,
+        the caller reads, skips or iterates over it; elements the caller leaves alone are skipped.
+
+        :return: Iterator yielding the index of every element.
+        :rtype: Iterator[int]
+        """
+        self._expect('[')
+        self._consumed += 1
+        if self.peek() == ']':
+            self._position += 1
+            return
+
+        index = 0
+        while True:
+            consumed = self._consumed
+            yield index
+            if self._consumed == consumed:
+                self.skip_value()
+
+            if self._expect(',]') == ']':
+                return
+            index += 1
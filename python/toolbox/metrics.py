@@ -0,0 +1,272 @@
+import json
+import math
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+
+# Upper bounds in seconds of the latency histogram buckets, the last bucket catches everything slower
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+
+class Histogram:
+    """
+    Count of observations per latency bucket, with their sum and maximum.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = 0
+        while value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, fraction):
+        """
+        Estimate a quantile as the upper bound of the bucket it falls into, the maximum for the last bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': self.max
+        }
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters, gauges and latency histograms.
+
+    Names follow the Prometheus conventions, e.g. dynamodb_scan_page_seconds or sqs_sent_total. The registry
+    lives in the process that records into it; worker processes of a process pool keep their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        """
+        Observe the duration of a block, e.g. with registry.timer('dynamodb_scan_page_seconds'): ...
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def snapshot(self):
+        """
+        :return: Current values of all metrics.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'timestamp': time.time(),
+                'uptime_seconds': time.time() - self.started,
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'histograms': {name: histogram.as_dict() for name, histogram in self.histograms.items()}
+            }
+
+    def to_prometheus(self):
+        """
+        :return: All metrics in the Prometheus text exposition format.
+        :rtype: str
+        """
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines += [f"# TYPE {name} counter", f"{name} {value}"]
+            for name, value in sorted(self.gauges.items()):
+                lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+            for name, histogram in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{le="{"+Inf" if bound == math.inf else bound}"}} {cumulative}')
+                lines += [f"{name}_sum {histogram.sum}", f"{name}_count {histogram.count}"]
+        return '\n'.join(lines) + '\n'
+
+
+# Registry the toolbox scripts record into
+registry = Metrics()
+
+
+def write_snapshot(output, metrics=registry):
+    """
+    Write the current metrics to stdout as one JSON line, or replace a file with them: Prometheus text if the
+    name ends with .prom (e.g. for the node_exporter textfile collector), JSON otherwise.
+
+    :param output: 'stdout' or a file path.
+    :type output: str
+    """
+    if output == 'stdout':
+        print(json.dumps(metrics.snapshot(), separators=(',', ':')), flush=True)
+        return
+
+    text = metrics.to_prometheus() if output.endswith('.prom') else json.dumps(metrics.snapshot(), indent=2)
+    # Readers of the file never see a partial write
+    temporary_path = f"{output}.tmp"
+    with open(temporary_path, 'w') as file:
+        file.write(text)
+    os.replace(temporary_path, output)
+
+
+class MetricsReporter:
+    """
+    Background thread writing a snapshot every interval seconds, and a last one when the run ends.
+    """
+
+    def __init__(self, output, interval=10.0, metrics=registry):
+        """
+        :param output: 'stdout' or a file path, see write_snapshot.
+        :type output: str
+        :param interval: Seconds between snapshots.
+        :type interval: float
+        """
+        self.output = output
+        self.interval = interval
+        self.metrics = metrics
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            write_snapshot(self.output, self.metrics)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stopped.set()
+        self._thread.join()
+        write_snapshot(self.output, self.metrics)
+
+
+@contextmanager
+def profiled(profile_path=None, trace_memory=False, top=15):
+    """
+    Profile a run with cProfile and/or trace its memory allocations with tracemalloc.
+
+    The profiles of the calling thread and of all threads started during the run are merged, saved to
+    profile_path for pstats or snakeviz and their top entries by cumulative time are printed. With trace_memory
+    the peak traced memory is recorded as the memory_peak_bytes gauge and the lines holding the most memory at
+    the end are printed.
+
+    :param profile_path: File to save the cProfile statistics to, no profiling if not given.
+    :type profile_path: str
+    :param trace_memory: Trace memory allocations.
+    :type trace_memory: bool
+    :param top: Number of entries to print.
+    :type top: int
+    """
+    profilers = []
+
+    def profile_thread(*_):
+        # Called on the first event of every thread started meanwhile, e.g. pool workers; cProfile only
+        # profiles the thread that enables it, so each thread gets its own profiler
+        sys.setprofile(None)
+        thread_profiler = cProfile.Profile()
+        profilers.append(thread_profiler)
+        thread_profiler.enable()
+
+    if trace_memory:
+        tracemalloc.start()
+    if profile_path:
+        # Imported here, they add to the start-up time of every command
+        import cProfile
+        import pstats
+
+        threading.setprofile(profile_thread)
+        profilers.append(cProfile.Profile())
+        profilers[0].enable()
+    try:
+        yield
+    finally:
+        if profile_path:
+            profilers[0].disable()
+            threading.setprofile(None)
+            stats = pstats.Stats(*profilers, stream=sys.stderr)
+            stats.dump_stats(profile_path)
+            print(f"Profile of {len(profilers)} threads written to {profile_path}, top {top} by cumulative time:",
+                  file=sys.stderr)
+            stats.sort_stats('cumulative').print_stats(top)
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            registry.set_gauge('memory_peak_bytes', peak)
+            print(f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB, top {top} allocations:", file=sys.stderr)
+            for statistic in snapshot.statistics('lineno')[:top]:
+                print(f"  {statistic}", file=sys.stderr)
+
+
+def add_arguments(parser):
+    """
+    Add the --metrics, --metrics-interval, --profile and --trace-memory options to a script's parser.
+    """
+    parser.add_argument("--metrics", metavar="OUTPUT", help="Write metric snapshots to 'stdout' as JSON lines, to a .prom "
+                                                            "file in Prometheus text format or to a JSON file")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="Seconds between metric snapshots (default: 10)")
+    parser.add_argument("--profile", metavar="PATH", help="Profile the run with cProfile and save the statistics to PATH")
+    parser.add_argument("--trace-memory", action="store_true", help="Trace memory allocations and report the peak")
+
+
+@contextmanager
+def instrumented(args):
+    """
+    Run a block with the reporting and profiling requested by the add_arguments options.
+    """
+    with ExitStack() as stack:
+        if args.metrics:
+            stack.enter_context(MetricsReporter(args.metrics, args.metrics_interval))
+        stack.enter_context(profiled(args.profile, args.trace_memory))
+        yield
@@ -0,0 +1,282 @@
+import argparse
+import gzip
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .json_stream import JsonStreamReader
+from .metrics import add_arguments, instrumented, registry
+from .transformer import evaluate_formulas_batch
+
+_WHITESPACE = ' \t\n\r'
+
+
+def open_text(path, mode='rt', compressed=None):
+    """
+    Open a text file, gzip compressed if the name ends with .gz unless compressed says otherwise.
+    """
+    if path.endswith('.gz') if compressed is None else compressed:
+        return gzip.open(path, mode, encoding='utf-8')
+    return open(path, mode[0], encoding='utf-8')
+
+
+def read_records(path):
+    """
+    Stream the records of a file holding either newline-delimited JSON or one JSON array, gzip compressed or not.
+
+    NDJSON records are yielded as their undecoded lines, so decoding happens in the worker processes;
+    array elements have to be decoded to find where they end and are yielded as parsed objects.
+
+    :param path: Path of the input file.
+    :type path: str
+    :return: Iterator over the records.
+    :rtype: Iterator[Union[str, dict]]
+    """
+    with open_text(path) as file:
+        first = ''
+        while True:
+            char = file.read(1)
+            if not char or char not in _WHITESPACE:
+                first = char
+                break
+
+        if first == '[':
+            reader = JsonStreamReader(_Prefixed(first, file))
+            for _ in reader.iter_array():
+                yield reader.read_value()
+            if reader.peek():
+                raise ValueError("Unexpected data after the JSON array.")
+            return
+
+        pending = first
+        for line in file:
+            line = pending + line
+            pending = ''
+            if line.strip():
+                yield line
+        if pending.strip():
+            yield pending
+
+
+class _Prefixed:
+    """
+    File wrapper returning an already consumed prefix before the rest of the file.
+    """
+
+    def __init__(self, prefix, file):
+        self.prefix = prefix
+        self.file = file
+
+    def read(self, size):
+        if self.prefix:
+            data, self.prefix = self.prefix, ''
+            return data
+        return self.file.read(size)
+
+
+def _chunked(records, chunk_size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def transform_chunk(formulas, records, merge=False, serialize=False):
+    """
+    Evaluate a formula mapping against a chunk of records.
+
+    :param formulas: Output field names mapped to the formulas computing them.
+    :type formulas: Dict[str, str]
+    :param records: Records, either parsed or as JSON text.
+    :type records: List[Union[str, dict]]
+    :param merge: Add the computed fields to the record instead of returning them alone.
+    :type merge: bool
+    :param serialize: Return the results as NDJSON text instead of dictionaries.
+    :type serialize: bool
+    :return: One result per record, in record order.
+    :rtype: Union[List[dict], str]
+    """
+    records = [json.loads(record) if isinstance(record, str) else record for record in records]
+    values = evaluate_formulas_batch(formulas.values(), records)
+    columns = [(name, values[formula]) for name, formula in formulas.items()]
+
+    results = []
+    for index, record in enumerate(records):
+        result = dict(record) if merge else {}
+        for name, column in columns:
+            result[name] = column[index]
+        results.append(result)
+
+    if serialize:
+        return ''.join(json.dumps(result, separators=(',', ':')) + '\n' for result in results)
+    return results
+
+
+def _record_chunk(started, record_count, formula_count):
+    registry.observe('transform_chunk_seconds', time.perf_counter() - started)
+    registry.increment('transform_records_total', record_count)
+    registry.increment('transformer_evaluations_total', record_count * formula_count)
+
+
+def run_chunks(chunks, formulas, workers=None, ordered=True, max_pending=None, merge=False, serialize=False):
+    """
+    Transform chunks of records on a process pool.
+
+    At most max_pending chunks are submitted but not yet consumed, reading the input pauses until the
+    consumer catches up, so memory stays bounded whatever the input size.
+
+    :param chunks: Iterable of record chunks.
+    :type chunks: Iterable[list]
+    :param formulas: Output field names mapped to formulas.
+    :type formulas: Dict[str, str]
+    :param workers: Number of worker processes, one per CPU by default. With 1 chunks are transformed in-process.
+    :type workers: int
+    :param ordered: Yield results in input order. Otherwise yield every chunk as soon as it is done.
+    :type ordered: bool
+    :param max_pending: Maximum number of chunks in flight (default: twice the number of workers).
+    :type max_pending: int
+    :return: Iterator over the transform_chunk result of every chunk.
+    :rtype: Iterator[Union[List[dict], str]]
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            started = time.perf_counter()
+            results = transform_chunk(formulas, chunk, merge, serialize)
+            _record_chunk(started, len(chunk), len(formulas))
+            yield results
+        return
+
+    max_pending = max_pending or workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        # Submission time and size of every pending chunk, the chunk latency includes the time spent queued
+        submitted = {}
+
+        def finished():
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+            results = [future.result() for future in done]
+            for future in done:
+                _record_chunk(*submitted.pop(future), len(formulas))
+            registry.set_gauge('transform_pending_chunks', len(pending))
+            return results
+
+        for chunk in chunks:
+            future = executor.submit(transform_chunk, formulas, chunk, merge, serialize)
+            submitted[future] = (time.perf_counter(), len(chunk))
+            pending.append(future)
+            if len(pending) >= max_pending:
+                yield from finished()
+        while pending:
+            yield from finished()
+
+
+def transform_records(records, formulas, workers=None, chunk_size=1000, ordered=True, max_pending=None, merge=False):
+    """
+    Apply a formula mapping to every record of an iterable, e.g. transform_records(read_records(path), formulas).
+
+    :param records: Records, parsed or as JSON text.
+    :type records: Iterable[Union[str, dict]]
+    :param formulas: Output field names mapped to formulas.
+    :type formulas: Dict[str, str]
+    :param chunk_size: Number of records sent to a worker at a time.
+    :type chunk_size: int
+    :return: Iterator over the results, see run_chunks for the other parameters.
+    :rtype: Iterator[dict]
+    """
+    for results in run_chunks(_chunked(records, chunk_size), formulas, workers, ordered, max_pending, merge):
+        yield from results
+
+
+def transform_file(input_path, output_path, formulas, workers=None, chunk_size=1000, ordered=True, max_pending=None,
+                   merge=False):
+    """
+    Apply a formula mapping to every record of an NDJSON or JSON array file and write the results as NDJSON.
+
+    Records are decoded, evaluated and encoded in the worker processes; the main process only reads and writes.
+    The output is written under a temporary name and renamed once complete.
+
+    :param input_path: NDJSON or JSON array file, optionally gzip compressed.
+    :type input_path: str
+    :param output_path: NDJSON output file, gzip compressed if the name ends with .gz.
+    :type output_path: str
+    :return: Number of records written.
+    :rtype: int
+    """
+    written = 0
+    temporary_path = f"{output_path}.tmp"
+    chunks = _chunked(read_records(input_path), chunk_size)
+    try:
+        with open_text(temporary_path, 'wt', output_path.endswith('.gz')) as file:
+            for text in run_chunks(chunks, formulas, workers, ordered, max_pending, merge, serialize=True):
+                file.write(text)
+                written += text.count('\n')
+        os.replace(temporary_path, output_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    return written
+
+
+def parse_formulas(formula_file=None, formula_args=()):
+    """
+    Build the formula mapping from a JSON file of {"field": "formula"} and NAME=FORMULA arguments.
+    """
+    formulas = {}
+    if formula_file:
+        with open(formula_file) as file:
+            formulas.update(json.load(file))
+    for formula_arg in formula_args:
+        name, separator, formula = formula_arg.partition('=')
+        if not separator:
+            raise ValueError(f"Invalid formula '{formula_arg}', expected NAME=FORMULA.")
+        formulas[name.strip()] = formula.strip()
+    return formulas
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Apply transformer formulas to every record of an NDJSON or JSON array file.")
+    parser.add_argument("input_path", help="NDJSON or JSON array file, optionally gzip compressed")
+    parser.add_argument("output_path", help="NDJSON output file, gzip compressed if the name ends with .gz")
+    parser.add_argument("--formulas", help="JSON file mapping output field names to formulas")
+    parser.add_argument("--formula", action="append", default=[], metavar="NAME=FORMULA", help="Output field and its formula, repeatable")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Records per chunk sent to a worker (default: 1000)")
+    parser.add_argument("--max-pending", type=int, help="Maximum chunks in flight (default: twice the number of workers)")
+    parser.add_argument("--unordered", action="store_true", help="Write chunks as soon as they are done instead of in input order")
+    parser.add_argument("--merge", action="store_true", help="Add the computed fields to the input records")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with instrumented(args):
+        try:
+            formulas = parse_formulas(args.formulas, args.formula)
+            if not formulas:
+                parser.error("no formulas given, use --formulas or --formula")
+
+            started = time.monotonic()
+            count = transform_file(
+                args.input_path, args.output_path, formulas, args.workers, args.chunk_size, not args.unordered,
+                args.max_pending, args.merge
+            )
+            seconds = time.monotonic() - started
+            print(f"Successfully transformed {count} records from {args.input_path} into {args.output_path} "
+                  f"in {seconds:.1f}s ({count / seconds if seconds else 0:.0f} records/s).")
+        except Exception as e:
+            print(f"An error occurred: {e}")
+
+
+if __name__ == "__main__":
+    main()
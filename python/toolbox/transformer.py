@@ -0,0 +1,858 @@
+import re
+import json
+import operator
+from functools import lru_cache
+from types import GeneratorType
+
+# NumPy is imported by the first batch evaluation, see _load_numpy; loading it takes longer than starting the rest
+# of the toolbox
+np = None
+
+# Maximum number of compiled formulas kept by compile_formula
+FORMULA_CACHE_SIZE = 1024
+# Maximum number of compiled JSON paths kept by compile_path
+PATH_CACHE_SIZE = 4096
+
+# Functions whose arguments are consumed as one flat sequence of values
+aggregate_functions = ['sum', 'max', 'min']
+
+
+def _flatten(args):
+    """
+    Flatten function arguments, so SUM(input.lines.amount) and SUM(a, b) both aggregate plain values.
+    """
+    values = []
+    for arg in args:
+        if isinstance(arg, list):
+            values.extend(_flatten(arg))
+        else:
+            values.append(arg)
+    return values
+
+
+def _aggregate(function):
+    def aggregate(*args):
+        # A lone lazy path argument already yields flat values, consume it without building a list
+        if len(args) == 1 and isinstance(args[0], GeneratorType):
+            return function(args[0])
+        return function(_flatten(args))
+    return aggregate
+
+
+# Functions available to formulas
+safe_dict = {
+    'sum': _aggregate(sum),
+    'max': _aggregate(max),
+    'min': _aggregate(min),
+    'concat': lambda *args: ''.join(map(str, args)),
+    'concatenate': lambda *args: ''.join(map(str, args))
+}
+
+# Regular expressions to match functions, variables, constants, and operators
+function_pattern = r'\b(?:SUM|CONCATENATE|MAX|MIN)\b'
+variable_pattern = r'[a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*'
+quoted_constant_pattern = r"'[^']*'"
+constant_pattern = r'\b\d+(\.\d+)?\b'
+operator_pattern = r'[+\-*\/]'
+punctuation_pattern = r'[(),]'
+
+# Combine the patterns into a single pattern, compiled once
+token_pattern = re.compile(
+    rf'\s*(?:(?P<function>{function_pattern})|(?P<variable>{variable_pattern})'
+    rf'|(?P<quoted_constant>{quoted_constant_pattern})|(?P<constant>{constant_pattern})'
+    rf'|(?P<operator>{operator_pattern})|(?P<punctuation>{punctuation_pattern}))'
+)
+
+
+class FormulaSyntaxError(ValueError):
+    """
+    Raised for formulas that cannot be parsed.
+    """
+
+
+# Maximum nesting of parentheses, function calls and signs, and maximum number of tokens of a formula.
+# Together they bound the recursion of parser and evaluator for formulas from untrusted sources.
+MAX_FORMULA_DEPTH = 64
+MAX_FORMULA_TOKENS = 400
+
+
+class Constant:
+    def __init__(self, value):
+        self.value = value
+
+
+class Variable:
+    def __init__(self, path):
+        self.path = path
+
+
+class UnaryOperation:
+    def __init__(self, operator, operand):
+        self.operator = operator
+        self.operand = operand
+
+
+class BinaryOperation:
+    def __init__(self, operator, left, right):
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+
+class FunctionCall:
+    def __init__(self, name, arguments):
+        self.name = name
+        self.arguments = arguments
+
+
+def _multiply(left, right):
+    # Repeating a string or list would let a short formula build an arbitrarily large value
+    if isinstance(left, (str, list)) or isinstance(right, (str, list)):
+        raise TypeError("Only numbers can be multiplied.")
+    return left * right
+
+
+unary_operators = {'+': operator.pos, '-': operator.neg}
+binary_operators = {'+': operator.add, '-': operator.sub, '*': _multiply, '/': operator.truediv}
+
+
+def tokenize(formula):
+    """
+    Split a formula into tokens.
+
+    :param formula: The formula to tokenize.
+    :type formula: str
+    :return: A list of (type, value, position) tuples, the type being one of 'function', 'variable',
+        'quoted_constant', 'constant', 'operator' and 'punctuation'. Constants are converted to int, float or str.
+    :rtype: List[Tuple[str, any, int]]
+    """
+    tokens = []
+    position = 0
+    end = len(formula.rstrip())
+    while position < end:
+        match = token_pattern.match(formula, position)
+        if match is None:
+            raise FormulaSyntaxError(f"Unexpected character {formula[position:].lstrip()[0]!r} "
+                                     f"at position {position} in formula '{formula}'.")
+
+        elem_type = match.lastgroup
+        value = match.group(elem_type)
+        if elem_type == 'function':
+            value = value.lower()
+        elif elem_type == 'quoted_constant':
+            value = value[1:-1]
+        elif elem_type == 'constant':
+            value = float(value) if '.' in value else int(value)
+        tokens.append((elem_type, value, match.start(elem_type)))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent parser, * and / bind stronger than + and -.
+    """
+
+    def __init__(self, formula):
+        self.formula = formula
+        self.tokens = tokenize(formula)
+        self.index = 0
+        self.depth = 0
+        if len(self.tokens) > MAX_FORMULA_TOKENS:
+            raise FormulaSyntaxError(f"Formula has more than {MAX_FORMULA_TOKENS} tokens.")
+
+    def parse(self):
+        tree = self.expression()
+        if self.index < len(self.tokens):
+            self.error("Unexpected")
+        return tree
+
+    def error(self, message):
+        if self.index < len(self.tokens):
+            _, value, position = self.tokens[self.index]
+            message = f"{message} {value!r} at position {position}"
+        else:
+            message = f"{message} end"
+        raise FormulaSyntaxError(f"{message} in formula '{self.formula}'.")
+
+    def peek(self):
+        return self.tokens[self.index][:2] if self.index < len(self.tokens) else (None, None)
+
+    def expect(self, value):
+        if self.peek() != ('punctuation', value):
+            self.error(f"Expected '{value}', found")
+        self.index += 1
+
+    def expression(self):
+        node = self.term()
+        while self.peek() in (('operator', '+'), ('operator', '-')):
+            self.index += 1
+            node = _fold(BinaryOperation(self.tokens[self.index - 1][1], node, self.term()))
+        return node
+
+    def term(self):
+        node = self.unary()
+        while self.peek() in (('operator', '*'), ('operator', '/')):
+            self.index += 1
+            node = _fold(BinaryOperation(self.tokens[self.index - 1][1], node, self.unary()))
+        return node
+
+    def nested(self, parse):
+        self.depth += 1
+        if self.depth > MAX_FORMULA_DEPTH:
+            self.error("Formula nested too deeply at")
+        node = parse()
+        self.depth -= 1
+        return node
+
+    def unary(self):
+        if self.peek() in (('operator', '+'), ('operator', '-')):
+            sign = self.tokens[self.index][1]
+            self.index += 1
+            return _fold(UnaryOperation(sign, self.nested(self.unary)))
+        return self.primary()
+
+    def primary(self):
+        elem_type, value = self.peek()
+        if elem_type in ('constant', 'quoted_constant'):
+            self.index += 1
+            return Constant(value)
+        if elem_type == 'variable':
+            self.index += 1
+            if self.peek() == ('punctuation', '('):
+                self.index -= 1
+                self.error("Unknown function")
+            return Variable(value)
+        if elem_type == 'function':
+            return self.nested(self.call)
+        if (elem_type, value) == ('punctuation', '('):
+            return self.nested(self.group)
+        self.error("Expected a value, found")
+
+    def group(self):
+        self.expect('(')
+        node = self.expression()
+        self.expect(')')
+        return node
+
+    def call(self):
+        name = self.tokens[self.index][1]
+        self.index += 1
+        self.expect('(')
+        arguments = []
+        while self.peek() != ('punctuation', ')'):
+            if self.index == len(self.tokens):
+                self.error("Expected ')', found")
+            if arguments and self.peek() == ('punctuation', ','):
+                self.index += 1
+            # Without a comma adjacent operands are separate arguments, e.g. CONCATENATE(input.no ' ' input.description)
+            arguments.append(self.expression())
+        self.expect(')')
+        return FunctionCall(name, arguments)
+
+
+def _fold(node):
+    """
+    Compute operations on constants once while parsing.
+    """
+    operands = [node.operand] if isinstance(node, UnaryOperation) else [node.left, node.right]
+    if not all(isinstance(operand, Constant) for operand in operands):
+        return node
+    try:
+        if isinstance(node, UnaryOperation):
+            return Constant(unary_operators[node.operator](node.operand.value))
+        return Constant(binary_operators[node.operator](node.left.value, node.right.value))
+    except (ArithmeticError, TypeError):
+        # Keep the operation, so the error is raised when the formula is evaluated
+        return node
+
+
+def parse_formula(formula):
+    """
+    Parse a formula into an expression tree of Constant, Variable, UnaryOperation, BinaryOperation and
+    FunctionCall nodes.
+
+    :param formula: The formula to parse.
+    :type formula: str
+    :return: Root node of the expression tree.
+    :rtype: any
+    :raises FormulaSyntaxError: If the formula is not valid.
+    """
+    return _Parser(formula).parse()
+
+
+def compile_tree(node, functions=None, operators=None):
+    """
+    Turn an expression tree into nested closures, without eval.
+
+    :param node: Root node of the expression tree.
+    :param functions: Implementations of the formula functions, safe_dict by default.
+    :type functions: dict
+    :param operators: Implementations of the binary operators, binary_operators by default.
+    :type operators: dict
+    :return: Function computing the formula from a dictionary of path values.
+    :rtype: Callable[[dict], any]
+    """
+    functions = safe_dict if functions is None else functions
+    operators = binary_operators if operators is None else operators
+
+    if isinstance(node, Constant):
+        value = node.value
+        return lambda values: value
+    if isinstance(node, Variable):
+        path = node.path
+        return lambda values: values[path]
+    if isinstance(node, UnaryOperation):
+        unary = unary_operators[node.operator]
+        operand = compile_tree(node.operand, functions, operators)
+        return lambda values: unary(operand(values))
+    if isinstance(node, BinaryOperation):
+        binary = operators[node.operator]
+        # Read variables and constants inline instead of through a closure of their own
+        if isinstance(node.left, Variable) and isinstance(node.right, Constant):
+            path, value = node.left.path, node.right.value
+            return lambda values: binary(values[path], value)
+        if isinstance(node.left, Constant) and isinstance(node.right, Variable):
+            value, path = node.left.value, node.right.path
+            return lambda values: binary(value, values[path])
+        left = compile_tree(node.left, functions, operators)
+        right = compile_tree(node.right, functions, operators)
+        return lambda values: binary(left(values), right(values))
+
+    function = functions[node.name]
+    if len(node.arguments) == 1 and isinstance(node.arguments[0], Variable):
+        path = node.arguments[0].path
+        return lambda values: function(values[path])
+    if all(isinstance(argument, (Variable, Constant)) for argument in node.arguments):
+        # Constants are passed through the values of the call, e.g. the separator of CONCATENATE(a, ' ', b)
+        arguments = [(argument.path, None) if isinstance(argument, Variable) else (None, argument.value)
+                     for argument in node.arguments]
+        return lambda values: function(*[value if path is None else values[path] for path, value in arguments])
+    arguments = [compile_tree(argument, functions, operators) for argument in node.arguments]
+    if len(arguments) == 1:
+        argument = arguments[0]
+        return lambda values: function(argument(values))
+    return lambda values: function(*[argument(values) for argument in arguments])
+
+
+def _variables(node, sole_aggregate_argument=False):
+    """
+    Yield (path, sole_aggregate_argument) for every variable of an expression tree, in formula order.
+    """
+    if isinstance(node, Variable):
+        yield node.path, sole_aggregate_argument
+    elif isinstance(node, UnaryOperation):
+        yield from _variables(node.operand)
+    elif isinstance(node, BinaryOperation):
+        yield from _variables(node.left)
+        yield from _variables(node.right)
+    elif isinstance(node, FunctionCall):
+        sole = node.name in aggregate_functions and len(node.arguments) == 1
+        for argument in node.arguments:
+            yield from _variables(argument, sole)
+
+
+class CompiledFormula:
+    """
+    A formula parsed once into an expression tree and compiled into closures.
+
+    Evaluating it against a JSON document only looks up the referenced paths and calls the closures; no Python
+    source is generated or evaluated, so formulas from untrusted sources can only use the formula functions and
+    operators.
+    """
+
+    def __init__(self, formula):
+        """
+        :param formula: The formula to compile.
+        :type formula: str
+        :raises FormulaSyntaxError: If the formula is not valid.
+        """
+        self.formula = formula
+        self.tree = parse_formula(formula)
+        variables = list(_variables(self.tree))
+        # Distinct variable paths, in formula order
+        self.paths = list(dict.fromkeys(path for path, _ in variables))
+        self._evaluate = compile_tree(self.tree)
+        self._plan = LookupPlan(self.paths, lazy_paths=self._lazy_paths(variables))
+
+    def _lazy_paths(self, variables):
+        """
+        A path used once, as the sole argument of SUM/MAX/MIN, e.g. SUM(input.lines.amount), can be passed to
+        the function as a lazy iterator of its values. An iterator is consumed once, so a repeated path is not.
+        """
+        paths = [path for path, _ in variables]
+        return [path for path, sole_aggregate_argument in variables
+                if sole_aggregate_argument and paths.count(path) == 1]
+
+    def __call__(self, json_data):
+        """
+        Evaluate the formula using the provided JSON data.
+
+        :param json_data: The JSON data to use for evaluation.
+        :type json_data: dict
+        :return: The result of the evaluation.
+        :rtype: any
+        """
+        return self._evaluate(self._plan.resolve(json_data))
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def compile_formula(formula):
+    """
+    Compile a formula, reusing the compiled form of recently used formulas.
+
+    Hit and miss statistics of the cache are available through compile_formula.cache_info().
+
+    :param formula: The formula to compile.
+    :type formula: str
+    :return: Callable evaluating the formula against JSON data.
+    :rtype: CompiledFormula
+    """
+    return CompiledFormula(formula)
+
+
+def evaluate_subformula(subformula, json_data):
+    """
+    Evaluate a subformula using the provided JSON data.
+
+    :param subformula: The subformula to evaluate.
+    :type subformula: str
+
+    :param json_data: The JSON data to use for evaluation.
+    :type json_data: dict
+
+    :return: The result of the evaluation.
+    :rtype: any
+    """
+    return compile_formula(subformula)(json_data)
+
+
+def evaluate_formula(formula, json_data):
+    """
+    Evaluate a given formula using the provided JSON data.
+
+    :param formula: The formula to evaluate.
+    :type formula: str
+    :param json_data: The JSON data to use for evaluation.
+    :type json_data: dict
+    :return: The result of the evaluation.
+    :rtype: any
+    """
+    return compile_formula(formula)(json_data)
+
+
+class _NotVectorizable(Exception):
+    """
+    Raised when a formula cannot be computed on columns and has to be evaluated record by record.
+    """
+
+
+class _RaggedColumn:
+    """
+    Values of a path that yields a list per record, stored as one flat array plus the list length of every record.
+    """
+
+    def __init__(self, values, lengths):
+        self.values = values
+        self.lengths = lengths
+
+    def reduce(self, ufunc):
+        kind = self.values.dtype.kind
+        if kind not in 'if':
+            raise _NotVectorizable()
+
+        non_empty = self.lengths > 0
+        if ufunc is np.add and kind == 'f':
+            # Python adds floats one by one (with compensation since 3.12), reduceat would round differently. SUM of
+            # an empty list is the int 0.
+            values = self.values.tolist()
+            ends = np.cumsum(self.lengths).tolist()
+            sums = [sum(values[end - length:end]) for end, length in zip(ends, self.lengths.tolist())]
+            return np.asarray(sums, dtype=None if non_empty.all() else object)
+
+        starts = np.concatenate(([0], np.cumsum(self.lengths)[:-1]))
+        if non_empty.all():
+            return _exact(lambda values: ufunc.reduceat(values, starts), self.values)
+        if ufunc is not np.add:
+            # MAX/MIN of an empty list is an error, let the per-record evaluator raise it
+            raise _NotVectorizable()
+
+        # SUM of an empty list is 0; reduceat over the starts of the non-empty lists covers exactly those lists
+        result = np.zeros(len(self.lengths), dtype=self.values.dtype)
+        if non_empty.any():
+            result[non_empty] = _exact(lambda values: np.add.reduceat(values, starts[non_empty]), self.values)
+        return result
+
+
+# Largest integer magnitude computed on int64 columns. Up to 2**53 integers convert to float exactly, so mixing them
+# with floats and dividing them gives the results of Python ints; beyond it, and on int64 overflow, which NumPy does
+# not report, formulas are left to the per-record evaluator.
+EXACT_INT_LIMIT = 2 ** 53
+
+
+def _exact(compute, *operands):
+    """
+    Compute on numeric columns, refusing results that could differ from Python's arithmetic.
+    """
+    if any(type(operand) is int and abs(operand) > EXACT_INT_LIMIT for operand in operands):
+        raise _NotVectorizable()
+
+    result = compute(*operands)
+    if getattr(result, 'dtype', None) is not None and result.dtype.kind in 'iu':
+        # Floats do not wrap around, an estimate of the result in floats shows whether the integers did
+        estimate = compute(*[operand.astype(np.float64) if isinstance(operand, np.ndarray) else operand
+                             for operand in operands])
+        if np.any(np.abs(estimate) > EXACT_INT_LIMIT) or np.any(np.abs(result) > EXACT_INT_LIMIT):
+            raise _NotVectorizable()
+    return result
+
+
+def _column_array(values):
+    """
+    An int64 or float64 array of values all of one numeric type, an object array otherwise.
+
+    Python keeps ints and floats apart (2 + 5 is 7, not 7.0), a column mixing them would turn every value into a float.
+    """
+    types = set(map(type, values))
+    if types == {int} and all(-EXACT_INT_LIMIT <= value <= EXACT_INT_LIMIT for value in values):
+        return np.asarray(values, dtype=np.int64)
+    if types == {float}:
+        return np.asarray(values, dtype=np.float64)
+    return np.asarray(values, dtype=object)
+
+
+def _build_column(records, path):
+    values = [get_value_from_json(record, path) for record in records]
+    if not any(isinstance(value, list) for value in values):
+        return _column_array(values)
+
+    lengths = []
+    flat_values = []
+    for value in values:
+        flattened = _flatten([value])
+        lengths.append(len(flattened))
+        flat_values.extend(flattened)
+    return _RaggedColumn(_column_array(flat_values), np.asarray(lengths))
+
+
+def _vector_aggregate(ufunc):
+    def aggregate(*args):
+        if len(args) == 1 and isinstance(args[0], _RaggedColumn):
+            return args[0].reduce(ufunc)
+        if any(isinstance(arg, _RaggedColumn) for arg in args):
+            raise _NotVectorizable()
+
+        arrays = np.broadcast_arrays(*[np.asarray(arg) for arg in args])
+        kinds = {array.dtype.kind for array in arrays}
+        # MAX(1, 1.0) is the first of the two in Python, keep the type of every value by aggregating one type only
+        if len(kinds) != 1 or kinds.pop() not in 'if':
+            raise _NotVectorizable()
+        if ufunc is np.add and arrays[0].dtype.kind == 'f' and len(arrays) > 2:
+            return np.asarray([sum(values) for values in zip(*[array.tolist() for array in arrays])])
+        if len(arrays) == 1:
+            # sum([x]) is 0 + x
+            return arrays[0] + 0 if ufunc is np.add else arrays[0]
+        return _exact(lambda *arrays: ufunc.reduce(arrays), *arrays)
+    return aggregate
+
+
+def _as_list(value, record_count):
+    if isinstance(value, np.ndarray):
+        return value.tolist() if value.ndim else [value.item()] * record_count
+    return [value] * record_count
+
+
+def _vector_concat(record_count):
+    def concat(*args):
+        if any(isinstance(arg, _RaggedColumn) for arg in args):
+            raise _NotVectorizable()
+        columns = [_as_list(arg, record_count) for arg in args]
+        return np.asarray([''.join(map(str, parts)) for parts in zip(*columns)], dtype=object)
+    return concat
+
+
+def _vector_multiply(left, right):
+    if any(isinstance(operand, (str, list)) or getattr(operand, 'dtype', None) == object for operand in (left, right)):
+        raise _NotVectorizable()
+    return left * right
+
+
+def _vector_operator(function):
+    def apply(left, right):
+        return _exact(function, left, right)
+    return apply
+
+
+@lru_cache(maxsize=None)
+def _load_numpy():
+    """
+    Import NumPy for the vectorized batch evaluation.
+
+    :return: Whether NumPy is installed, without it batch evaluation falls back to the per-record evaluator.
+    :rtype: bool
+    """
+    global np
+    try:
+        import numpy as np
+    except ImportError:
+        return False
+    return True
+
+
+def evaluate_formulas_batch(formulas, records):
+    """
+    Evaluate several formulas against many records at once.
+
+    Every referenced path is read once per record into a column shared by all formulas. With NumPy installed,
+    SUM/MAX/MIN and the arithmetic between them are then computed on whole columns. Formulas that cannot be
+    computed that way (non-numeric values, paths mixing ints and floats, integers beyond EXACT_INT_LIMIT, empty lists
+    in MAX/MIN, division by zero), and all formulas when NumPy is missing, are evaluated record by record. Results,
+    including the type of every value, are the same as those of evaluate_formula.
+
+    :param formulas: The formulas to evaluate.
+    :type formulas: Iterable[str]
+    :param records: The JSON records, e.g. a list of documents or a large JSON array.
+    :type records: Iterable[dict]
+    :return: The results of every formula, one per record in record order.
+    :rtype: Dict[str, list]
+    """
+    records = records if isinstance(records, list) else list(records)
+    compiled_formulas = {formula: compile_formula(formula) for formula in formulas}
+    if not records or not _load_numpy():
+        return {formula: [compiled(record) for record in records] for formula, compiled in compiled_formulas.items()}
+
+    columns = {}
+    vector_functions = {
+        'sum': _vector_aggregate(np.add),
+        'max': _vector_aggregate(np.maximum),
+        'min': _vector_aggregate(np.minimum),
+        'concat': _vector_concat(len(records)),
+        'concatenate': _vector_concat(len(records))
+    }
+    vector_operators = {
+        name: _vector_operator(function) for name, function in {**binary_operators, '*': _vector_multiply}.items()
+    }
+
+    results = {}
+    for formula, compiled in compiled_formulas.items():
+        try:
+            for path in compiled.paths:
+                if path not in columns:
+                    columns[path] = _build_column(records, path)
+
+            # Raise instead of producing inf/nan, so division by zero fails like the per-record evaluator
+            with np.errstate(all='raise'):
+                result = compile_tree(compiled.tree, vector_functions, vector_operators)(columns)
+            if isinstance(result, _RaggedColumn):
+                raise _NotVectorizable()
+
+            if isinstance(result, np.ndarray) and result.shape == (len(records),):
+                results[formula] = result.tolist()
+            else:
+                # Constant formulas, SUM(7) is a 0-d array
+                results[formula] = _as_list(result.item() if isinstance(result, np.generic) else result, len(records))
+        except (_NotVectorizable, ArithmeticError, TypeError, ValueError, KeyError):
+            results[formula] = [compiled(record) for record in records]
+
+    return results
+
+
+def _step(value, key):
+    """
+    Look up a key in a value, in every element if the value is a list.
+    """
+    if isinstance(value, list):
+        return [_step(element, key) for element in value]
+    if key in value:
+        return value[key]
+    raise KeyError(f"Key '{key}' not found in JSON data")
+
+
+def _iter_values(value, keys, depth=0):
+    """
+    Lazily yield the values under the remaining keys, flattening every list on the way like the aggregates do.
+    """
+    if not isinstance(value, list):
+        value = [value]
+
+    last = len(keys) - 1
+    for element in value:
+        if isinstance(element, list):
+            yield from _iter_values(element, keys, depth)
+        elif depth > last:
+            yield element
+        elif keys[depth] not in element:
+            raise KeyError(f"Key '{keys[depth]}' not found in JSON data")
+        else:
+            child = element[keys[depth]]
+            # Common case, the last key of a list of objects holds a plain value
+            if depth == last and not isinstance(child, list):
+                yield child
+            else:
+                yield from _iter_values(child, keys, depth + 1)
+
+
+class PathAccessor:
+    """
+    A JSON path split into its keys once, for repeated lookups in many documents.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: JSON path, e.g. input.lines.amount.
+        :type path: str
+        """
+        self.path = path
+        self.keys = tuple(path.split('.'))
+
+    def __call__(self, data):
+        """
+        :param data: JSON data.
+        :type data: dict
+        :return: Value from the JSON element found under the path, a list for every list on the way.
+        :rtype: dict, str, list
+        """
+        value = data
+        for key in self.keys:
+            value = _step(value, key)
+        return value
+
+    def iter_values(self, data):
+        """
+        :param data: JSON data.
+        :type data: dict
+        :return: Lazy iterator over the flattened values found under the path.
+        :rtype: Iterator
+        """
+        return _iter_values(data, self.keys)
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def compile_path(path):
+    """
+    Compile a JSON path, reusing the compiled form of recently used paths.
+
+    :param path: JSON path, e.g. input.lines.amount.
+    :type path: str
+    :return: Callable returning the value under the path.
+    :rtype: PathAccessor
+    """
+    return PathAccessor(path)
+
+
+class _PlanNode:
+    def __init__(self):
+        self.children = {}
+        # (name, lazy) of the paths ending at this node
+        self.ends = []
+        # (name, remaining keys) of all paths at or below this node
+        self.suffixes = []
+        self.all_lazy = True
+
+
+class LookupPlan:
+    """
+    Looks up several JSON paths in a document in a single walk.
+
+    The paths are arranged as a tree of their keys, so a prefix shared by several paths (input.lines in
+    input.lines.amount and input.lines.taxAmount) is looked up once per document. Paths marked lazy are returned
+    as iterators over their flattened values; once the walk reaches a list below which all paths are lazy, the
+    list is iterated by those iterators instead of being copied level by level.
+    """
+
+    def __init__(self, paths, names=None, lazy_paths=()):
+        """
+        :param paths: The JSON paths to look up.
+        :type paths: List[str]
+        :param names: Keys of the paths in the resolved dictionary, the paths themselves by default.
+        :type names: List[str]
+        :param lazy_paths: Paths to return as lazy iterators of their flattened values.
+        :type lazy_paths: Iterable[str]
+        """
+        self.paths = list(paths)
+        names = list(names) if names is not None else self.paths
+        lazy_paths = set(lazy_paths)
+        self._root = _PlanNode()
+        for path, name in zip(self.paths, names):
+            keys = compile_path(path).keys
+            lazy = path in lazy_paths
+            node = self._root
+            for depth, key in enumerate(keys):
+                node.suffixes.append((name, keys[depth:]))
+                node.all_lazy = node.all_lazy and lazy
+                node = node.children.setdefault(key, _PlanNode())
+            node.suffixes.append((name, ()))
+            node.all_lazy = node.all_lazy and lazy
+            node.ends.append((name, lazy))
+
+    def resolve(self, data):
+        """
+        :param data: JSON data.
+        :type data: dict
+        :return: The value (or lazy iterator) of every path, keyed by its name.
+        :rtype: dict
+        """
+        values = {}
+        self._resolve(self._root, data, values)
+        return values
+
+    def _resolve(self, node, value, values):
+        if node.all_lazy and isinstance(value, list):
+            for name, keys in node.suffixes:
+                values[name] = _iter_values(value, keys)
+            return
+
+        for name, lazy in node.ends:
+            values[name] = _iter_values(value, ()) if lazy else value
+        for key, child in node.children.items():
+            self._resolve(child, _step(value, key), values)
+
+
+def get_value_from_json(data, path):
+    """
+    Extract value from JSON data based on the provided path.
+
+    :param data: JSON data.
+    :type data: dict
+    :param path: JSON path for element to get value from.
+    :type path: str
+    :return: Value from the JSON element found under specified path.
+    :rtype: dict, str, list
+    """
+    return compile_path(path)(data)
+
+
+# Example JSON data
+json_data = {
+    "input": {
+        "no": "123",
+        "description": "Test Description",
+        "lines": [{
+            "amount": 100,
+            "taxAmount": 10
+        }, {
+            "amount": 90,
+            "taxAmount": 9
+        }]
+    }
+}
+
+if __name__ == "__main__":
+    # Example usage with your formulas
+    formulas = [
+        "SUM(input.lines.amount)-SUM(input.lines.taxAmount)/SUM(input.lines.amount)",
+        "SUM(input.lines.amount)",
+        "CONCATENATE(input.no, ' ', input.description)",
+        "MAX(input.lines.amount)",
+        "MIN(input.lines.amount)",
+        "MAX(input.lines.taxAmount)+SUM(input.lines.amount)",
+        "MAX(input.lines.taxAmount)+MAX(input.lines.amount)"
+    ]
+
+    for formula in formulas:
+        result = evaluate_formula(formula, json_data)
+        print(f"Formula: {formula}")
+        print(f"Result: {result}")
+        print()
+
+    print(f"Formula cache: {compile_formula.cache_info()}")